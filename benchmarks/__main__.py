@@ -0,0 +1,65 @@
+""" python -m benchmarks """
+
+import argparse
+from pathlib import Path
+
+from financial_planner import DATE_TYPE_STR_MAP
+from benchmarks.suite import ENGINES, compare, load, run_benchmark, save
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Times create_simulation, Simulation.run and the output stage on a synthetic config",
+    )
+    parser.add_argument("--accounts", help="Number of accounts (default: 5)", type=int, default=5)
+    parser.add_argument("--transactions", help="Transactions of each frequency per account (default: 5)", type=int, default=5)
+    parser.add_argument("--transfers", help="Monthly transfers out of the first account (default: 5)", type=int, default=5)
+    parser.add_argument("--mortgages", help="Number of mortgages (default: 1)", type=int, default=1)
+    parser.add_argument("--external-rows", help="Rows of the external CSV of each account (default: 0, no CSV)", type=int, default=0)
+    parser.add_argument("--years", help="Years to simulate (default: 10)", type=int, default=10)
+    parser.add_argument("--seed", help="Seed of the config generator (default: 0)", type=int, default=0)
+    parser.add_argument("--repeats", help="Times each stage is timed (default: 3)", type=int, default=3)
+    parser.add_argument("--engine", help="Simulation engine (default: event)", choices=ENGINES, default='event')
+    parser.add_argument("--step", help="Time step of the simulation (default: day)", choices=list(DATE_TYPE_STR_MAP), default='day')
+    parser.add_argument("--lazy-interest", help="Run with lazy interest", action="store_true")
+    parser.add_argument("--integer-cents", help="Run on integer cents", action="store_true")
+    parser.add_argument("--output", help="Save the results as JSON", type=Path, metavar="PATH")
+    parser.add_argument("--compare", help="Compare against saved results instead of (or after) running", type=Path, metavar="PATH", nargs='+')
+    arguments = parser.parse_args()
+
+    if arguments.compare is not None and len(arguments.compare) == 2:
+        print(compare(load(arguments.compare[0]), load(arguments.compare[1])))
+        return
+    parameters = {
+        'accounts': arguments.accounts,
+        'transactions': arguments.transactions,
+        'transfers': arguments.transfers,
+        'mortgages': arguments.mortgages,
+        'external_rows': arguments.external_rows,
+        'years': arguments.years,
+        'seed': arguments.seed,
+    }
+    results = run_benchmark(
+        parameters,
+        repeats=arguments.repeats,
+        engine=arguments.engine,
+        step=arguments.step,
+        lazy_interest=arguments.lazy_interest,
+        integer_cents=arguments.integer_cents,
+    )
+    for stage, timing in results['timings'].items():
+        if timing is None:
+            print(f"{stage:<18} n/a")
+            continue
+        print(f"{stage:<18} min {timing['min']:.4f}s  median {timing['median']:.4f}s")
+    log_rows = 'no' if results['counts']['log_rows'] is None else results['counts']['log_rows']
+    print(f"{results['counts']['days']} days, {log_rows} log rows, {results['throughput']['days_per_second']:.0f} days/s")
+    if results['counts']['bankrupt_date'] is not None:
+        print(f"WARNING: the plan went bankrupt on {results['counts']['bankrupt_date']}")
+    if arguments.output is not None:
+        save(results, arguments.output)
+    if arguments.compare is not None:
+        print(compare(load(arguments.compare[0]), results))
+
+if __name__ == "__main__":
+    main()
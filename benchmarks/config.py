@@ -0,0 +1,107 @@
+""" Synthetic configs for benchmarking """
+
+import csv
+import datetime
+from pathlib import Path
+import random
+
+START_DATE = datetime.date(2023, 1, 1)
+FREQUENCIES = ('weekly', 'biweekly', 'monthly', 'yearly')
+
+def end_date(years: int) -> datetime.date:
+    return START_DATE.replace(year=START_DATE.year + years)
+
+def synthetic_config(
+        accounts: int = 5,
+        transactions: int = 5,
+        transfers: int = 5,
+        mortgages: int = 1,
+        external_rows: int = 0,
+        years: int = 10,
+        seed: int = 0,
+        directory: Path = None) -> str:
+    """YAML text of a plan that stays solvent for years
+
+    Every account gets transactions of each frequency (half income, half
+    expense), the first account pays for transfers into the others and the
+    mortgages. external_rows > 0 writes a CSV of that many one-off yearly
+    rows per account into directory and imports it.
+    """
+    assert(accounts > 0), "At least 1 account is needed"
+    assert(external_rows == 0 or directory is not None), "External CSVs need a directory"
+    generator = random.Random(seed)
+    last_day = end_date(years)
+    horizon = (last_day - START_DATE).days
+
+    def day(offset: int = None) -> str:
+        if offset is None:
+            offset = generator.randrange(28)
+        return (START_DATE + datetime.timedelta(days=offset)).isoformat()
+
+    def amount(low: float, high: float) -> str:
+        return f"{generator.uniform(low, high):.2f}"
+
+    lines = ['accounts:']
+    names = [f"Account {index}" for index in range(accounts)]
+    for index, name in enumerate(names):
+        lines += [
+            f"  - name: {name}",
+            f"    interest_rate: {generator.choice(['0.00', '0.01', '0.02', '0.04'])}",
+            f"    balance: {1000000 if index == 0 else 10000}.00",
+            f"    withdrawal_priority: {index}",
+            "    transactions:",
+        ]
+        for kind, low, high in [('income', 500, 2000), ('expense', 10, 400)]:
+            lines.append(f"      {kind}:")
+            for frequency in FREQUENCIES:
+                count = transactions // 2 if kind == 'expense' else transactions - transactions // 2
+                if count == 0:
+                    continue
+                lines.append(f"        {frequency}:")
+                for number in range(count):
+                    lines += [
+                        f"          - name: {name} {frequency} {kind} {number}",
+                        f"            amount: {amount(low, high)}",
+                        f"            start_date: {day()}",
+                        f"            interest_rate: {generator.choice(['0.00', '0.02', '0.03'])}",
+                    ]
+        if external_rows > 0:
+            path = Path(directory) / f"external_{index}.csv"
+            write_external_csv(path, external_rows, horizon, generator)
+            lines += [
+                "    external_transactions:",
+                f"      - path: {path}",
+            ]
+        receiving = [number for number in range(transfers) if accounts > 1 and number % (accounts - 1) + 1 == index]
+        if receiving:
+            lines += ["    transfers:", "      monthly:"]
+            for number in receiving:
+                lines += [
+                    f"        - name: Transfer {number}",
+                    f"          amount: {amount(10, 200)}",
+                    f"          source: {names[0]}",
+                    f"          start_date: {day()}",
+                ]
+    if mortgages > 0:
+        lines.append('mortgages:')
+        for number in range(mortgages):
+            lines += [
+                f"  - name: House {number}",
+                f"    paid_from: {names[0]}",
+                "    loan_amount: 300000",
+                f"    remaining_balance: {generator.randrange(100000, 300000)}",
+                "    terms: 360",
+                f"    interest_rate: {generator.choice(['0.03', '0.05', '0.07'])}",
+                f"    start_date: {day()}",
+            ]
+    return '\n'.join(lines) + '\n'
+
+def write_external_csv(path: Path, rows: int, horizon: int, generator: random.Random) -> None:
+    with open(path, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['name', 'amount', 'frequency_label', 'income_or_expense', 'start_date', 'end_date'])
+        for row in range(rows):
+            date = START_DATE + datetime.timedelta(days=generator.randrange(max(horizon, 1)))
+            # Yearly transactions have to start on day 1-28
+            date = date.replace(day=min(date.day, 28)).isoformat()
+            writer.writerow([f"External {row}", f"{generator.uniform(1, 100):.2f}", 'yearly', 'expense', date, date])
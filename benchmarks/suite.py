@@ -0,0 +1,139 @@
+""" Timing of the simulation stages """
+
+import datetime
+import json
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import beautiful_date as BD
+
+from benchmarks.config import START_DATE, end_date, synthetic_config
+from financial_planner import DATE_TYPE_STR_MAP
+import financial_planner.ExternalTransactions
+from financial_planner.Output import StreamingWriter, write_amortization
+from financial_planner.cli import create_simulation
+
+RESULTS_VERSION = 1
+ENGINES = ('event', 'polling', 'vector')
+STAGES = ('create_simulation', 'run', 'output')
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(runs: list) -> dict:
+    return {'min': min(runs), 'median': statistics.median(runs), 'runs': runs}
+
+def run_benchmark(parameters: dict, repeats: int = 3, engine: str = 'event', step: str = 'day', lazy_interest: bool = False, integer_cents: bool = False) -> dict:
+    """Time create_simulation, Simulation.run and writing the results for a synthetic_config(**parameters)
+
+    Every stage is timed repeats times on a fresh simulation, the minimum is
+    the number to compare. External CSVs are cached from the second repeat on.
+    The vector engine records no transaction log, its output timing and log
+    counts are None (not applicable).
+    """
+    assert(engine in ENGINES), f"Unknown engine {engine}, allowed: {ENGINES}"
+    assert(engine != 'vector' or (step == 'day' and not lazy_interest and not integer_cents)), "The vector engine only runs daily Decimal simulations"
+    start_date = BD.BeautifulDate(START_DATE.year, START_DATE.month, START_DATE.day)
+    last_date = end_date(parameters.get('years', 10))
+    last_date = BD.BeautifulDate(last_date.year, last_date.month, last_date.day)
+    timings = {stage: [] for stage in STAGES}
+    counts = {}
+    logs = engine != 'vector'
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        yaml_text = synthetic_config(directory=directory, **parameters)
+        external = financial_planner.ExternalTransactions
+        cache_dir = external.CACHE_DIR
+        external.CACHE_DIR = directory / 'cache'
+        try:
+            for repeat in range(repeats):
+                began = time.perf_counter()
+                simulation = create_simulation(yaml_text)
+                timings['create_simulation'].append(time.perf_counter() - began)
+
+                if engine == 'vector':
+                    from financial_planner.VectorSimulation import VectorSimulation
+                    simulation = VectorSimulation(simulation.bank)
+                    began = time.perf_counter()
+                    simulation.run(start_date, last_date)
+                else:
+                    began = time.perf_counter()
+                    simulation.run(
+                        start_date, last_date,
+                        event_driven=engine == 'event',
+                        step=DATE_TYPE_STR_MAP[step],
+                        lazy_interest=lazy_interest,
+                        integer_cents=integer_cents,
+                    )
+                timings['run'].append(time.perf_counter() - began)
+
+                if logs:
+                    results_dir = directory / f"results_{repeat}"
+                    results_dir.mkdir()
+                    began = time.perf_counter()
+                    write_amortization(results_dir, simulation.bank, start_date)
+                    writer = StreamingWriter(results_dir)
+                    writer.update(simulation.bank, last_date - datetime.timedelta(days=1))
+                    writer.close(simulation.bank)
+                    timings['output'].append(time.perf_counter() - began)
+                counts = {
+                    'accounts': len(simulation.bank.accounts),
+                    'transactions': sum(len(account.transactions) for account in simulation.bank.accounts),
+                    'days': (last_date - start_date).days,
+                    'log_rows': len(simulation.bank.transaction_log) if logs else None,
+                    'state_rows': len(simulation.bank.state_log),
+                    'bankrupt_date': None if simulation.bankrupt_date is None else simulation.bankrupt_date.isoformat(),
+                }
+        finally:
+            external.CACHE_DIR = cache_dir
+    fastest_run = min(timings['run'])
+    return {
+        'version': RESULTS_VERSION,
+        'commit': git_commit(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'parameters': parameters,
+        'options': {'engine': engine, 'step': step, 'lazy_interest': lazy_interest, 'integer_cents': integer_cents, 'repeats': repeats},
+        'counts': counts,
+        'timings': {stage: summarize(runs) if runs else None for stage, runs in timings.items()},
+        'throughput': {
+            'days_per_second': counts['days'] / fastest_run if fastest_run > 0 else None,
+            'log_rows_per_second': counts['log_rows'] / fastest_run if logs and fastest_run > 0 else None,
+        },
+    }
+
+def save(results: dict, path: Path) -> None:
+    Path(path).write_text(json.dumps(results, indent=2) + '\n')
+
+def load(path: Path) -> dict:
+    results = json.loads(Path(path).read_text())
+    assert(results.get('version') == RESULTS_VERSION), f"{path} is not a version {RESULTS_VERSION} benchmark result"
+    return results
+
+def compare(old: dict, new: dict) -> str:
+    """Table of the fastest time of every stage, new / old below 1 means faster
+
+    Stages one side did not time (output of the vector engine) show n/a.
+    """
+    lines = [f"{'stage':<18}{'old (s)':>12}{'new (s)':>12}{'new / old':>12}"]
+    for stage in STAGES:
+        if old['timings'][stage] is None or new['timings'][stage] is None:
+            before, after = [f"{'n/a':>12}" if results['timings'][stage] is None else f"{results['timings'][stage]['min']:>12.4f}" for results in (old, new)]
+            lines.append(f"{stage:<18}{before}{after}{'n/a':>12}")
+            continue
+        before, after = old['timings'][stage]['min'], new['timings'][stage]['min']
+        ratio = f"{after / before:.2f}" if before > 0 else '-'
+        lines.append(f"{stage:<18}{before:>12.4f}{after:>12.4f}{ratio:>12}")
+    if old['parameters'] != new['parameters'] or old['options'] != new['options']:
+        lines.append("WARNING: the results were made with different parameters or options")
+    if 'vector' in (old['options']['engine'], new['options']['engine']) and old['options']['engine'] != new['options']['engine']:
+        lines.append("WARNING: the vector engine keeps no transaction log, only create_simulation and run compare with the other engines")
+    return '\n'.join(lines)
@@ -3,22 +3,22 @@
 from decimal import Decimal
 
 import beautiful_date as BD
-import pandas as pd
 
+from financial_planner.Calendar import Calendar, as_ordinal
 from financial_planner.common import ZERO, CENTS
-from financial_planner.InterestRate import InterestRate
+from financial_planner.InterestRate import make_rate
 from financial_planner.DateUnit import DateUnit
 from financial_planner.Transaction import TransactionLog
-from financial_planner.yaml_support import parse_transaction_dict, tranlate_transaction
+from financial_planner.yaml_support import parse_transaction_dict
 
 class Account:
     negative_balance_allowed = False
 
-    def __init__(self, name: str = None, interest_rate = 0.0, balance = ZERO, transactions: list = None, allow_auto_withdrawl: bool = True) -> None:
+    def __init__(self, name: str = None, interest_rate = 0.0, balance = ZERO, transactions: list = None, allow_auto_withdrawl: bool = True, withdrawal_priority: int = 0, minimum_balance = ZERO) -> None:
         assert(name is not None), "All accounts must have a name!"
         self.name = name
         self.balance = Decimal(balance).quantize(CENTS)
-        self.default_interest_rate = InterestRate(Decimal(interest_rate))
+        self.default_interest_rate = make_rate(interest_rate)
         if transactions is None:
             self.transactions = []
         else:
@@ -26,15 +26,70 @@ class Account:
         if type(allow_auto_withdrawl) == bool:
             self.allow_auto_withdrawl = allow_auto_withdrawl
         else:
-            self.allow_auto_withdrawl = allow_auto_withdrawl.lower == "true"
+            self.allow_auto_withdrawl = allow_auto_withdrawl.lower() == "true"
+        # Low balance transfers draw from the lowest priority first, never below minimum_balance
+        self.withdrawal_priority = int(withdrawal_priority)
+        self.minimum_balance = Decimal(minimum_balance).quantize(CENTS)
+        # First day whose interest has not been applied yet, only used by lazy interest
+        self.interest_date = None
 
-    def calculate_interest(self, time_units: DateUnit) -> Decimal:
-        return (self.balance * self.default_interest_rate.get_rate(time_units))\
-                .quantize(CENTS)
+    def calculate_interest(self, time_units: DateUnit, balance: Decimal = None, date: BD.BeautifulDate = None) -> Decimal:
+        """One time_units of interest on balance, date picks the rate of a RateSchedule (required then)"""
+        if balance is None:
+            balance = self.balance
+        return self.default_interest_rate.at(date).interest(balance, time_units)
 
-    def process_transactions(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> list:
+    def accrue_interest(self, days: int, date: BD.BeautifulDate = None) -> Decimal:
+        """Apply days of daily interest at once, returns the total interest
+
+        Gives exactly the balance that calling calculate_interest(DAYS) and
+        adding it every day would. While the rounded daily interest stays the
+        same the balance grows arithmetically, and the rounded interest of
+        balance + j * daily only changes monotonically with j, so each run of
+        equal daily interest is found with a galloping search instead of
+        being stepped through.
+
+        date is the first of the days, required with a RateSchedule, whose
+        days are split wherever the rate changes.
+        """
+        opening_balance = self.balance
+        ordinal = None if date is None else as_ordinal(date)
+        while days > 0:
+            run = self.default_interest_rate.constant_days(ordinal, days)
+            self.accrue_constant_interest(run, ordinal)
+            days -= run
+            if ordinal is not None:
+                ordinal += run
+        return self.balance - opening_balance
+
+    def accrue_constant_interest(self, days: int, date) -> None:
+        while days > 0:
+            daily = self.calculate_interest(DateUnit.DAYS, date=date)
+            if daily == ZERO:
+                break
+            def same_interest(day: int) -> bool:
+                return self.calculate_interest(DateUnit.DAYS, self.balance + daily * day, date) == daily
+            # Largest day index in [0, days) still earning daily
+            last, step = 0, 1
+            while last + step < days and same_interest(last + step):
+                last += step
+                step *= 2
+            high = min(last + step, days) - 1
+            while last < high:
+                middle = (last + high + 1) // 2
+                if same_interest(middle):
+                    last = middle
+                else:
+                    high = middle - 1
+            run = last + 1
+            self.balance += daily * run
+            days -= run
+
+    def process_transactions(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate, transactions: list = None) -> list:
+        if transactions is None:
+            transactions = self.transactions
         transaction_list = []
-        for transaction in self.transactions:
+        for transaction in transactions:
             cost = transaction.get_cost(date, relative_date)
             if cost == ZERO:
                 continue
@@ -47,6 +102,17 @@ class Account:
             
         return transaction_list
 
+    def process_day(self, ordinal: int, relative_ordinal: int, calendar: Calendar, transaction_log, transactions: list = None) -> None:
+        """process_transactions for day ordinals, recording straight into transaction_log"""
+        if transactions is None:
+            transactions = self.transactions
+        for transaction in transactions:
+            cost = transaction.cost_on(ordinal, relative_ordinal, calendar)
+            if cost == ZERO:
+                continue
+            self.balance += cost
+            transaction_log.record(None, self.name, transaction.name, cost, ordinal)
+
     def execute_transaction(self, amount: Decimal, description: str, destination: str, date: BD.BeautifulDate, source: str = None) -> TransactionLog:
         self.balance += amount
         return TransactionLog(
@@ -62,23 +128,15 @@ class Debt(Account):
 
 class AccountYaml(Account):
 
-    def __init__(self, parsed_yaml_data: dict) -> None:        
-        
+    def __init__(self, parsed_yaml_data: dict) -> None:
+        parsed_yaml_data = dict(parsed_yaml_data)
         transaction_data = parsed_yaml_data.get('transactions', {})
         parsed_yaml_data['transactions'] = [transaction for transaction, _ in parse_transaction_dict(transaction_data, income_vs_expense_processing=True)]
 
-        transaction_list = []
-        for external_source_info in parsed_yaml_data.get('external_transactions', []):
-            external_data = pd.read_csv(external_source_info['path'], dtype=str)
-            del(external_source_info['path'])
-            for entry in external_data.to_dict(orient='records'):
-                entry.update(external_source_info)
-                transaction_list.append(tranlate_transaction(
-                    entry,
-                )[0])
-        if len(transaction_list) > 0:
-            del(parsed_yaml_data['external_transactions'])
-        parsed_yaml_data['transactions'].extend(transaction_list)
-        
+        for external_source_info in parsed_yaml_data.pop('external_transactions', []):
+            from financial_planner.ExternalTransactions import ExternalTransactions
+            overrides = {key: value for key, value in external_source_info.items() if key != 'path'}
+            external = ExternalTransactions.load(external_source_info['path'])
+            parsed_yaml_data['transactions'].extend(external.transactions(overrides))
 
         super().__init__(**parsed_yaml_data)
\ No newline at end of file
@@ -1,19 +1,26 @@
 """ Bank Class"""
 
 from copy import deepcopy
+import datetime
 from decimal import Decimal
 
 import beautiful_date as BD
 
+from financial_planner.Calendar import Calendar, as_ordinal
 from financial_planner.DateUnit import DateUnit, get_date_increment
 from financial_planner.Transaction import TransactionLog
 from financial_planner.yaml_support import parse_transaction_dict
 from financial_planner.Account import Account
 from financial_planner.InterestRate import InterestRate
+from financial_planner.Ledger import StateLedger, TransactionLedger
 from financial_planner.Mortgage import MortgagePrincipal, MortgagePaymentTransaction, Mortgage
-from financial_planner.common import ZERO, NEGATIVE_ONE
+from financial_planner.Waterfall import FundingWaterfall
+from financial_planner.Money import from_cents
+from financial_planner.common import ZERO
 
 
+ONE_DAY = datetime.timedelta(days=1)
+
 class Bankrupt(Exception):
     pass
 
@@ -21,27 +28,100 @@ class Bank:
 
     def __init__(self, accounts: list) -> None:
         self.accounts = accounts
-        self.state_log = []
-        self.transaction_log = []
+        self.state_log = StateLedger()
+        self.transaction_log = TransactionLedger()
+        self.lazy_interest = False
+        self.mortgages = {}
+        self.waterfall = FundingWaterfall(self.accounts)
+        self.accounts_by_name = {}
+        for account in self.accounts:
+            self.index_account(account)
+
+    def start_lazy_interest(self, date: BD.BeautifulDate) -> None:
+        """Accrue daily interest only when a balance changes or is read, starting at date"""
+        self.lazy_interest = True
+        for account in self.accounts:
+            account.interest_date = as_ordinal(date)
+
+    def accrue_interest(self, account: Account, date) -> None:
+        """Apply the interest account is owed for every day before date (a date or a day ordinal)"""
+        ordinal = as_ordinal(date)
+        days = ordinal - account.interest_date
+        if days <= 0:
+            return
+        change_in_value = account.accrue_interest(days, account.interest_date)
+        account.interest_date = ordinal
+        if change_in_value != ZERO:
+            self.transaction_log.record(None, account.name, 'interest', change_in_value, ordinal - 1)
+            self.waterfall.touch(account)
+
+    def export_state(self) -> dict:
+        """Everything besides the config and logs needed to carry on from the current date"""
+        return {
+            'balances': [from_cents(account.balance) for account in self.accounts],
+            'interest_dates': [account.interest_date for account in self.accounts],
+            'lazy_interest': self.lazy_interest,
+            'payment_indexes': {
+                (account.name, transaction.name): transaction.payment_index
+                for account in self.accounts
+                for transaction in account.transactions
+                if hasattr(transaction, 'payment_index')
+            },
+        }
+
+    def import_state(self, state: dict) -> None:
+        """Load export_state() of a bank built from a config with the same accounts"""
+        for account, balance, interest_date in zip(self.accounts, state['balances'], state['interest_dates']):
+            account.balance = balance
+            account.interest_date = interest_date
+        self.lazy_interest = state['lazy_interest']
+        for account in self.accounts:
+            for transaction in account.transactions:
+                if (account.name, transaction.name) in state['payment_indexes']:
+                    transaction.payment_index = state['payment_indexes'][(account.name, transaction.name)]
+        self.waterfall.rebuild()
 
     @property
     def account_map(self) -> dict:
-        return {account.name: account for account in self.accounts}
-
-    def mature(self, date: BD.BeautifulDate):
-        if len(self.state_log) == 0:
-            self.capture_state(date)
+        """Accounts by name, accounts must be added with add_account to be found"""
+        return self.accounts_by_name
+
+    def index_account(self, account: Account) -> None:
+        assert(account.name not in self.accounts_by_name), f"Two accounts are named {account.name}"
+        self.accounts_by_name[account.name] = account
+
+    def add_account(self, account: Account) -> None:
+        self.index_account(account)
+        self.accounts.append(account)
+
+    def mature(self, date, time_units: DateUnit = DateUnit.DAYS, days: int = None):
+        """Apply interest up to and including date (a date or a day ordinal) then capture state
+
+        With lazy interest the interest is compounded daily whatever
+        time_units is, matching a day by day run. days marks a step cut
+        short to that many days (ending on date), it earns daily interest
+        for those days instead of a whole time_units.
+        """
+        ordinal = as_ordinal(date)
+        if self.state_log.total == 0:
+            self.capture_state(ordinal)
+        if self.lazy_interest:
+            for account in self.accounts:
+                self.accrue_interest(account, ordinal + 1)
+            self.capture_state(ordinal)
+            return
         for account in self.accounts:
-            change_in_value = account.calculate_interest(DateUnit.DAYS)
-            account.balance += change_in_value
-            self.transaction_log.append(TransactionLog(
-                None,
-                account.name,
-                'interest',
-                change_in_value,
-                date,
-            ))
-        self.capture_state(date)
+            if days is not None:
+                change_in_value = account.accrue_interest(days, ordinal - days + 1)
+            else:
+                change_in_value = account.calculate_interest(time_units, date=ordinal)
+                if change_in_value != ZERO:
+                    account.balance += change_in_value
+            if change_in_value == ZERO:
+                continue
+            self.transaction_log.record(None, account.name, 'interest', change_in_value, ordinal)
+            self.waterfall.touch(account)
+        self.capture_state(ordinal)
 
     # def mature(self, periods: int, period_unit: DateUnit):
     #     date_increment = get_date_increment(period_unit)
@@ -60,64 +140,73 @@ class Bank:
     #         self.state_log.extend(self.capture_state())
 
     def find_next_account(self, exclude: Account = None) -> Account:
-        for account in self.accounts:
-            if exclude is not None:
-                if exclude == account:
-                    continue
-            if not account.allow_auto_withdrawl:
-                continue
-            if account.balance > ZERO:
-                return account
-        raise Bankrupt("No more accounts with > $0 balance.")
+        """Next account in the funding waterfall with money above its minimum balance"""
+        account = self.waterfall.find(exclude)
+        if account is None:
+            raise Bankrupt("No more accounts with money above their minimum balance.")
+        return account
     
-    def process_date(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate):
-        for account in self.accounts:
-            self.transaction_log.extend(account.process_transactions(date, relative_date))
+    def process_date(self, date, relative_date, due: dict = None, calendar: Calendar = None):
+        """Apply transactions for date
+
+        Dates may be given as day ordinals, calendar (which must cover date)
+        saves working out the day of month and month of date again.
+        due optionally maps account index to the only transactions that fire
+        on date (see TransactionScheduler), otherwise every transaction is polled.
+        """
+        ordinal = as_ordinal(date)
+        relative_ordinal = as_ordinal(relative_date)
+        if calendar is None:
+            calendar = Calendar.for_day(ordinal)
+        for account_index, account in enumerate(self.accounts):
+            if due is None or account_index in due:
+                if self.lazy_interest:
+                    self.accrue_interest(account, ordinal)
+                transactions = None if due is None else due[account_index]
+                account.process_day(ordinal, relative_ordinal, calendar, self.transaction_log, transactions)
+                self.waterfall.touch(account)
+            if self.lazy_interest and account.balance < ZERO and not account.negative_balance_allowed:
+                for other_account in self.accounts:
+                    self.accrue_interest(other_account, ordinal)
             while account.balance < ZERO and not account.negative_balance_allowed:
                 withdraw_account = self.find_next_account(exclude=account)
                 description = f"{account.name} Low Balance Transfer"
-                if withdraw_account.balance > abs(account.balance):
+                available = self.waterfall.available(withdraw_account)
+                if available > abs(account.balance):
                     amount = account.balance
                 else:
-                    amount = withdraw_account.balance * NEGATIVE_ONE
-                self.transaction_log.extend([
-                    withdraw_account.execute_transaction(
-                        amount,
-                        description,
-                        withdraw_account.name,
-                        date,
-                    ),
-                    account.execute_transaction(
-                        amount * NEGATIVE_ONE,
-                        description,
-                        account.name,
-                        date,
-                    )])
-
-    def capture_state(self, date:BD.BeautifulDate):
-        self.state_log.extend([{
-            'account': account.name,
-            'date': date,
-            'balance': account.balance,
-        } for account in self.accounts])
+                    amount = -available
+                withdraw_account.balance += amount
+                account.balance -= amount
+                self.transaction_log.record(None, withdraw_account.name, description, amount, ordinal)
+                self.transaction_log.record(None, account.name, description, -amount, ordinal)
+                self.waterfall.touch(account)
+
+    def capture_state(self, date):
+        self.state_log.capture(date, self.accounts)
 
     def create_mortgage(self, name: str = None, paid_from: Account = None, loan_amount: Decimal = None, remaining_balance: Decimal = None, terms: int = None, **kwargs) -> None:
         loan = Mortgage(name=name, balance=(Decimal("-1") * Decimal(remaining_balance)))
-        self.accounts.append(loan)
-        loan.transactions.append(MortgagePrincipal(
+        self.add_account(loan)
+        payment = MortgagePaymentTransaction(
             loan_amount, 
             remaining_balance, 
             terms, 
-            name=f"{name} Principal Reduction",
+            name=f"{name} Mortgage Payment", 
             **kwargs
-        ))
-        paid_from.transactions.append(MortgagePaymentTransaction(
+        )
+        # Both sides read the one schedule so they can never drift apart
+        kwargs.pop('extra_principal', None)
+        loan.transactions.append(MortgagePrincipal(
             loan_amount, 
             remaining_balance, 
             terms, 
-            name=f"{name} Mortgage Payment", 
+            name=f"{name} Principal Reduction",
+            schedule=payment.schedule,
             **kwargs
         ))
+        paid_from.transactions.append(payment)
+        self.mortgages[name] = payment
 
 
 class BankYaml(Bank):
@@ -132,6 +221,5 @@ class BankYaml(Bank):
 
     def allocate_mortgages(self, mortgage_list: list):
         for mortgage_data in mortgage_list:
-            mortgage_data['paid_from'] = self.account_map[mortgage_data['paid_from']]
-            self.create_mortgage(**mortgage_data)
+            self.create_mortgage(**{**mortgage_data, 'paid_from': self.account_map[mortgage_data['paid_from']]})
 
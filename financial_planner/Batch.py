@@ -0,0 +1,154 @@
+""" Run many configs in one pool of warm worker processes """
+
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import csv
+import io
+import math
+import os
+from pathlib import Path
+import shutil
+import time
+
+import beautiful_date as BD
+import yaml
+
+from financial_planner.cli import YAML_LOADER
+from financial_planner.common import parse_date
+
+CONFIG_SUFFIXES = ('.yml', '.yaml')
+SUMMARY_NAME = 'batch_summary.csv'
+# Files run_entry may write, cleared from results_dirs the batch does not own
+OUTPUT_NAMES = ('transactions.csv', 'monthly_transactions.csv', 'yearly_transactions.csv', 'monthly_account_state.csv', 'amortization.csv', 'profile.json')
+
+def find_configs(directory: Path, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, results_root: Path) -> list:
+    """A batch entry for every YAML config in directory, all over the same dates
+
+    Entries own their default <config>_results directory, run_entry deletes
+    it before writing.
+    """
+    return [
+        {
+            'config': path,
+            'start_date': start_date,
+            'end_date': end_date,
+            'results_dir': Path(results_root) / f"{path.stem}_results",
+            'owns_results_dir': True,
+        }
+        for path in sorted(Path(directory).iterdir())
+        if path.suffix in CONFIG_SUFFIXES
+    ]
+
+def load_manifest(path: Path, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, results_root: Path) -> list:
+    """Batch entries of a manifest, a YAML list of runs under 'runs'
+
+    Every run needs a config and may set its own start_date, end_date and
+    results_dir. Relative paths are relative to the manifest. A results_dir
+    given by the manifest is not owned by the batch, only the files a run
+    writes are replaced in it, and it may not contain the manifest.
+    """
+    path = Path(path)
+    manifest = yaml.load(path.read_text(), Loader=YAML_LOADER) or {}
+    runs = manifest.get('runs') if isinstance(manifest, dict) else None
+    assert(runs), f"{path} has no runs, expected a list of runs with a config each"
+    entries = []
+    for run in runs:
+        assert('config' in run), f"Every run in {path} needs a config"
+        config = path.parent / run['config']
+        if 'results_dir' in run:
+            results_dir = path.parent / run['results_dir']
+            assert(not path.resolve().is_relative_to(results_dir.resolve())), f"results_dir {run['results_dir']} of {path} contains the manifest"
+        entries.append({
+            'config': config,
+            'start_date': parse_date(run['start_date']) if 'start_date' in run else start_date,
+            'end_date': parse_date(run['end_date']) if 'end_date' in run else end_date,
+            'results_dir': results_dir if 'results_dir' in run else Path(results_root) / f"{config.stem}_results",
+            'owns_results_dir': 'results_dir' not in run,
+        })
+    return entries
+
+def warm_up() -> None:
+    """Worker initializer, pays for the heavy imports once per process instead of once per config"""
+    import jinja2
+    import numpy
+    import pandas
+    import financial_planner.cli
+    import financial_planner.Output
+
+def run_entry(entry: dict, step: str = 'day', lazy_interest: bool = False, integer_cents: bool = False, rollups_only: bool = False, profile: bool = False, compiled: bool = False) -> dict:
+    """Simulate one batch entry into its results_dir, errors are reported rather than raised
+
+    A results_dir the entry owns is emptied first, like a single run's, other
+    results_dirs only lose the OUTPUT_NAMES of an earlier run.
+    """
+    from financial_planner import DATE_TYPE_STR_MAP
+    from financial_planner.Output import StreamingWriter, write_amortization
+    from financial_planner.cli import create_simulation, fill_placeholders
+
+    began = time.perf_counter()
+    summary = {
+        'config': str(entry['config']),
+        'results_dir': str(entry['results_dir']),
+        'start_date': entry['start_date'].isoformat(),
+        'end_date': entry['end_date'].isoformat(),
+        'bankrupt_date': '',
+        'seconds': '',
+        'error': '',
+    }
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results_dir = Path(entry['results_dir'])
+            if entry.get('owns_results_dir') and results_dir.exists():
+                shutil.rmtree(results_dir)
+            results_dir.mkdir(parents=True, exist_ok=True)
+            for name in OUTPUT_NAMES:
+                (results_dir / name).unlink(missing_ok=True)
+            simulation = create_simulation(fill_placeholders(Path(entry['config']).read_text()), compiled=compiled)
+            write_amortization(results_dir, simulation.bank, entry['start_date'])
+            observers = [StreamingWriter(results_dir, transactions=not rollups_only)]
+            if profile:
+                from financial_planner.Profiler import SimulationProfiler
+                observers.append(SimulationProfiler(simulation.bank, results_dir))
+            simulation.run(
+                entry['start_date'],
+                entry['end_date'],
+                observers=observers,
+                keep_logs=False,
+                step=DATE_TYPE_STR_MAP[step],
+                lazy_interest=lazy_interest,
+                integer_cents=integer_cents,
+            )
+        if simulation.bankrupt_date is not None:
+            summary['bankrupt_date'] = simulation.bankrupt_date.isoformat()
+    except Exception as error:
+        summary['error'] = f"{type(error).__name__}: {error}"
+    summary['seconds'] = f"{time.perf_counter() - began:.3f}"
+    return summary
+
+def run_entries(entries: list, options: dict) -> list:
+    return [run_entry(entry, **options) for entry in entries]
+
+def run_batch(entries: list, workers: int = None, summary_path: Path = None, **options) -> list:
+    """Simulate every entry on a pool of workers, options are passed to run_entry
+
+    Entries are handed out in chunks so thousands of small configs do not
+    pay one round trip each. Returns a summary row per entry, in order, and
+    writes them to summary_path as CSV when given.
+    """
+    results_dirs = [Path(entry['results_dir']).resolve() for entry in entries]
+    assert(len(set(results_dirs)) == len(results_dirs)), "Two runs of the batch write to the same results_dir"
+    for entry in entries:
+        inside = set(Path(entry['config']).resolve().parents).intersection(results_dirs)
+        assert(not inside), f"results_dir {inside.pop()} contains the config {entry['config']}"
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, math.ceil(len(entries) / (workers * 4)))
+    chunks = [entries[index:index + chunk_size] for index in range(0, len(entries), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as executor:
+        futures = [executor.submit(run_entries, chunk, options) for chunk in chunks]
+        summaries = [summary for future in futures for summary in future.result()]
+    if summary_path is not None:
+        with open(summary_path, 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(summaries[0]) if summaries else ['config'])
+            writer.writeheader()
+            writer.writerows(summaries)
+    return summaries
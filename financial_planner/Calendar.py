@@ -0,0 +1,58 @@
+""" Integer day calendar for the simulation loop """
+
+from array import array
+import datetime
+
+import beautiful_date as BD
+
+class Calendar:
+    """Day of month, month index and year of every day of a run, by ordinal
+
+    Built once per run so the engine can pass plain int ordinals
+    (date.toordinal()) around and only turn them back into dates for
+    reporting. Month indexes match common.month_int.
+    """
+
+    def __init__(self, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate) -> None:
+        self.first = start_date.toordinal()
+        self.last = end_date.toordinal()
+        self.days_of_month = array('b')
+        self.months = array('l')
+        self.years = array('h')
+        date = datetime.date(start_date.year, start_date.month, start_date.day)
+        one_day = datetime.timedelta(days=1)
+        for _ in range(self.last - self.first):
+            self.days_of_month.append(date.day)
+            self.months.append(date.year * 12 + date.month)
+            self.years.append(date.year)
+            date += one_day
+
+    @classmethod
+    def for_day(cls, ordinal: int) -> "Calendar":
+        date = datetime.date.fromordinal(ordinal)
+        return cls(date, date + datetime.timedelta(days=1))
+
+    def __len__(self) -> int:
+        return self.last - self.first
+
+    def __contains__(self, ordinal: int) -> bool:
+        return self.first <= ordinal < self.last
+
+    def day_of_month(self, ordinal: int) -> int:
+        return self.days_of_month[ordinal - self.first]
+
+    def month(self, ordinal: int) -> int:
+        return self.months[ordinal - self.first]
+
+    def year(self, ordinal: int) -> int:
+        return self.years[ordinal - self.first]
+
+    @staticmethod
+    def date(ordinal: int) -> BD.BeautifulDate:
+        return BD.BeautifulDate.fromordinal(ordinal)
+
+def as_ordinal(date) -> int:
+    """Day ordinal of a date, ints are already ordinals"""
+    if type(date) is int:
+        return date
+    return date.toordinal()
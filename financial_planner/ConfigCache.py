@@ -0,0 +1,124 @@
+""" Compiled configs, the validated bank a config builds kept on disk by content hash """
+
+import datetime
+import hashlib
+import os
+from pathlib import Path
+import pickle
+
+from financial_planner.Bank import Bank
+from financial_planner.ExternalTransactions import CACHE_DIR as DATA_CACHE_DIR, file_hash
+
+CACHE_VERSION = 1
+# Compiled configs are cached here, None turns the cache off
+CACHE_DIR = None if DATA_CACHE_DIR is None else DATA_CACHE_DIR / 'compiled'
+# Compiled configs not used for this long are deleted, keys change every day so old ones are never read again
+MAX_AGE = datetime.timedelta(days=7)
+PACKAGE_DIR = Path(__file__).parent
+
+class CompiledConfig:
+    """A config parsed, validated and built into a bank, every transaction resolved
+
+    The bank is kept pickled, bank() hands out a fresh copy each call so one
+    compiled config can seed any number of simulations. cached() stores
+    compiled configs in a directory keyed by the hash of the config text,
+    today's date (missing start dates default to it), the package's code and,
+    when external CSVs are read, the working directory. The CSVs themselves
+    are checked by modification time, then hash, on every load. Loading a
+    compiled config touches it, compiling a new one prunes those unused for
+    MAX_AGE.
+    """
+
+    def __init__(self, config: dict, bank_data: bytes, dependencies: list) -> None:
+        self.config = config
+        self.bank_data = bank_data
+        # (resolved path, modification time, sha256) of every external CSV
+        self.dependencies = dependencies
+        self.built = None
+
+    @classmethod
+    def compile(cls, yaml_text: str) -> "CompiledConfig":
+        import yaml
+        from financial_planner.cli import YAML_LOADER, build_bank
+
+        config = yaml.load(yaml_text, Loader=YAML_LOADER)
+        bank = build_bank(config)
+        dependencies = []
+        for entry in config['accounts']:
+            for external_source_info in entry.get('external_transactions', []):
+                path = Path(external_source_info['path']).resolve()
+                dependencies.append((str(path), path.stat().st_mtime_ns, file_hash(path)))
+        compiled = cls(config, pickle.dumps(bank, protocol=pickle.HIGHEST_PROTOCOL), dependencies)
+        compiled.built = bank
+        return compiled
+
+    @classmethod
+    def cached(cls, yaml_text: str, cache_dir: Path = None) -> "CompiledConfig":
+        """compile(yaml_text), reusing the copy cached in cache_dir (default CACHE_DIR) while still valid"""
+        cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+        if cache_dir is None:
+            return cls.compile(yaml_text)
+        cache_path = Path(cache_dir) / (cache_key(yaml_text) + '.pkl')
+        if cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as handle:
+                    compiled = pickle.load(handle)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                compiled = None
+            if compiled is not None and compiled.fresh():
+                try:
+                    cache_path.touch()
+                except OSError:
+                    pass
+                return compiled
+        compiled = cls.compile(yaml_text)
+        try:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            prune(Path(cache_dir))
+            with open(cache_path, 'wb') as handle:
+                pickle.dump(compiled, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as error:
+            print(f"ERROR: Could not cache the compiled config in {cache_dir}: {error}")
+        return compiled
+
+    def fresh(self) -> bool:
+        """Whether every external CSV is unchanged since compiling"""
+        for path, modified, digest in self.dependencies:
+            try:
+                if os.stat(path).st_mtime_ns != modified and file_hash(path) != digest:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def bank(self) -> Bank:
+        if self.built is not None:
+            bank, self.built = self.built, None
+            return bank
+        return pickle.loads(self.bank_data)
+
+    def __getstate__(self) -> dict:
+        return {**vars(self), 'built': None}
+
+def cache_key(yaml_text: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_VERSION}\n{datetime.date.today().isoformat()}\n{code_stamp()}\n".encode())
+    if 'external_transactions' in yaml_text:
+        # Relative CSV paths resolve against the working directory
+        digest.update(f"{Path.cwd()}\n".encode())
+    digest.update(yaml_text.encode())
+    return digest.hexdigest()[:32]
+
+def prune(cache_dir: Path, max_age: datetime.timedelta = MAX_AGE) -> None:
+    """Delete the compiled configs in cache_dir not used for max_age"""
+    oldest = datetime.datetime.now().timestamp() - max_age.total_seconds()
+    for path in cache_dir.glob('*.pkl'):
+        try:
+            if path.stat().st_mtime < oldest:
+                path.unlink()
+        except OSError:
+            pass
+
+def code_stamp() -> int:
+    """Latest modification of the package's modules, editing the code invalidates compiled banks"""
+    return max(path.stat().st_mtime_ns for path in PACKAGE_DIR.glob('*.py'))
@@ -0,0 +1,235 @@
+""" Bulk import of external transaction CSVs """
+
+from array import array
+import datetime
+from decimal import Decimal
+import hashlib
+import os
+from pathlib import Path
+import pickle
+
+import beautiful_date as BD
+
+from financial_planner.InterestRate import make_rate
+from financial_planner.Money import from_cents
+from financial_planner.common import CENTS, parse_date
+from financial_planner.yaml_support import TRANSACTION_MAP
+
+CACHE_VERSION = 1
+
+def default_cache_dir() -> Path:
+    """financial_planner under XDG_CACHE_HOME, or ~/.cache when that is unset, empty or relative"""
+    cache_home = os.environ.get('XDG_CACHE_HOME', '')
+    if not cache_home or not Path(cache_home).is_absolute():
+        cache_home = Path.home() / '.cache'
+    return Path(cache_home) / 'financial_planner'
+
+# Parsed CSVs are cached here, None turns the cache off
+CACHE_DIR = default_cache_dir()
+COLUMNS = ('name', 'amount', 'frequency_label', 'income_or_expense', 'start_date', 'end_date', 'every_x_periods', 'interest_rate', 'source')
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+# Ordinal stored for a missing start_date (today) or end_date (no end)
+NO_DATE = 0
+
+class ExternalSchedule:
+    """Every row of one frequency as columns, compact to cache and quick to turn into transactions"""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.rows = array('q')
+        self.names = []
+        # Cents as written, signs says whether it is income (1) or an expense (-1)
+        self.amounts = array('q')
+        self.signs = array('b')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.every = array('q')
+        self.interest_rates = []
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+class ExternalTransactions:
+    """Transactions of an external CSV, one ExternalSchedule per frequency_label
+
+    The CSV has a row per transaction and a column per transaction field
+    (see COLUMNS), empty cells are left unset. Dates and amounts are parsed
+    for the whole file at once and load() caches the result on disk, keyed
+    by the file's path, modification time and hash.
+    """
+
+    def __init__(self, schedules: dict) -> None:
+        self.schedules = schedules
+
+    def __len__(self) -> int:
+        return sum(len(schedule) for schedule in self.schedules.values())
+
+    @classmethod
+    def parse(cls, path: Path) -> "ExternalTransactions":
+        import numpy as np
+        import pandas as pd
+
+        data = pd.read_csv(path, dtype=str, keep_default_na=False)
+        unknown = set(data.columns) - set(COLUMNS)
+        assert(len(unknown) == 0), f"{path} has unknown columns {sorted(unknown)}, allowed: {COLUMNS}"
+        assert('frequency_label' in data), f"{path} needs a frequency_label column"
+
+        def column(name: str):
+            if name not in data:
+                return pd.Series('', index=data.index)
+            return data[name].str.strip()
+
+        labels = column('frequency_label').str.lower()
+        kinds = column('income_or_expense').str.lower().replace('', 'income')
+        for kind in set(kinds) - {'income', 'expense'}:
+            print(f"ERROR: Unknown type {kind}, only income or expense allowed")
+        signs = np.where(kinds == 'expense', -1, 1)
+        every = column('every_x_periods').replace('', '1').astype(np.int64).to_numpy()
+        amounts = parse_cents(column('amount'))
+        starts = parse_ordinals(column('start_date'))
+        ends = parse_ordinals(column('end_date'))
+        names = column('name')
+        assert(not (names == '').any()), "All transactions must have a name"
+        names = names.tolist()
+        interest_rates = [rate or None for rate in column('interest_rate').tolist()]
+
+        schedules = {}
+        for label in labels.unique():
+            assert(label in TRANSACTION_MAP), f"Unknown frequency_label {label} in {path}, allowed: {list(TRANSACTION_MAP)}"
+            rows = np.flatnonzero((labels == label).to_numpy())
+            schedule = schedules[label] = ExternalSchedule(label)
+            schedule.rows.frombytes(rows.astype(np.int64).tobytes())
+            schedule.amounts.frombytes(amounts[rows].tobytes())
+            schedule.signs.frombytes(signs[rows].astype(np.int8).tobytes())
+            schedule.starts.frombytes(starts[rows].tobytes())
+            schedule.ends.frombytes(ends[rows].tobytes())
+            schedule.every.frombytes(every[rows].tobytes())
+            schedule.names = [names[row] for row in rows]
+            schedule.interest_rates = [interest_rates[row] for row in rows]
+        return cls(schedules)
+
+    @classmethod
+    def load(cls, path: Path, cache_dir: Path = None) -> "ExternalTransactions":
+        """parse(path), reusing the copy cached in cache_dir (default CACHE_DIR) while the file is unchanged"""
+        cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+        if cache_dir is None:
+            return cls.parse(path)
+        path = Path(path).resolve()
+        modified = path.stat().st_mtime_ns
+        cache_path = Path(cache_dir) / (hashlib.sha256(str(path).encode()).hexdigest()[:32] + '.pkl')
+        cached = None
+        if cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as handle:
+                    cached = pickle.load(handle)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                cached = None
+            if cached is not None and (cached.get('version') != CACHE_VERSION or cached['path'] != str(path)):
+                cached = None
+        if cached is not None and cached['modified'] == modified:
+            return cls(cached['schedules'])
+        digest = file_hash(path)
+        if cached is not None and cached['hash'] == digest:
+            external = cls(cached['schedules'])
+        else:
+            external = cls.parse(path)
+        try:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'wb') as handle:
+                pickle.dump({
+                    'version': CACHE_VERSION,
+                    'path': str(path),
+                    'modified': modified,
+                    'hash': digest,
+                    'schedules': external.schedules,
+                }, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as error:
+            print(f"ERROR: Could not cache {path} in {cache_dir}: {error}")
+        return external
+
+    def transactions(self, overrides: dict = None) -> list:
+        """One transaction per row in file order, overrides (the YAML entry besides path) apply to every row"""
+        overrides = dict(overrides or {})
+        overrides.pop('source', None)
+        label_override = overrides.pop('frequency_label', None)
+        sign_override = None
+        if 'income_or_expense' in overrides:
+            kind = overrides.pop('income_or_expense').lower()
+            if kind not in ('income', 'expense'):
+                print(f"ERROR: Unknown type {kind}, only income or expense allowed")
+            sign_override = -1 if kind == 'expense' else 1
+        if 'amount' in overrides:
+            overrides['amount'] = Decimal(overrides['amount']).quantize(CENTS)
+        today = BD.D.today()
+        dates = {}
+        def date(ordinal: int) -> BD.BeautifulDate:
+            if ordinal not in dates:
+                dates[ordinal] = BD.BeautifulDate.fromordinal(ordinal)
+            return dates[ordinal]
+        # Rows sharing a rate share the (immutable) rate object
+        rates = {None: make_rate(Decimal("0.00"))}
+        numbered = []
+        for label, schedule in self.schedules.items():
+            transaction_type = TRANSACTION_MAP[(label_override or label).lower()]
+            for index, row in enumerate(schedule.rows):
+                rate = schedule.interest_rates[index]
+                if rate not in rates:
+                    rates[rate] = make_rate(rate)
+                kwargs = {
+                    'name': schedule.names[index],
+                    'amount': from_cents(schedule.amounts[index]),
+                    'interest_rate': rates[rate],
+                    'start_date': today if schedule.starts[index] == NO_DATE else date(schedule.starts[index]),
+                    'end_date': None if schedule.ends[index] == NO_DATE else date(schedule.ends[index]),
+                    'every_x_periods': schedule.every[index],
+                }
+                kwargs.update(overrides)
+                transaction = transaction_type(**kwargs)
+                sign = schedule.signs[index] if sign_override is None else sign_override
+                if sign < 0:
+                    transaction.amount *= Decimal("-1")
+                numbered.append((row, transaction))
+        numbered.sort(key=lambda item: item[0])
+        return [transaction for _, transaction in numbered]
+
+def parse_cents(text):
+    """int64 cents of a Series of decimal strings, rounded half to even like Decimal.quantize(CENTS)"""
+    import numpy as np
+
+    parts = text.str.extract(r'^([+-]?)(\d*)(?:\.(\d{0,2}))?$')
+    simple = (parts[1].notna() & ((parts[1] != '') | (parts[2].fillna('') != ''))).to_numpy()
+    cents = np.zeros(len(text), dtype=np.int64)
+    if simple.any():
+        whole = parts[1][simple].replace('', '0').astype(np.int64).to_numpy()
+        fraction = parts[2][simple].fillna('').str.ljust(2, '0').astype(np.int64).to_numpy()
+        negative = (parts[0][simple] == '-').to_numpy()
+        cents[simple] = np.where(negative, -1, 1) * (whole * 100 + fraction)
+    # More than two decimals, exponents and the like go through Decimal
+    values = text.to_numpy()
+    for row in np.flatnonzero(~simple):
+        cents[row] = int(Decimal(values[row]).quantize(CENTS).scaleb(2))
+    return cents
+
+def parse_ordinals(text):
+    """int64 day ordinals of a Series of YYYY-MM-DD strings, NO_DATE where empty"""
+    import numpy as np
+    import pandas as pd
+
+    parts = text.str.extract(r'^(\d+)-(\d+)-(\d+)$')
+    matched = parts[0].notna().to_numpy()
+    empty = (text == '').to_numpy()
+    for row in np.flatnonzero(~matched & ~empty):
+        # Raises the same error a YAML date would
+        parse_date(text.to_numpy()[row])
+    ordinals = np.full(len(text), NO_DATE, dtype=np.int64)
+    if matched.any():
+        dates = pd.to_datetime(parts[matched].astype(np.int64).set_axis(['year', 'month', 'day'], axis=1))
+        ordinals[matched] = dates.to_numpy().astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+    return ordinals
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,163 @@
+""" Goal seek over one variable of the placeholder header """
+
+import contextlib
+import datetime
+from decimal import Decimal
+import io
+import re
+
+import beautiful_date as BD
+
+from financial_planner.Bank import Bank
+from financial_planner.DateUnit import DateUnit
+from financial_planner.Simulation import Simulation
+from financial_planner.common import parse_date
+
+DATE_PATTERN = re.compile(r'^\d+-\d+-\d+$')
+
+class NoBankruptcy:
+    """Satisfied when the run reaches its end_date without going bankrupt"""
+
+    def start(self) -> None:
+        pass
+
+    def stop_when(self, bank: Bank, date: BD.BeautifulDate) -> bool:
+        # Going bankrupt already ends the run
+        return False
+
+    def satisfied(self, simulation: Simulation) -> bool:
+        return simulation.bankrupt_date is None
+
+    def margin(self, simulation: Simulation):
+        """How far from failing the run was, None when the constraint cannot tell"""
+        return None
+
+class MinimumBalance:
+    """Satisfied when account ends every step with at least amount (and never goes bankrupt)
+
+    A failing trial stops at the first step below amount.
+    """
+
+    def __init__(self, account: str, amount: Decimal) -> None:
+        self.account = account
+        self.amount = Decimal(amount)
+        self.lowest = None
+
+    def start(self) -> None:
+        self.lowest = None
+
+    def stop_when(self, bank: Bank, date: BD.BeautifulDate) -> bool:
+        assert(self.account in bank.account_map), f"No account named {self.account}"
+        balance = bank.account_map[self.account].balance
+        if self.lowest is None or balance < self.lowest:
+            self.lowest = balance
+        return balance < self.amount
+
+    def satisfied(self, simulation: Simulation) -> bool:
+        return simulation.bankrupt_date is None and simulation.stopped_date is None
+
+    def margin(self, simulation: Simulation):
+        if simulation.bankrupt_date is not None or self.lowest is None:
+            return None
+        return self.lowest - self.amount
+
+def parse_constraint(constraint_data) -> object:
+    """YAML form: no_bankruptcy or {minimum_balance: {account: Checking, amount: 1000}}"""
+    if constraint_data == 'no_bankruptcy':
+        return NoBankruptcy()
+    assert(isinstance(constraint_data, dict) and 'minimum_balance' in constraint_data), f"Unknown goal seek constraint {constraint_data}, allowed: no_bankruptcy, minimum_balance"
+    return MinimumBalance(constraint_data['minimum_balance']['account'], constraint_data['minimum_balance']['amount'])
+
+class GoalSeekResult:
+
+    def __init__(self, variable: str, value: str, trials: list) -> None:
+        self.variable = variable
+        # None when no value in the range satisfies the constraint
+        self.value = value
+        self.trials = trials
+
+    def to_frame(self):
+        """One row per trial in the order they ran"""
+        import pandas as pd
+        return pd.DataFrame(self.trials, columns=[self.variable, 'satisfied', 'margin', 'bankrupt_date', 'stopped_date'])
+
+def goal_seek(yaml_text: str, variable: str, low: str, high: str, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, constraint, goal: str = 'min', method: str = 'bisection', tolerance: str = None, step: DateUnit = DateUnit.DAYS) -> GoalSeekResult:
+    """Smallest (goal min) or largest (goal max) value of a header variable in [low, high] that satisfies constraint
+
+    The constraint must flip only once over the range: min expects large
+    values to pass (e.g. a monthly contribution), max small ones (e.g. a
+    retirement date). Values are numbers, searched down to tolerance
+    (default 0.01), or YYYY-MM-DD dates, searched to the day.
+
+    bisection halves the range every trial. secant puts the next trial where
+    the constraint's margin (see MinimumBalance) interpolates to zero, kept
+    inside the range left, and bisects when there is no margin to go by or
+    the last step did not halve the range.
+    Every trial stops as soon as the constraint fails.
+    """
+    from financial_planner.cli import create_simulation, split_placeholders, template_environment
+    assert(goal in ('min', 'max')), f"Unknown goal {goal}, allowed: min, max"
+    assert(method in ('bisection', 'secant')), f"Unknown method {method}, allowed: bisection, secant"
+    variables, template_content = split_placeholders(yaml_text)
+    template = template_environment().from_string(template_content)
+    dates = bool(DATE_PATTERN.match(str(low)))
+    if dates:
+        low, high, tolerance = parse_date(low).toordinal(), parse_date(high).toordinal(), 1
+        def format_value(value: int) -> str:
+            return datetime.date.fromordinal(value).isoformat()
+    else:
+        tolerance = Decimal(tolerance or '0.01')
+        low, high = Decimal(low), Decimal(high)
+        def format_value(value: Decimal) -> str:
+            return str(value)
+    assert(low < high), "Goal seek needs low < high"
+    trials = []
+
+    def trial(value) -> tuple:
+        constraint.start()
+        simulation = Simulation(create_simulation(template.render(**{**variables, variable: format_value(value)})).bank)
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulation.run(start_date, end_date, keep_logs=False, step=step, stop_when=constraint.stop_when)
+        satisfied = constraint.satisfied(simulation)
+        margin = constraint.margin(simulation)
+        trials.append((format_value(value), satisfied, margin, simulation.bankrupt_date, simulation.stopped_date))
+        return satisfied, margin
+
+    def rounded(value):
+        if dates:
+            return int(value)
+        return (value / tolerance).quantize(Decimal(1)) * tolerance
+
+    good, bad = (high, low) if goal == 'min' else (low, high)
+    passed, good_margin = trial(good)
+    if not passed:
+        return GoalSeekResult(variable, None, trials)
+    passed, bad_margin = trial(bad)
+    if passed:
+        return GoalSeekResult(variable, format_value(bad), trials)
+    kept = None
+    secant = method == 'secant'
+    while abs(good - bad) > tolerance:
+        width = abs(good - bad)
+        middle = rounded((good + bad) / 2)
+        if secant and None not in (good_margin, bad_margin) and good_margin != bad_margin:
+            guess = rounded(bad + (good - bad) * Decimal(-bad_margin) / Decimal(good_margin - bad_margin))
+            if min(good, bad) < guess < max(good, bad):
+                middle = guess
+        if middle in (good, bad):
+            break
+        passed, margin = trial(middle)
+        if passed:
+            good, good_margin = middle, margin
+        else:
+            bad, bad_margin = middle, margin
+        # Illinois step, an end kept twice in a row has its margin halved so it cannot stall the secant
+        if kept == (not passed) and None not in (good_margin, bad_margin):
+            if passed:
+                bad_margin /= 2
+            else:
+                good_margin /= 2
+        kept = not passed
+        # A step that did not halve the range is followed by a bisection, never much slower than bisecting
+        secant = method == 'secant' and abs(good - bad) <= width / 2
+    return GoalSeekResult(variable, format_value(good), trials)
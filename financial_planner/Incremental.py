@@ -0,0 +1,229 @@
+""" Re-simulate only the part of a plan a config edit can change """
+
+from collections import Counter
+import bisect
+import datetime
+import json
+from pathlib import Path
+import pickle
+
+import beautiful_date as BD
+
+from financial_planner.Bank import Bank
+from financial_planner.DateUnit import DateUnit
+from financial_planner.Ledger import StateLedger, TransactionLedger
+from financial_planner.Simulation import Simulation
+from financial_planner.common import month_int, parse_date
+
+ONE_DAY = datetime.timedelta(days=1)
+CACHE_VERSION = 2
+# Top level sections that never change the simulated results
+IGNORED_SECTIONS = ('monte_carlo',)
+ENTRY_SECTIONS = ('transactions', 'transfers')
+
+def transaction_entries(account_data: dict) -> list:
+    """(section path, canonical text, entry) of every transaction and transfer of an account, in YAML order"""
+    entries = []
+    def walk(data, path):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                walk(value, path + (key,))
+        else:
+            for entry in data:
+                entries.append((path, json.dumps(entry, sort_keys=True), entry))
+    for section in ENTRY_SECTIONS:
+        walk(account_data.get(section, {}), (section,))
+    return entries
+
+def entry_start(entry: dict) -> datetime.date:
+    """First date an entry can fire on, None when it starts on the day the simulation is built"""
+    if 'start_date' not in entry:
+        return None
+    return parse_date(entry['start_date'])
+
+def end_date_change(old_entry: dict, new_entry: dict) -> datetime.date:
+    """Day after the earlier end_date when that is all that changed between the entries, else None"""
+    def without_end(entry):
+        return {key: value for key, value in entry.items() if key != 'end_date'}
+    if without_end(old_entry) != without_end(new_entry):
+        return None
+    ends = [parse_date(entry['end_date']) if 'end_date' in entry else datetime.date.max for entry in (old_entry, new_entry)]
+    return min(ends) + ONE_DAY
+
+def earliest_change(old_config: dict, new_config: dict) -> datetime.date:
+    """First date an edit from old_config to new_config can affect
+
+    Returns None when the whole run can change (accounts, mortgages or
+    settings edited, or transactions reordered) and date.max when nothing
+    that is simulated changed.
+    """
+    def settings(config):
+        return {key: value for key, value in config.items() if key not in IGNORED_SECTIONS + ('accounts',)}
+    if settings(old_config) != settings(new_config):
+        return None
+    old_accounts, new_accounts = old_config.get('accounts') or [], new_config.get('accounts') or []
+    if len(old_accounts) != len(new_accounts):
+        return None
+    earliest = datetime.date.max
+    for old_account, new_account in zip(old_accounts, new_accounts):
+        for key in set(old_account) | set(new_account):
+            if key not in ENTRY_SECTIONS and old_account.get(key) != new_account.get(key):
+                return None
+        old_entries, new_entries = transaction_entries(old_account), transaction_entries(new_account)
+        old_keys = Counter(entry[:2] for entry in old_entries)
+        new_keys = Counter(entry[:2] for entry in new_entries)
+        removed, added = old_keys - new_keys, new_keys - old_keys
+        # Unchanged entries must keep their order, it decides the order of same day log rows
+        def kept(entries, changed):
+            changed = Counter(changed)
+            keys = []
+            for entry in entries:
+                if changed[entry[:2]] > 0:
+                    changed[entry[:2]] -= 1
+                else:
+                    keys.append(entry[:2])
+            return keys
+        if kept(old_entries, removed) != kept(new_entries, added):
+            return None
+        old_changed = [entry for entry in old_entries if entry[:2] in removed]
+        new_changed = [entry for entry in new_entries if entry[:2] in added]
+        for new_entry in list(new_changed):
+            for old_entry in old_changed:
+                if old_entry[0] != new_entry[0]:
+                    continue
+                date = end_date_change(old_entry[2], new_entry[2])
+                if date is not None:
+                    earliest = min(earliest, date)
+                    old_changed.remove(old_entry)
+                    new_changed.remove(new_entry)
+                    break
+        for _, _, entry in old_changed + new_changed:
+            start = entry_start(entry)
+            if start is None:
+                return None
+            earliest = min(earliest, start)
+    return earliest
+
+def external_files(config: dict, previous: dict = None) -> dict:
+    """{resolved path: (modification time, sha256)} of every external CSV of config
+
+    Files whose modification time matches previous keep its hash instead of
+    being read again.
+    """
+    from financial_planner.ExternalTransactions import file_hash
+    previous = previous or {}
+    files = {}
+    for account in (config or {}).get('accounts') or []:
+        for external_source_info in account.get('external_transactions', []):
+            path = Path(external_source_info['path']).resolve()
+            modified = path.stat().st_mtime_ns
+            known = previous.get(str(path))
+            files[str(path)] = known if known is not None and known[0] == modified else (modified, file_hash(path))
+    return files
+
+class SimulationCache:
+    """Monthly snapshots of a run so the next run of an edited config only simulates forward of the edit
+
+    Add the cache to the observers of Simulation.run and pass it to
+    create_simulation, which restores the latest snapshot taken before the
+    first date the edit can affect (see earliest_change), or simulates
+    everything again when an external CSV changed. Snapshots are only
+    reused by runs with the same start_date, step and lazy_interest. Cache
+    files are pickles, only open ones you wrote yourself.
+    """
+
+    def __init__(self, start_date: BD.BeautifulDate, step: DateUnit = DateUnit.DAYS, lazy_interest: bool = False, path: Path = None) -> None:
+        self.key = (start_date, step, lazy_interest)
+        self.path = path
+        self.config = None
+        self.files = {}
+        self.clear()
+
+    @classmethod
+    def open(cls, path: Path, start_date: BD.BeautifulDate, step: DateUnit = DateUnit.DAYS, lazy_interest: bool = False) -> "SimulationCache":
+        """Cache saved at path, or an empty one when there is none for these run options"""
+        cache = cls(start_date, step, lazy_interest, path)
+        if Path(path).exists():
+            with open(path, 'rb') as handle:
+                saved = pickle.load(handle)
+            if saved.get('version') == CACHE_VERSION and saved['key'] == cache.key:
+                cache.config = saved['config']
+                cache.files = saved['files']
+                cache.snapshots = saved['snapshots']
+                cache.transaction_log = saved['transaction_log']
+                cache.state_log = saved['state_log']
+        return cache
+
+    def save(self, path: Path = None) -> None:
+        with open(path or self.path, 'wb') as handle:
+            pickle.dump({
+                'version': CACHE_VERSION,
+                'key': self.key,
+                'config': self.config,
+                'files': self.files,
+                'snapshots': self.snapshots,
+                'transaction_log': self.transaction_log,
+                'state_log': self.state_log,
+            }, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def clear(self) -> None:
+        self.snapshots = []
+        self.transaction_log = TransactionLedger()
+        self.state_log = StateLedger()
+        self.transaction_position = 0
+        self.state_position = 0
+
+    def restore(self, simulation: Simulation, config: dict, end_date: BD.BeautifulDate) -> None:
+        """Fast forward a freshly built simulation of config to the latest reusable snapshot
+
+        Snapshots past end_date are dropped, a shorter run must not start
+        beyond its own end.
+        """
+        files = external_files(config, self.files)
+        digests = {path: digest for path, (_, digest) in files.items()}
+        if self.config is None or digests != {path: digest for path, (_, digest) in self.files.items()}:
+            change = None
+        else:
+            change = earliest_change(self.config, config)
+        self.config = config
+        self.files = files
+        if change is None:
+            self.clear()
+            return
+        count = bisect.bisect_right([snapshot['next_date'] for snapshot in self.snapshots], min(change, end_date))
+        self.snapshots = self.snapshots[:count]
+        if count == 0:
+            self.clear()
+            return
+        snapshot = self.snapshots[-1]
+        self.transaction_log = self.transaction_log.head(snapshot['transactions'])
+        self.state_log = self.state_log.head(snapshot['states'])
+        self.transaction_position = snapshot['transactions']
+        self.state_position = snapshot['states']
+        bank = simulation.bank
+        bank.import_state(snapshot['state'])
+        bank.transaction_log = self.transaction_log.head(snapshot['transactions'])
+        bank.state_log = self.state_log.head(snapshot['states'])
+        simulation.relative_date = self.key[0]
+        simulation.next_date = snapshot['next_date']
+        simulation.bankrupt_date = None
+
+    def update(self, bank: Bank, date: BD.BeautifulDate) -> None:
+        self.transaction_log.extend_columns(bank.transaction_log.names, bank.transaction_log.since(self.transaction_position))
+        self.transaction_position = bank.transaction_log.total
+        if self.state_log.accounts is None:
+            self.state_log.accounts = bank.state_log.accounts
+        self.state_log.append_rows(*bank.state_log.since(self.state_position))
+        self.state_position = bank.state_log.total
+        next_date = date + ONE_DAY
+        if self.snapshots and month_int(self.snapshots[-1]['next_date']) == month_int(next_date):
+            return
+        self.snapshots.append({
+            'next_date': next_date,
+            'state': bank.export_state(),
+            'transactions': len(self.transaction_log),
+            'states': len(self.state_log),
+        })
+
+    def close(self, bank: Bank) -> None:
+        pass
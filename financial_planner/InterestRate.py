@@ -1,39 +1,153 @@
+import bisect
+import datetime
 from decimal import Decimal
 
+import beautiful_date as BD
+
+from financial_planner.Calendar import as_ordinal
 from financial_planner.DateUnit import DateUnit
+from financial_planner.Money import divide_cents, scaled
+from financial_planner.common import CENTS, parse_date
+
+ONE = Decimal(1)
 
 class InterestRate:
 
     def __init__(self, rate):
         self.rate = Decimal(rate)
+        # Per period rates are needed on every step, work them out once
+        self.rates = {
+            DateUnit.DAYS: self.rate / Decimal("365.0"),
+            DateUnit.WEEKS: self.rate / Decimal("52.0"),
+            DateUnit.BIWEEK: self.rate / Decimal("26.0"),
+            DateUnit.MONTHS: self.rate / Decimal("12.0"),
+            DateUnit.YEARS: self.rate,
+        }
+        self.scaled_rates = {date_unit: scaled(rate) for date_unit, rate in self.rates.items()}
 
     @property
     def year(self):
-        return self.rate
+        return self.rates[DateUnit.YEARS]
 
     @property
     def month(self):
-        return self.rate / Decimal("12.0")
+        return self.rates[DateUnit.MONTHS]
 
     @property
     def week(self):
-        return self.rate / Decimal("52.0")
+        return self.rates[DateUnit.WEEKS]
 
     @property
     def biweek(self):
-        return self.rate / Decimal("26.0")
+        return self.rates[DateUnit.BIWEEK]
 
     @property
     def day(self):
-        return self.rate / Decimal("365.0")
+        return self.rates[DateUnit.DAYS]
 
     def get_rate(self, date_unit: DateUnit) -> Decimal:
-        mapping = {
-            DateUnit.DAYS: self.day,
-            DateUnit.WEEKS: self.week,
-            DateUnit.BIWEEK: self.biweek,
-            DateUnit.MONTHS: self.month,
-            DateUnit.YEARS: self.year,
-        }
-        return mapping[date_unit]
-        
\ No newline at end of file
+        return self.rates[date_unit]
+
+    def at(self, date: BD.BeautifulDate) -> "InterestRate":
+        """Rate in effect on date"""
+        return self
+
+    def constant_days(self, date: BD.BeautifulDate, days: int) -> int:
+        """How many of the days from date on share at(date)"""
+        return days
+
+    def interest(self, amount, date_unit: DateUnit):
+        """One date_unit of interest on amount rounded to cents, int cents in and out for the cents backend"""
+        if type(amount) is int:
+            numerator, denominator = self.scaled_rates[date_unit]
+            return divide_cents(amount * numerator, denominator)
+        return (amount * self.rates[date_unit]).quantize(CENTS)
+
+    def grow(self, amount, relative_date: BD.BeautifulDate, date: BD.BeautifulDate):
+        """amount grown with simple daily interest from relative_date to date, rounded to cents"""
+        return self.grow_days(amount, relative_date.toordinal(), (date - relative_date).days)
+
+    def grow_days(self, amount, relative_ordinal: int, days: int):
+        if self.rate == 0:
+            return amount
+        if type(amount) is int:
+            numerator, denominator = self.scaled_rates[DateUnit.DAYS]
+            return divide_cents(amount * (denominator + numerator * days), denominator)
+        return (amount * (1 + self.rates[DateUnit.DAYS] * days)).quantize(CENTS)
+
+class RateSchedule:
+    """Annual rate that changes over time
+
+    rates maps the date (or year) each rate starts on to the rate, the
+    first rate also applies before its date. Growth is simple daily interest
+    like InterestRate's, each day adding the daily rate in effect that day,
+    so a one rate schedule grows exactly like the plain rate. The rate of
+    every day is tabulated up front and the cumulative growth factors are
+    tabulated per relative date as far as they are needed, so lookups are
+    list reads.
+    """
+
+    def __init__(self, rates: dict) -> None:
+        assert(len(rates) > 0), "Rate schedules need at least one rate"
+        starts = sorted((parse_rate_date(start), rate) for start, rate in rates.items())
+        self.starts = [start.toordinal() for start, _ in starts]
+        self.pieces = [InterestRate(rate) for _, rate in starts]
+        self.by_day = []
+        for piece, start, next_start in zip(self.pieces, self.starts, self.starts[1:]):
+            self.by_day.extend([piece] * (next_start - start))
+        self.growth_factors = {}
+
+    def at(self, date) -> InterestRate:
+        """Rate in effect on date, a date or a day ordinal"""
+        assert(date is not None), "A rate schedule needs the date to pick its rate"
+        index = as_ordinal(date) - self.starts[0]
+        if index < 0:
+            return self.pieces[0]
+        if index >= len(self.by_day):
+            return self.pieces[-1]
+        return self.by_day[index]
+
+    def constant_days(self, date, days: int) -> int:
+        assert(date is not None), "A rate schedule needs the date to pick its rate"
+        ordinal = as_ordinal(date)
+        position = bisect.bisect_right(self.starts, ordinal)
+        if position == len(self.starts):
+            return days
+        return min(days, self.starts[position] - ordinal)
+
+    def growth_factor(self, relative_date, days: int) -> Decimal:
+        """Simple growth over the days from relative_date (a date or a day ordinal), 1 plus every day's rate"""
+        relative_ordinal = as_ordinal(relative_date)
+        factors = self.growth_factors.setdefault(relative_ordinal, [ONE])
+        while len(factors) <= days:
+            factors.append(factors[-1] + self.at(relative_ordinal + len(factors) - 1).day)
+        return factors[days]
+
+    def grow(self, amount, relative_date: BD.BeautifulDate, date: BD.BeautifulDate):
+        """amount grown with simple daily interest from relative_date to date, rounded to cents"""
+        return self.grow_days(amount, relative_date.toordinal(), (date - relative_date).days)
+
+    def grow_days(self, amount, relative_ordinal: int, days: int):
+        if days <= 0:
+            return amount
+        factor = self.growth_factor(relative_ordinal, days)
+        if type(amount) is int:
+            numerator, denominator = scaled(factor)
+            return divide_cents(amount * numerator, denominator)
+        return (amount * factor).quantize(CENTS)
+
+def parse_rate_date(start) -> BD.BeautifulDate:
+    """Schedule keys are dates or years (January 1st)"""
+    if isinstance(start, datetime.date):
+        return BD.BeautifulDate(start.year, start.month, start.day)
+    if '-' not in str(start):
+        return BD.BeautifulDate(int(start), 1, 1)
+    return parse_date(start)
+
+def make_rate(rate):
+    """InterestRate of a single annual rate, RateSchedule of a {start date: rate} mapping"""
+    if isinstance(rate, (InterestRate, RateSchedule)):
+        return rate
+    if isinstance(rate, dict):
+        return RateSchedule(rate)
+    return InterestRate(rate)
@@ -0,0 +1,279 @@
+""" Columnar logs of simulation results """
+
+from array import array
+import datetime
+from decimal import Decimal
+
+import beautiful_date as BD
+
+from financial_planner.Calendar import as_ordinal
+from financial_planner.Transaction import TransactionLog
+
+# datetime64[D] counts days from 1970-01-01
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+def ordinals_to_datetime64(ordinals):
+    import numpy as np
+    return (np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL).astype('datetime64[D]')
+
+class StateLedger:
+    """Account balances by date in a preallocated row major array
+
+    One row per captured date, one column per account. The columns are fixed
+    by the first capture. Storage is a flat array of doubles, so exports to
+    numpy/pandas are views rather than copies; capturing more rows than
+    reserved while such a view is alive raises BufferError.
+
+    release() drops the captured rows (keeping the allocation) for streaming
+    consumers, offset counts the rows released so far.
+    """
+
+    def __init__(self) -> None:
+        self.accounts = None
+        self.dates = array('q')
+        self.balances = array('d')
+        self.rows = 0
+        self.offset = 0
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def total(self) -> int:
+        """Rows captured since creation, including released ones"""
+        return self.offset + self.rows
+
+    def release(self) -> None:
+        self.offset += self.rows
+        self.rows = 0
+
+    def since(self, position: int) -> tuple:
+        """Copies of the dates and flat balances captured from total position onwards"""
+        start = max(position - self.offset, 0)
+        width = len(self.accounts or [])
+        return self.dates[start:self.rows], self.balances[start * width:self.rows * width]
+
+    def __getitem__(self, row: int) -> dict:
+        if row < 0:
+            row += self.rows
+        assert(0 <= row < self.rows), f"No state captured for row {row}"
+        width = len(self.accounts)
+        state = {'date': BD.BeautifulDate.fromordinal(self.dates[row])}
+        state.update(zip(self.accounts, self.balances[row * width:(row + 1) * width]))
+        return state
+
+    def set_accounts(self, accounts: list) -> None:
+        names = [account.name for account in accounts]
+        if self.accounts is None:
+            self.accounts = names
+        assert(self.accounts == names), "Accounts cannot change once state has been captured"
+
+    def reserve(self, accounts: list, rows: int) -> None:
+        """Preallocate storage for rows captures of accounts"""
+        self.set_accounts(accounts)
+        self.grow(rows - self.rows)
+
+    def grow(self, rows: int) -> None:
+        missing_dates = self.rows + rows - len(self.dates)
+        if missing_dates > 0:
+            self.dates.frombytes(bytes(8 * missing_dates))
+            self.balances.frombytes(bytes(8 * missing_dates * len(self.accounts)))
+
+    def capture(self, date, accounts: list) -> None:
+        self.set_accounts(accounts)
+        if self.rows == len(self.dates):
+            self.grow(max(self.rows, 64))
+        width = len(self.accounts)
+        self.dates[self.rows] = as_ordinal(date)
+        start = self.rows * width
+        for column, account in enumerate(accounts):
+            balance = account.balance
+            if type(balance) is int:
+                balance /= 100
+            self.balances[start + column] = balance
+        self.rows += 1
+
+    def extend(self, ordinals, balances) -> None:
+        """Bulk append an iterable of date ordinals and a (rows, accounts) array"""
+        count = len(ordinals)
+        self.grow(count)
+        width = len(self.accounts)
+        new_balances = array('d')
+        new_balances.frombytes(balances.astype('float64').tobytes())
+        self.dates[self.rows:self.rows + count] = array('q', ordinals)
+        self.balances[self.rows * width:(self.rows + count) * width] = new_balances
+        self.rows += count
+
+    def append_rows(self, dates: array, balances: array) -> None:
+        """Bulk append dates and flat balances as returned by since()"""
+        count = len(dates)
+        self.grow(count)
+        width = len(self.accounts)
+        self.dates[self.rows:self.rows + count] = dates
+        self.balances[self.rows * width:(self.rows + count) * width] = balances
+        self.rows += count
+
+    def head(self, rows: int) -> "StateLedger":
+        """Copy of the first rows captures, nothing may have been released"""
+        assert(self.offset == 0), "Cannot copy a released ledger"
+        ledger = StateLedger()
+        ledger.accounts = self.accounts
+        width = len(self.accounts or [])
+        ledger.dates = self.dates[:rows]
+        ledger.balances = self.balances[:rows * width]
+        ledger.rows = rows
+        return ledger
+
+    def to_array(self):
+        """(rows, accounts) numpy view of the captured balances"""
+        import numpy as np
+        width = len(self.accounts or [])
+        return np.frombuffer(self.balances, dtype=np.float64, count=self.rows * width).reshape(self.rows, width)
+
+    def date_array(self):
+        import numpy as np
+        return ordinals_to_datetime64(np.frombuffer(self.dates, dtype=np.int64, count=self.rows))
+
+    def to_frame(self):
+        """Wide DataFrame, a row per captured date and a column per account"""
+        import pandas as pd
+        return pd.DataFrame(
+            self.to_array(),
+            index=pd.DatetimeIndex(self.date_array(), name='date'),
+            columns=self.accounts,
+            copy=False,
+        )
+
+    def to_long_frame(self):
+        """Long DataFrame, a row per account per captured date"""
+        import numpy as np
+        import pandas as pd
+        width = len(self.accounts or [])
+        return pd.DataFrame({
+            'account': np.tile(np.array(self.accounts or [], dtype=object), self.rows),
+            'date': np.repeat(self.date_array(), width),
+            'balance': self.to_array().reshape(-1),
+        })
+
+class TransactionLedger:
+    """Transaction log stored as integer columns
+
+    Account names and titles are interned to integer ids (-1 for None),
+    amounts are integer cents and dates are day ordinals. Entries are only
+    rebuilt as TransactionLog objects when indexed or iterated.
+
+    release() drops the recorded entries for streaming consumers, offset
+    counts the entries released so far.
+    """
+
+    def __init__(self) -> None:
+        self.names = []
+        self.name_ids = {}
+        self.sources = array('i')
+        self.destinations = array('i')
+        self.titles = array('i')
+        self.amounts = array('q')
+        self.dates = array('q')
+        self.offset = 0
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @property
+    def columns(self) -> tuple:
+        return self.sources, self.destinations, self.titles, self.amounts, self.dates
+
+    @property
+    def total(self) -> int:
+        """Entries recorded since creation, including released ones"""
+        return self.offset + len(self)
+
+    def release(self) -> None:
+        self.offset += len(self)
+        for column in self.columns:
+            del column[:]
+
+    def since(self, position: int) -> tuple:
+        """Copies of the (sources, destinations, titles, amounts, dates) columns from total position onwards"""
+        start = max(position - self.offset, 0)
+        return tuple(column[start:] for column in self.columns)
+
+    def intern(self, name: str) -> int:
+        if name is None:
+            return -1
+        try:
+            return self.name_ids[name]
+        except KeyError:
+            self.name_ids[name] = len(self.names)
+            self.names.append(name)
+            return self.name_ids[name]
+
+    def name(self, name_id: int) -> str:
+        if name_id < 0:
+            return None
+        return self.names[name_id]
+
+    def record(self, source: str, destination: str, title: str, amount: Decimal, date) -> None:
+        """amount is Decimal dollars, or int cents from the cents backend"""
+        self.sources.append(self.intern(source))
+        self.destinations.append(self.intern(destination))
+        self.titles.append(self.intern(title))
+        self.amounts.append(amount if type(amount) is int else int((amount * 100).to_integral_value()))
+        self.dates.append(as_ordinal(date))
+
+    def append(self, log: TransactionLog) -> None:
+        self.record(log.source, log.destination, log.title, log.amount, log.date)
+
+    def extend(self, logs) -> None:
+        for log in logs:
+            self.record(log.source, log.destination, log.title, log.amount, log.date)
+
+    def extend_columns(self, names: list, columns: tuple) -> None:
+        """Bulk append columns as returned by since(), names is the source ledger's name table
+
+        Names are interned in order so ids only line up when this ledger's
+        name table is a prefix of names.
+        """
+        for name in names[len(self.names):]:
+            self.intern(name)
+        assert(self.names == list(names)), "Name tables have diverged"
+        for column, new in zip(self.columns, columns):
+            column.extend(new)
+
+    def head(self, count: int) -> "TransactionLedger":
+        """Copy of the first count entries, nothing may have been released"""
+        assert(self.offset == 0), "Cannot copy a released ledger"
+        ledger = TransactionLedger()
+        ledger.names = list(self.names)
+        ledger.name_ids = dict(self.name_ids)
+        for column, source in zip(ledger.columns, self.columns):
+            column.extend(source[:count])
+        return ledger
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        return TransactionLog(
+            self.name(self.sources[index]),
+            self.name(self.destinations[index]),
+            self.name(self.titles[index]),
+            Decimal(self.amounts[index]).scaleb(-2),
+            BD.BeautifulDate.fromordinal(self.dates[index]),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_frame(self):
+        """DataFrame with categorical names and float dollar amounts"""
+        import numpy as np
+        import pandas as pd
+        categories = pd.Index(self.names, dtype=object)
+        return pd.DataFrame({
+            'source': pd.Categorical.from_codes(np.frombuffer(self.sources, dtype=np.int32), categories=categories),
+            'destination': pd.Categorical.from_codes(np.frombuffer(self.destinations, dtype=np.int32), categories=categories),
+            'title': pd.Categorical.from_codes(np.frombuffer(self.titles, dtype=np.int32), categories=categories),
+            'amount': np.frombuffer(self.amounts, dtype=np.int64) / 100,
+            'date': ordinals_to_datetime64(np.frombuffer(self.dates, dtype=np.int64)),
+        })
@@ -0,0 +1,69 @@
+""" Integer cents money backend
+
+Simulation.run(integer_cents=True) converts every balance, amount and
+mortgage schedule of the bank to int cents for the run and back to Decimal
+at the end. The rest of the code is shared: anything that rounds money
+dispatches on int vs Decimal.
+
+Rounding rules
+- Amounts are whole cents, sums and differences are exact in both backends.
+- Products with a rate (interest, transaction growth) are computed exactly
+  from the rate's Decimal value and rounded once to the nearest cent, ties
+  to even, as Decimal.quantize(CENTS) does.
+- The Decimal path additionally rounds each product to 28 significant
+  digits before quantizing, so the two can only differ when the exact
+  result lies within about 1e-20 cents of half a cent.
+"""
+
+from decimal import Decimal
+
+def to_cents(value) -> int:
+    """Whole cents of a cent quantized Decimal, ints are already cents"""
+    if type(value) is int:
+        return value
+    return int(value.scaleb(2))
+
+def from_cents(value) -> Decimal:
+    if type(value) is not int:
+        return value
+    return Decimal(value).scaleb(-2)
+
+def scaled(rate: Decimal) -> tuple:
+    """(numerator, denominator) ints with numerator / denominator == rate exactly"""
+    sign, digits, exponent = rate.as_tuple()
+    numerator = int(''.join(str(digit) for digit in digits) or '0')
+    if sign:
+        numerator = -numerator
+    if exponent >= 0:
+        return numerator * 10 ** exponent, 1
+    return numerator, 10 ** -exponent
+
+def divide_cents(numerator: int, denominator: int) -> int:
+    """numerator / denominator rounded to the nearest int, ties to even"""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+def convert_bank(bank, convert) -> None:
+    schedules = {}
+    for account in bank.accounts:
+        account.balance = convert(account.balance)
+        account.minimum_balance = convert(account.minimum_balance)
+        for transaction in account.transactions:
+            transaction.amount = convert(transaction.amount)
+            if hasattr(transaction, 'schedule'):
+                schedules[id(transaction.schedule)] = transaction.schedule
+    for schedule in schedules.values():
+        schedule.starting_balance = convert(schedule.starting_balance)
+        for column in (schedule.payments, schedule.interest, schedule.principal, schedule.remaining):
+            column[:] = [convert(value) for value in column]
+
+def use_cents(bank) -> None:
+    """Switch every balance, amount and mortgage schedule of bank to int cents"""
+    convert_bank(bank, to_cents)
+
+def use_decimal(bank) -> None:
+    """Switch bank back to Decimal dollars"""
+    convert_bank(bank, from_cents)
@@ -0,0 +1,168 @@
+""" Monte Carlo simulation with stochastic interest rates """
+
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+from decimal import Decimal
+import io
+import math
+import os
+import random
+import warnings
+
+import beautiful_date as BD
+import numpy as np
+
+from financial_planner.Bank import Bank
+from financial_planner.InterestRate import InterestRate
+from financial_planner.Mortgage import Mortgage, MortgagePaymentTransaction
+from financial_planner.Simulation import Simulation
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+# random.Random methods that draw one float from numeric parameters
+DISTRIBUTIONS = (
+    'random', 'uniform', 'triangular', 'gauss', 'normalvariate', 'lognormvariate',
+    'expovariate', 'vonmisesvariate', 'gammavariate', 'betavariate', 'paretovariate', 'weibullvariate',
+)
+
+class RateDistribution:
+    """Annual rate drawn once per path with a random.Random method
+
+    RateDistribution('gauss', 0.07, 0.15) draws rng.gauss(0.07, 0.15)
+    """
+
+    def __init__(self, distribution: str, *parameters) -> None:
+        assert(distribution in DISTRIBUTIONS), f"Unknown distribution {distribution}, allowed: {DISTRIBUTIONS}"
+        self.distribution = distribution
+        self.parameters = [float(parameter) for parameter in parameters]
+
+    def draw(self, rng: random.Random) -> Decimal:
+        return Decimal(repr(getattr(rng, self.distribution)(*self.parameters)))
+
+def parse_distributions(distribution_data: dict) -> dict:
+    """YAML form: {name: {distribution: gauss, parameters: [0.07, 0.15]}}"""
+    return {
+        name: RateDistribution(entry['distribution'], *entry.get('parameters', []))
+        for name, entry in distribution_data.items()
+    }
+
+class MonteCarloResult:
+
+    def __init__(self, start_date: BD.BeautifulDate, accounts: list, paths: np.ndarray, bankrupt_days: np.ndarray, percentiles: tuple) -> None:
+        self.accounts = accounts
+        self.path_count = paths.shape[0]
+        self.dates = np.datetime64(start_date.isoformat(), 'D') + np.arange(paths.shape[1])
+        with warnings.catch_warnings():
+            # Dates after every path went bankrupt are all NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            bands = np.nanpercentile(paths, percentiles, axis=0).astype(np.float64).round(2)
+        self.bands = dict(zip(percentiles, bands))
+        days = np.arange(paths.shape[1])
+        self.bankruptcy_probability = (bankrupt_days[:, None] <= days[None, :]).mean(axis=0)
+
+    def to_frame(self):
+        """Tidy percentile bands, one row per date and account"""
+        import pandas as pd
+        frame = pd.DataFrame({
+            'date': np.repeat(self.dates, len(self.accounts)),
+            'account': np.tile(self.accounts, len(self.dates)),
+        })
+        for percentile, band in self.bands.items():
+            frame[f"p{percentile}"] = band.reshape(-1)
+        return frame
+
+    def bankruptcy_frame(self):
+        import pandas as pd
+        return pd.DataFrame({'date': self.dates, 'bankruptcy_probability': self.bankruptcy_probability})
+
+def check_rate_names(bank: Bank, account_rates: dict, transaction_rates: dict) -> None:
+    """Every configured name must be an account or transaction of bank whose rate a draw changes
+
+    Mortgages are rejected, their payments come from an amortization schedule
+    fixed when the config is built.
+    """
+    accounts = {account.name: account for account in bank.accounts}
+    transactions = {transaction.name: transaction for account in bank.accounts for transaction in account.transactions}
+    for name in account_rates:
+        assert(name in accounts), f"Monte Carlo rate for unknown account {name}"
+        assert(not isinstance(accounts[name], Mortgage)), f"Monte Carlo rates cannot be drawn for the mortgage {name}"
+    for name in transaction_rates:
+        assert(name in transactions), f"Monte Carlo rate for unknown transaction {name}"
+        assert(not isinstance(transactions[name], MortgagePaymentTransaction)), f"Monte Carlo rates cannot be drawn for the mortgage transaction {name}"
+
+def apply_rates(simulation: Simulation, rng: random.Random, account_rates: dict, transaction_rates: dict) -> None:
+    """Draw every configured rate once, transactions sharing a name share the draw"""
+    account_draws = {name: account_rates[name].draw(rng) for name in sorted(account_rates)}
+    transaction_draws = {name: transaction_rates[name].draw(rng) for name in sorted(transaction_rates)}
+    for account in simulation.bank.accounts:
+        if account.name in account_draws:
+            account.default_interest_rate = InterestRate(account_draws[account.name])
+        for transaction in account.transactions:
+            if transaction.name in transaction_draws:
+                transaction.interest_rate = InterestRate(transaction_draws[transaction.name])
+
+def daily_balances(simulation: Simulation, total_days: int) -> np.ndarray:
+    """(days, accounts) array of end of day balances, NaN after bankruptcy"""
+    balances = np.full((total_days, len(simulation.bank.accounts)), np.nan, dtype=np.float32)
+    # First capture is the opening state, then one per simulated day
+    captured = simulation.bank.state_log.to_array()[1:]
+    balances[:len(captured)] = captured
+    return balances
+
+def run_paths(yaml_text: str, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, account_rates: dict, transaction_rates: dict, seeds: list, engine: type) -> list:
+    from financial_planner.ConfigCache import CompiledConfig
+    total_days = (end_date - start_date).days
+    # Parsed and built once, every path starts from a copy of the same bank
+    compiled = CompiledConfig.compile(yaml_text)
+    results = []
+    for seed in seeds:
+        simulation = engine(compiled.bank())
+        apply_rates(simulation, random.Random(seed), account_rates, transaction_rates)
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulation.run(start_date, end_date)
+        bankrupt_day = total_days
+        if simulation.bankrupt_date is not None:
+            bankrupt_day = (simulation.bankrupt_date - start_date).days
+        results.append((daily_balances(simulation, total_days), bankrupt_day))
+    return results
+
+def run_monte_carlo(
+    yaml_text: str,
+    start_date: BD.BeautifulDate,
+    end_date: BD.BeautifulDate,
+    paths: int = 1000,
+    account_rates: dict = None,
+    transaction_rates: dict = None,
+    percentiles: tuple = DEFAULT_PERCENTILES,
+    seed: int = 0,
+    workers: int = None,
+    engine: type = Simulation) -> MonteCarloResult:
+    """Run paths copies of a config with rates drawn from the given distributions
+
+    account_rates and transaction_rates map account/transaction names to a
+    RateDistribution. Paths are split into chunks over a process pool and
+    each path is seeded from (seed, path index) so results are reproducible
+    regardless of the number of workers. Names must exist in the config and
+    not be mortgages (see check_rate_names).
+    """
+    from financial_planner.cli import create_simulation
+    account_rates = account_rates or {}
+    transaction_rates = transaction_rates or {}
+    bank = create_simulation(yaml_text).bank
+    check_rate_names(bank, account_rates, transaction_rates)
+    accounts = [account.name for account in bank.accounts]
+    seeds = [(seed << 32) + path for path in range(paths)]
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, math.ceil(paths / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_paths, yaml_text, start_date, end_date, account_rates, transaction_rates, seeds[index:index + chunk_size], engine)
+            for index in range(0, paths, chunk_size)
+        ]
+        results = [result for future in futures for result in future.result()]
+    return MonteCarloResult(
+        start_date,
+        accounts,
+        np.stack([balances for balances, _ in results]),
+        np.array([bankrupt_day for _, bankrupt_day in results]),
+        percentiles,
+    )
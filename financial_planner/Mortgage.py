@@ -7,8 +7,9 @@ import beautiful_date as BD
 
 from financial_planner.InterestRate import InterestRate
 from financial_planner.Account import Debt
+from financial_planner.Calendar import Calendar
 from financial_planner.Transaction import MonthlyTransaction
-from financial_planner.common import ZERO, CENTS
+from financial_planner.common import ZERO, CENTS, month_date, month_int
 
 
 
@@ -17,17 +18,78 @@ def compute_payment(principal: Decimal, interest: Decimal, terms: int) -> Decima
     return result
 
 class Mortgage(Debt):
-    def calculate_interest(self, *args) -> Decimal:
+    def calculate_interest(self, *args, **kwargs) -> Decimal:
         return ZERO
 
 
+class AmortizationSchedule:
+    """Split of every payment of a loan into interest and principal
+
+    Built once in exact cents. The final payment is only the interest plus
+    what is left of the principal so the loan lands on exactly $0.
+    """
+
+    def __init__(self, remaining_balance: Decimal, payment: Decimal, monthly_rate: Decimal) -> None:
+        self.payments = []
+        self.interest = []
+        self.principal = []
+        self.remaining = []
+        self.starting_balance = Decimal(remaining_balance).quantize(CENTS)
+        remaining = self.starting_balance
+        while remaining > ZERO:
+            interest = (monthly_rate * remaining).quantize(CENTS)
+            principal = min(payment - interest, remaining)
+            assert(principal > ZERO), f"Payment of {payment} does not cover {interest} of interest"
+            remaining -= principal
+            self.payments.append(interest + principal)
+            self.interest.append(interest)
+            self.principal.append(principal)
+            self.remaining.append(remaining)
+
+    def __len__(self) -> int:
+        return len(self.payments)
+
+    def remaining_before(self, index: int) -> Decimal:
+        if index == 0:
+            return self.starting_balance
+        return self.remaining[min(index, len(self)) - 1]
+
+    def rows(self, first_payment_date: BD.BeautifulDate = None):
+        """Dicts of payment_number, date, payment, interest, principal, remaining_balance"""
+        for index in range(len(self)):
+            date = None
+            if first_payment_date is not None:
+                date = month_date(month_int(first_payment_date) + index, first_payment_date.day)
+            yield {
+                'payment_number': index + 1,
+                'date': date,
+                'payment': self.payments[index],
+                'interest': self.interest[index],
+                'principal': self.principal[index],
+                'remaining_balance': self.remaining[index],
+            }
+
 class MortgagePaymentTransaction(MonthlyTransaction):
 
-    def __init__(self, loan_amount: Decimal, remaining_balance: Decimal, terms: int, extra_principal: Decimal = ZERO, **kwargs) -> None:
+    def __init__(self, loan_amount: Decimal, remaining_balance: Decimal, terms: int, extra_principal: Decimal = ZERO, schedule: AmortizationSchedule = None, **kwargs) -> None:
         super().__init__(amount=ZERO, **kwargs)
         assert(self.end_date is None), f"Mortgages cannot have an end date ({self.name})"
-        self.remaining_balance = Decimal(remaining_balance)
-        self.payment = compute_payment(Decimal(loan_amount), self.interest_rate.month, int(terms)) + Decimal(extra_principal)
+        assert(type(self.interest_rate) == InterestRate), f"Mortgages need a single interest rate ({self.name})"
+        if schedule is None:
+            payment = compute_payment(Decimal(loan_amount), self.interest_rate.month, int(terms)) + Decimal(extra_principal)
+            schedule = AmortizationSchedule(remaining_balance, payment, self.interest_rate.month)
+        self.schedule = schedule
+        self.payment_index = 0
+
+    @property
+    def remaining_balance(self) -> Decimal:
+        return self.schedule.remaining_before(self.payment_index)
+
+    @property
+    def payment(self) -> Decimal:
+        if len(self.schedule) == 0:
+            return ZERO
+        return self.schedule.payments[min(self.payment_index, len(self.schedule) - 1)]
 
     @property
     def interest_payment(self) -> Decimal:
@@ -37,41 +99,26 @@ class MortgagePaymentTransaction(MonthlyTransaction):
     def principal_payment(self) -> Decimal:
         return self.payment - self.interest_payment
 
-    @property
-    def return_value(self) -> Decimal:
-        return self.payment * Decimal("-1")
-
-    @staticmethod
-    def calculate_payoff(remainder: Decimal) -> Decimal:
-        return remainder
+    def scheduled_value(self, index: int) -> Decimal:
+        return -self.schedule.payments[index]
 
-    def current_value(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> Decimal:
-        if self.remaining_balance <= ZERO:
+    def value_on(self, ordinal: int, relative_ordinal: int) -> Decimal:
+        if self.payment_index >= len(self.schedule):
             return ZERO
-        if self.remaining_balance > self.payment:
-            self.remaining_balance -= self.principal_payment
-            return self.return_value
-        else:
-            value = self.calculate_payoff(self.remaining_balance)
-            self.remaining_balance = ZERO
-            return value
+        value = self.scheduled_value(self.payment_index)
+        self.payment_index += 1
+        return value
 
-
-    def _get_active_cost(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> Decimal:
-        if date.day == self.start_date.day:
-            return self.current_value(date, relative_date)
+    def _cost_on(self, ordinal: int, relative_ordinal: int, calendar: Calendar) -> Decimal:
+        if calendar.day_of_month(ordinal) == self.start_date.day:
+            return self.value_on(ordinal, relative_ordinal)
         else:
             return ZERO
 
 class MortgagePrincipal(MortgagePaymentTransaction):
 
-    @property
-    def return_value(self) -> Decimal:
-        return self.principal_payment
-
-    @staticmethod
-    def calculate_payoff(remainder: Decimal) -> Decimal:
-        return Decimal("-1.00") * remainder
+    def scheduled_value(self, index: int) -> Decimal:
+        return self.schedule.principal[index]
 
 
 def create_mortgage_transactions():
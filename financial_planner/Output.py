@@ -0,0 +1,120 @@
+""" Streaming result writers """
+
+from array import array
+import csv
+import datetime
+from pathlib import Path
+import queue
+import threading
+
+import beautiful_date as BD
+
+from financial_planner.Bank import Bank
+from financial_planner.Reducers import MonthEndBalances, MonthlyTransactionSums, YearlyTotals
+from financial_planner.common import format_cents
+
+class StreamingWriter:
+    """Simulation observer that writes results to CSV while the run goes
+
+    New transactions are copied out of the bank on every update and handed
+    to a background thread in chunks, the hand off queue is bounded so
+    memory stays flat however long the horizon is. The monthly and yearly
+    rollups are kept up to date by reducers (see Reducers) and written when
+    the run closes the writer.
+
+    Writes transactions.csv (unless transactions is False),
+    monthly_transactions.csv, yearly_transactions.csv and
+    monthly_account_state.csv into results_dir.
+    """
+
+    def __init__(self, results_dir: Path, chunk_rows: int = 100000, queued_chunks: int = 2, transactions: bool = True) -> None:
+        self.results_dir = Path(results_dir)
+        self.chunk_rows = chunk_rows
+        self.transactions = transactions
+        self.transaction_position = 0
+        self.pending_transactions = tuple(array(code) for code in 'iiiqq')
+        self.monthly_sums = MonthlyTransactionSums()
+        self.yearly_totals = YearlyTotals()
+        self.month_end_balances = MonthEndBalances()
+        self.reducers = [self.monthly_sums, self.yearly_totals, self.month_end_balances]
+        self.error = None
+        self.chunks = queue.Queue(maxsize=queued_chunks)
+        if self.transactions:
+            self.file = open(self.results_dir / 'transactions.csv', 'w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(['', 'source', 'destination', 'title', 'amount', 'date'])
+            self.thread = threading.Thread(target=self.write_chunks, daemon=True)
+            self.thread.start()
+
+    def update(self, bank: Bank, date: BD.BeautifulDate) -> None:
+        for reducer in self.reducers:
+            reducer.update(bank, date)
+        if self.transactions:
+            self.collect(bank)
+            if len(self.pending_transactions[3]) >= self.chunk_rows:
+                self.flush(bank)
+
+    def close(self, bank: Bank) -> None:
+        for reducer in self.reducers:
+            reducer.close(bank)
+        if self.transactions:
+            self.collect(bank)
+            self.flush(bank)
+            self.chunks.put(None)
+            self.thread.join()
+            self.file.close()
+            if self.error is not None:
+                raise self.error
+        self.write_rollups()
+
+    def collect(self, bank: Bank) -> None:
+        for pending, new in zip(self.pending_transactions, bank.transaction_log.since(self.transaction_position)):
+            pending.extend(new)
+        self.transaction_position = bank.transaction_log.total
+
+    def flush(self, bank: Bank) -> None:
+        """Hand pending transactions to the writer thread"""
+        if self.error is not None:
+            raise self.error
+        self.chunks.put((list(bank.transaction_log.names), self.pending_transactions))
+        self.pending_transactions = tuple(array(code) for code in 'iiiqq')
+
+    def write_chunks(self) -> None:
+        count = 0
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                names, transactions = chunk
+                def name(name_id: int) -> str:
+                    return '' if name_id < 0 else names[name_id]
+                for source, destination, title, amount, ordinal in zip(*transactions):
+                    self.writer.writerow([count, name(source), name(destination), name(title), format_cents(amount), datetime.date.fromordinal(ordinal).isoformat()])
+                    count += 1
+            except Exception as error:
+                self.error = error
+
+    def write_rollups(self) -> None:
+        for name, reducer in [('monthly_transactions.csv', self.monthly_sums), ('yearly_transactions.csv', self.yearly_totals)]:
+            with open(self.results_dir / name, 'w', newline='') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(['', 'date', 'destination', 'amount'])
+                for count, (date, destination, amount) in enumerate(reducer.rows()):
+                    writer.writerow([count, date.isoformat(), destination, format_cents(amount)])
+        with open(self.results_dir / 'monthly_account_state.csv', 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(['', 'date', 'account', 'balance'])
+            for count, (date, account, balance) in enumerate(self.month_end_balances.rows()):
+                writer.writerow([count, date.isoformat(), account, f"{balance:.2f}"])
+
+def write_amortization(results_dir: Path, bank: Bank, start_date: BD.BeautifulDate) -> None:
+    """amortization.csv, every remaining payment of every mortgage from start_date on"""
+    with open(Path(results_dir) / 'amortization.csv', 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['mortgage', 'payment_number', 'date', 'payment', 'interest', 'principal', 'remaining_balance'])
+        for name, payment in bank.mortgages.items():
+            for row in payment.schedule.rows(payment.next_occurrence(start_date)):
+                writer.writerow([name] + [row[column] for column in ['payment_number', 'date', 'payment', 'interest', 'principal', 'remaining_balance']])
@@ -0,0 +1,119 @@
+""" Opt-in instrumentation of a simulation run """
+
+import json
+from pathlib import Path
+import time
+
+import beautiful_date as BD
+
+from financial_planner.Bank import Bank
+
+TIMED_METHODS = ('process_date', 'mature', 'capture_state', 'find_next_account')
+REPORT_NAME = 'profile.json'
+
+class SimulationProfiler:
+    """Simulation observer that times the bank's hot paths and counts transaction evaluations
+
+    The methods in TIMED_METHODS and the cost_on of every transaction are
+    wrapped on this bank's instances only, runs without a profiler take
+    exactly the same code path as before. Times are inclusive: process_date
+    contains the find_next_account calls it makes and mature the
+    capture_state ones.
+
+    Create it right before Simulation.run and pass it in the observers,
+    close() removes the wrappers and writes profile.json into results_dir
+    when one is given.
+    """
+
+    def __init__(self, bank: Bank, results_dir: Path = None) -> None:
+        self.bank = bank
+        self.results_dir = results_dir
+        self.seconds = {name: 0.0 for name in TIMED_METHODS}
+        self.calls = {name: 0 for name in TIMED_METHODS}
+        # Transaction class name: [cost_on calls, calls with a non zero cost]
+        self.costs = {}
+        self.low_balance_transfers = 0
+        self.steps = 0
+        self.peak_transaction_rows = 0
+        self.peak_state_rows = 0
+        self.attach()
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    def attach(self) -> None:
+        for name in TIMED_METHODS:
+            setattr(self.bank, name, self.timed(name, getattr(self.bank, name)))
+        for account in self.bank.accounts:
+            for transaction in account.transactions:
+                transaction.cost_on = self.counted(transaction)
+
+    def detach(self) -> None:
+        for name in TIMED_METHODS:
+            vars(self.bank).pop(name, None)
+        for account in self.bank.accounts:
+            for transaction in account.transactions:
+                vars(transaction).pop('cost_on', None)
+
+    def timed(self, name: str, method):
+        seconds, calls = self.seconds, self.calls
+        clock = time.perf_counter
+        def wrapper(*args, **kwargs):
+            began = clock()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - began
+                calls[name] += 1
+            if name == 'find_next_account':
+                # Every account found funds one transfer
+                self.low_balance_transfers += 1
+            return result
+        return wrapper
+
+    def counted(self, transaction):
+        cost_on = transaction.cost_on
+        counts = self.costs.setdefault(type(transaction).__name__, [0, 0])
+        def wrapper(ordinal, relative_ordinal, calendar):
+            cost = cost_on(ordinal, relative_ordinal, calendar)
+            counts[0] += 1
+            if cost != 0:
+                counts[1] += 1
+            return cost
+        return wrapper
+
+    def update(self, bank: Bank, date: BD.BeautifulDate) -> None:
+        self.steps += 1
+        self.measure(bank)
+
+    def measure(self, bank: Bank) -> None:
+        self.peak_transaction_rows = max(self.peak_transaction_rows, len(bank.transaction_log))
+        self.peak_state_rows = max(self.peak_state_rows, len(bank.state_log))
+
+    def close(self, bank: Bank) -> None:
+        self.elapsed = time.perf_counter() - self.started
+        self.measure(bank)
+        self.detach()
+        if self.results_dir is not None:
+            with open(Path(self.results_dir) / REPORT_NAME, 'w') as handle:
+                json.dump(self.report(), handle, indent=2)
+                handle.write('\n')
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started if self.elapsed is None else self.elapsed
+        return {
+            'wall_seconds': elapsed,
+            'steps': self.steps,
+            'methods': {
+                name: {'calls': self.calls[name], 'seconds': self.seconds[name]}
+                for name in TIMED_METHODS
+            },
+            'transaction_costs': {
+                name: {'calls': calls, 'non_zero': non_zero}
+                for name, (calls, non_zero) in sorted(self.costs.items())
+            },
+            'low_balance_transfers': self.low_balance_transfers,
+            'peak_log_rows': {
+                'transactions': self.peak_transaction_rows,
+                'states': self.peak_state_rows,
+            },
+        }
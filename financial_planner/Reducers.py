@@ -0,0 +1,122 @@
+""" Monthly and yearly rollups computed while the simulation runs """
+
+import datetime
+
+from financial_planner.Bank import Bank
+from financial_planner.common import month_int
+
+def last_day_of_month(date: datetime.date) -> datetime.date:
+    next_month = date.replace(day=28) + datetime.timedelta(days=4)
+    return next_month - datetime.timedelta(days=next_month.day)
+
+def year_int(date: datetime.date) -> int:
+    return date.year
+
+def last_day_of_year(date: datetime.date) -> datetime.date:
+    return datetime.date(date.year, 12, 31)
+
+class Reducer:
+    """Simulation observer that folds log rows into a summary as they are recorded
+
+    Every update() hands the rows recorded since the last one to
+    add_transactions() and add_states(), so the bank's logs can be released
+    after each step (Simulation.run keep_logs=False). Results are complete
+    once the run has closed the reducer.
+    """
+
+    def __init__(self) -> None:
+        self.transaction_position = 0
+        self.state_position = 0
+        self.names = []
+        self.accounts = None
+
+    def update(self, bank: Bank, date: datetime.date) -> None:
+        self.collect(bank)
+
+    def close(self, bank: Bank) -> None:
+        self.collect(bank)
+
+    def collect(self, bank: Bank) -> None:
+        if bank.transaction_log.total > self.transaction_position:
+            self.names = bank.transaction_log.names
+            self.add_transactions(*bank.transaction_log.since(self.transaction_position))
+            self.transaction_position = bank.transaction_log.total
+        if bank.state_log.total > self.state_position:
+            self.accounts = bank.state_log.accounts
+            self.add_states(*bank.state_log.since(self.state_position))
+            self.state_position = bank.state_log.total
+
+    def name(self, name_id: int) -> str:
+        return '' if name_id < 0 else self.names[name_id]
+
+    def add_transactions(self, sources, destinations, titles, amounts, dates) -> None:
+        pass
+
+    def add_states(self, dates, balances) -> None:
+        pass
+
+class TransactionSums(Reducer):
+    """Cents moved into each destination per period
+
+    period_of numbers the period a date falls in, period_end gives its last day.
+    """
+
+    def __init__(self, period_of, period_end) -> None:
+        super().__init__()
+        self.period_of = period_of
+        self.period_end = period_end
+        self.sums = {}
+        self.periods = {}
+
+    def add_transactions(self, sources, destinations, titles, amounts, dates) -> None:
+        sums = self.sums
+        periods = self.periods
+        for destination, amount, ordinal in zip(destinations, amounts, dates):
+            period = periods.get(ordinal)
+            if period is None:
+                period = periods[ordinal] = self.period_of(datetime.date.fromordinal(ordinal))
+            key = (period, destination)
+            sums[key] = sums.get(key, 0) + amount
+
+    def rows(self) -> list:
+        """(last day of period, destination, cents) sorted by period then destination"""
+        ends = {}
+        for ordinal, period in self.periods.items():
+            if period not in ends:
+                ends[period] = self.period_end(datetime.date.fromordinal(ordinal))
+        totals = {}
+        for (period, destination), amount in self.sums.items():
+            key = (period, self.name(destination))
+            totals[key] = totals.get(key, 0) + amount
+        return [(ends[period], destination, totals[(period, destination)]) for period, destination in sorted(totals)]
+
+class MonthlyTransactionSums(TransactionSums):
+
+    def __init__(self) -> None:
+        super().__init__(month_int, last_day_of_month)
+
+class YearlyTotals(TransactionSums):
+
+    def __init__(self) -> None:
+        super().__init__(year_int, last_day_of_year)
+
+class MonthEndBalances(Reducer):
+    """Balance of every account on the last captured date of each month"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.last = {}
+
+    def add_states(self, dates, balances) -> None:
+        width = len(self.accounts)
+        for row, ordinal in enumerate(dates):
+            self.last[month_int(datetime.date.fromordinal(ordinal))] = (ordinal, balances[row * width:(row + 1) * width])
+
+    def rows(self) -> list:
+        """(date, account, balance) by month then account order"""
+        rows = []
+        for month in sorted(self.last):
+            ordinal, balances = self.last[month]
+            date = datetime.date.fromordinal(ordinal)
+            rows.extend((date, account, balance) for account, balance in zip(self.accounts, balances))
+        return rows
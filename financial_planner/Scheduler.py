@@ -0,0 +1,63 @@
+""" Event-driven transaction scheduling """
+
+import datetime
+import heapq
+
+import beautiful_date as BD
+
+from financial_planner.Calendar import as_ordinal
+
+ONE_DAY = datetime.timedelta(days=1)
+
+class TransactionScheduler:
+    """Priority queue of the next date each transaction has to be evaluated
+
+    Entries are ordered by (date, account index, transaction index) so the
+    transactions due on a date come out in the same order a full poll of
+    every account would visit them.
+    """
+
+    def __init__(self, accounts: list, start_date: BD.BeautifulDate) -> None:
+        self.accounts = accounts
+        self.queue = []
+        for account_index, account in enumerate(accounts):
+            for transaction_index, transaction in enumerate(account.transactions):
+                self.schedule(account_index, transaction_index, start_date)
+
+    def schedule(self, account_index: int, transaction_index: int, date: BD.BeautifulDate) -> None:
+        transaction = self.accounts[account_index].transactions[transaction_index]
+        next_date = transaction.next_occurrence(date)
+        if next_date is not None:
+            heapq.heappush(self.queue, (next_date.toordinal(), account_index, transaction_index))
+
+    @property
+    def next_ordinal(self) -> int:
+        if len(self.queue) == 0:
+            return None
+        return self.queue[0][0]
+
+    @property
+    def next_date(self) -> BD.BeautifulDate:
+        if len(self.queue) == 0:
+            return None
+        return BD.BeautifulDate.fromordinal(self.queue[0][0])
+
+    def pop_due(self, date) -> dict:
+        """Transactions due on date (a date or a day ordinal) keyed by account index, rescheduling each one"""
+        ordinal = as_ordinal(date)
+        if len(self.queue) == 0 or self.queue[0][0] > ordinal:
+            return {}
+        date = BD.BeautifulDate.fromordinal(ordinal)
+        while len(self.queue) > 0 and self.queue[0][0] < ordinal:
+            _, account_index, transaction_index = heapq.heappop(self.queue)
+            self.schedule(account_index, transaction_index, date)
+        due = {}
+        fired = []
+        while len(self.queue) > 0 and self.queue[0][0] == ordinal:
+            _, account_index, transaction_index = heapq.heappop(self.queue)
+            due.setdefault(account_index, []).append(self.accounts[account_index].transactions[transaction_index])
+            fired.append((account_index, transaction_index))
+        tomorrow = date + ONE_DAY
+        for account_index, transaction_index in fired:
+            self.schedule(account_index, transaction_index, tomorrow)
+        return due
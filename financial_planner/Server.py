@@ -0,0 +1,216 @@
+""" Local forecast server, answers balance queries from warm worker processes """
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import hashlib
+from http import HTTPStatus
+import io
+import json
+import multiprocessing
+import pickle
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import beautiful_date as BD
+
+from financial_planner.common import parse_date
+
+DEFAULT_PORT = 8750
+# Compiled configs and simulation snapshots each worker keeps
+WORKER_CACHE_SIZE = 16
+
+# Per worker process: (config text, start_date) -> [CompiledConfig, latest snapshot or None]
+warm = OrderedDict()
+
+def run_forecast(yaml_text: str, variables: dict, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate) -> dict:
+    """Balances at the start of end_date, simulated from start_date with the header variables overridden
+
+    Runs in a worker. The bank each config compiles to is kept warm and the
+    latest simulation is snapshotted, a later end_date resumes a copy of it
+    instead of simulating from start_date again.
+    """
+    from financial_planner.ConfigCache import CompiledConfig
+    from financial_planner.Simulation import Simulation
+    from financial_planner.cli import split_placeholders, template_environment
+
+    assert(end_date > start_date), "end_date must be after start_date"
+    if variables or '---' in yaml_text:
+        header, template_content = split_placeholders(yaml_text)
+        header.update(variables)
+        yaml_text = template_environment().from_string(template_content).render(**header)
+    key = (yaml_text, start_date)
+    if key in warm:
+        warm.move_to_end(key)
+    else:
+        warm[key] = [CompiledConfig.compile(yaml_text), None]
+        if len(warm) > WORKER_CACHE_SIZE:
+            warm.popitem(last=False)
+    compiled, snapshot = warm[key]
+    simulation = None
+    if snapshot is not None:
+        next_date, bankrupt_date, data = snapshot
+        if bankrupt_date is not None and end_date > bankrupt_date:
+            # Nothing changes after going bankrupt
+            simulation = pickle.loads(data)
+        elif bankrupt_date is None and end_date >= next_date:
+            simulation = pickle.loads(data)
+            if end_date > next_date:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    simulation.resume(end_date, keep_logs=False)
+    if simulation is None:
+        simulation = Simulation(compiled.bank())
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulation.run(start_date, end_date, keep_logs=False)
+    if snapshot is None or simulation.next_date > snapshot[0]:
+        warm[key][1] = (simulation.next_date, simulation.bankrupt_date, pickle.dumps(simulation, protocol=pickle.HIGHEST_PROTOCOL))
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'bankrupt_date': None if simulation.bankrupt_date is None else simulation.bankrupt_date.isoformat(),
+        'balances': {account.name: str(account.balance) for account in simulation.bank.accounts},
+    }
+
+class ForecastServer:
+    """asyncio HTTP server on localhost answering forecasts of one config
+
+    GET /balance?account=NAME&date=YYYY-MM-DD
+        Balance of an account at the end of date.
+    POST /forecast {"end_date": ..., "start_date": ..., "variables": {...}}
+        Balances of every account at the start of end_date, variables
+        override the config's header (the slider values of a planning app).
+        start_date defaults to the server's.
+    GET /health
+
+    Simulations run on a pool of worker processes so the event loop only
+    parses requests. Results are kept in an LRU of cache_size entries keyed
+    by the config text and the query; identical queries arriving while one
+    is running wait for it instead of simulating twice. The config file is
+    read again when it changes on disk.
+    """
+
+    def __init__(self, config_path: Path, start_date: BD.BeautifulDate, workers: int = None, cache_size: int = 256) -> None:
+        self.config_path = Path(config_path)
+        self.start_date = start_date
+        self.workers = workers
+        self.cache_size = cache_size
+        self.results = OrderedDict()
+        self.executor = None
+        self.config_modified = None
+        self.config_text = None
+        self.simulations = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> asyncio.Server:
+        from financial_planner.Batch import warm_up
+        # Spawned rather than forked, forked workers would hold on to the server's sockets
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=warm_up)
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    async def serve(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> None:
+        server = await self.start(host, port)
+        try:
+            print(f"Serving forecasts of {self.config_path} on http://{host}:{port}")
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def read_config(self) -> str:
+        modified = self.config_path.stat().st_mtime_ns
+        if modified != self.config_modified:
+            self.config_text = self.config_path.read_text()
+            self.config_modified = modified
+        return self.config_text
+
+    async def forecast(self, variables: dict, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate) -> dict:
+        yaml_text = self.read_config()
+        key = (
+            hashlib.sha256(yaml_text.encode()).hexdigest(),
+            json.dumps(variables, sort_keys=True),
+            start_date,
+            end_date,
+        )
+        if key in self.results:
+            self.results.move_to_end(key)
+            return await asyncio.shield(self.results[key])
+        self.simulations += 1
+        result = asyncio.get_running_loop().run_in_executor(self.executor, run_forecast, yaml_text, variables, start_date, end_date)
+        self.results[key] = result
+        if len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+        try:
+            return await asyncio.shield(result)
+        except Exception:
+            # Failures are not cached, the config may be fixed by the next request
+            if self.results.get(key) is result:
+                del self.results[key]
+            raise
+
+    async def respond(self, method: str, target: str, body: bytes) -> tuple:
+        url = urlsplit(target)
+        if (method, url.path) == ('GET', '/health'):
+            return HTTPStatus.OK, {'status': 'ok'}
+        if (method, url.path) == ('GET', '/balance'):
+            query = dict(parse_qsl(url.query))
+            assert('account' in query and 'date' in query), "/balance needs account and date"
+            start_date = parse_date(query['start_date']) if 'start_date' in query else self.start_date
+            end_date = BD.BeautifulDate.fromordinal(parse_date(query['date']).toordinal() + 1)
+            result = await self.forecast({}, start_date, end_date)
+            assert(query['account'] in result['balances']), f"No account named {query['account']}"
+            return HTTPStatus.OK, {
+                'account': query['account'],
+                'date': query['date'],
+                'balance': result['balances'][query['account']],
+                'bankrupt_date': result['bankrupt_date'],
+            }
+        if (method, url.path) == ('POST', '/forecast'):
+            request = json.loads(body or b'{}')
+            assert(isinstance(request, dict) and 'end_date' in request), "/forecast needs a JSON object with an end_date"
+            variables = {name: str(value) for name, value in request.get('variables', {}).items()}
+            start_date = parse_date(request['start_date']) if 'start_date' in request else self.start_date
+            return HTTPStatus.OK, await self.forecast(variables, start_date, parse_date(request['end_date']))
+        return HTTPStatus.NOT_FOUND, {'error': f"No {method} {url.path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """One connection, HTTP/1.1 requests are answered until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                try:
+                    status, payload = await self.respond(method, target, body)
+                except (AssertionError, ValueError, KeyError) as error:
+                    status, payload = HTTPStatus.BAD_REQUEST, {'error': f"{type(error).__name__}: {error}"}
+                except Exception as error:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(error).__name__}: {error}"}
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
@@ -1,17 +1,52 @@
-import beautiful_date as BD
-
+import datetime
+from pathlib import Path
+import pickle
 
+import beautiful_date as BD
 
 from financial_planner.Bank import Bank, Bankrupt
-from financial_planner.DateUnit import DateUnit
+from financial_planner.Calendar import Calendar
+from financial_planner.DateUnit import DateUnit, get_date_increment
+from financial_planner.Money import use_cents, use_decimal
+from financial_planner.Scheduler import TransactionScheduler
+
+ONE_DAY = datetime.timedelta(days=1)
+CHECKPOINT_VERSION = 1
 
 class Simulation:
 
     def __init__(self, bank: Bank) -> None:
         self.bank = bank
+        self.bankrupt_date = None
+        self.stopped_date = None
+        self.relative_date = None
+        self.next_date = None
+
+    def run(self, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, show_progress: bool = False, event_driven: bool = True, observers: list = None, keep_logs: bool = True, step: DateUnit = DateUnit.DAYS, lazy_interest: bool = False, relative_date: BD.BeautifulDate = None, integer_cents: bool = False, stop_when=None):
+        """Simulate from start_date up to end_date one step at a time
+
+        Transactions are applied on the days they fall on, then each account
+        earns one step's worth of interest (InterestRate.get_rate(step)) and
+        state is captured on the last day of the step.
+
+        observers get update(bank, date) after every step and close(bank) at
+        the end. With keep_logs False the bank's logs are released after each
+        update so observers must consume new rows as they arrive.
+
+        lazy_interest compounds interest daily but only when a balance changes
+        or a step ends, a monthly step then gives the same month end balances
+        as a daily run for the cost of a monthly one.
+
+        relative_date is the date transaction growth is measured from, it
+        defaults to start_date and is kept by resume().
+
+        integer_cents runs on int cents instead of Decimal (see Money), the
+        bank is back on Decimal when run returns.
 
-    def run(self, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, show_progress: bool = False):
-        date = start_date
+        stop_when(bank, date) is called after every step, the run ends early
+        (stopped_date is the step's last day) as soon as it returns True.
+        """
+        observers = observers or []
         progress_fail = False
         if show_progress:            
             try:
@@ -23,14 +58,156 @@ class Simulation:
             def nothing(stuff):
                 return stuff
             tqdm = nothing
-        total_days = (end_date - date).days
-        for day_index in tqdm(range(total_days)):
-            date = start_date + (day_index * BD.days)
+        self.bankrupt_date = None
+        self.stopped_date = None
+        self.relative_date = relative_date or start_date
+        relative_ordinal = self.relative_date.toordinal()
+        # Days are int ordinals from here on, dates are only made for observers and results
+        calendar = Calendar(start_date, end_date)
+        steps = self.step_ordinals(start_date, end_date, step, self.relative_date)
+        full_steps = {}
+        if step != DateUnit.DAYS and not lazy_interest:
+            # Whole steps counted from relative_date, the others earn daily interest for the days they cover
+            full_steps = dict(self.step_ordinals(self.relative_date, end_date + get_date_increment(step), step))
+        self.next_date = start_date
+        next_ordinal = start_date.toordinal()
+        if keep_logs:
+            # Opening state plus one capture per step
+            self.bank.state_log.reserve(self.bank.accounts, len(self.bank.state_log) + len(steps) + 1)
+        if lazy_interest:
+            self.bank.start_lazy_interest(start_date)
+        scheduler = None
+        if event_driven:
+            scheduler = TransactionScheduler(self.bank.accounts, start_date)
+        if integer_cents:
+            use_cents(self.bank)
+        completed = False
+        try:
+            for step_start, step_end in tqdm(steps):
+                try:
+                    for ordinal in self.transaction_days(step_start, step_end, scheduler, step):
+                        if scheduler is None:
+                            self.bank.process_date(ordinal, relative_ordinal, calendar=calendar)
+                        else:
+                            self.bank.process_date(ordinal, relative_ordinal, due=scheduler.pop_due(ordinal), calendar=calendar)
+                except Bankrupt:
+                    self.bankrupt_date = calendar.date(ordinal)
+                    print(f"Went bankrupt on {self.bankrupt_date}!")
+                    break
+                last_day = step_end - 1
+                if step == DateUnit.DAYS or lazy_interest or full_steps.get(step_start) == step_end:
+                    self.bank.mature(last_day, step)
+                else:
+                    self.bank.mature(last_day, step, days=step_end - step_start)
+                next_ordinal = step_end
+                if observers:
+                    last_date = calendar.date(last_day)
+                    for observer in observers:
+                        observer.update(self.bank, last_date)
+                if not keep_logs:
+                    self.bank.transaction_log.release()
+                    self.bank.state_log.release()
+                if stop_when is not None and stop_when(self.bank, calendar.date(last_day)):
+                    self.stopped_date = calendar.date(last_day)
+                    break
+            self.next_date = calendar.date(next_ordinal)
+            completed = True
+        finally:
             try:
-                self.bank.process_date(date, start_date)
-            except Bankrupt:
-                print(f"Went bankrupt on {date}!")
-                break
-            self.bank.mature(date)
-            
-            
\ No newline at end of file
+                self.close_observers(observers, raise_errors=completed)
+            finally:
+                if integer_cents:
+                    use_decimal(self.bank)
+
+    def close_observers(self, observers: list, raise_errors: bool = True) -> None:
+        """Close every observer, the first error is raised once all are closed unless the run already failed"""
+        first_error = None
+        for observer in observers:
+            try:
+                observer.close(self.bank)
+            except Exception as error:
+                first_error = first_error or error
+        if first_error is not None and raise_errors:
+            raise first_error
+
+    def resume(self, end_date: BD.BeautifulDate, **kwargs):
+        """Continue the last run (or loaded checkpoint) from where it stopped up to end_date"""
+        assert(self.next_date is not None), "Nothing to resume, run the simulation first"
+        self.run(self.next_date, end_date, relative_date=self.relative_date, **kwargs)
+
+    def save_checkpoint(self, path: Path) -> None:
+        """Write the bank and the date the simulation reached to path"""
+        assert(self.next_date is not None), "Nothing to checkpoint, run the simulation first"
+        with open(path, 'wb') as handle:
+            pickle.dump({
+                'version': CHECKPOINT_VERSION,
+                'bank': self.bank,
+                'relative_date': self.relative_date,
+                'next_date': self.next_date,
+                'bankrupt_date': self.bankrupt_date,
+            }, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load_checkpoint(cls, path: Path) -> "Simulation":
+        """Simulation ready to resume() from a checkpoint written by save_checkpoint
+
+        Checkpoints are pickles, only load ones you wrote yourself.
+        """
+        with open(path, 'rb') as handle:
+            checkpoint = pickle.load(handle)
+        assert(checkpoint.get('version') == CHECKPOINT_VERSION), f"{path} is not a version {CHECKPOINT_VERSION} checkpoint"
+        simulation = cls(checkpoint['bank'])
+        simulation.relative_date = checkpoint['relative_date']
+        simulation.next_date = checkpoint['next_date']
+        simulation.bankrupt_date = checkpoint['bankrupt_date']
+        return simulation
+
+    @staticmethod
+    def step_dates(start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, step: DateUnit, anchor_date: BD.BeautifulDate = None) -> list:
+        """(first day, day after last) of every step, the final step is cut short at end_date
+
+        Steps are counted from anchor_date (default start_date) so a resumed
+        run keeps the step boundaries of the original one.
+        """
+        if anchor_date is not None and anchor_date != start_date and step != DateUnit.DAYS:
+            return [
+                (max(step_start, start_date), step_end)
+                for step_start, step_end in Simulation.step_dates(anchor_date, end_date, step)
+                if step_end > start_date
+            ]
+        if step == DateUnit.DAYS:
+            return [
+                (start_date + datetime.timedelta(days=index), start_date + datetime.timedelta(days=index + 1))
+                for index in range((end_date - start_date).days)
+            ]
+        increment = get_date_increment(step)
+        steps = []
+        step_start = start_date
+        while step_start < end_date:
+            step_end = min(start_date + ((len(steps) + 1) * increment), end_date)
+            steps.append((step_start, step_end))
+            step_start = step_end
+        return steps
+
+    @staticmethod
+    def step_ordinals(start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, step: DateUnit, anchor_date: BD.BeautifulDate = None):
+        """step_dates as day ordinals"""
+        if step == DateUnit.DAYS:
+            first = start_date.toordinal()
+            days = range(first, max(end_date.toordinal(), first))
+            return list(zip(days, range(first + 1, first + 1 + len(days))))
+        return [
+            (step_start.toordinal(), step_end.toordinal())
+            for step_start, step_end in Simulation.step_dates(start_date, end_date, step, anchor_date)
+        ]
+
+    @staticmethod
+    def transaction_days(step_start: int, step_end: int, scheduler: TransactionScheduler, step: DateUnit):
+        """Day ordinals within a step that need Bank.process_date"""
+        if scheduler is None or step == DateUnit.DAYS:
+            yield from range(step_start, step_end)
+            return
+        # The first day always runs so low balances are resolved every step
+        yield step_start
+        while scheduler.next_ordinal is not None and scheduler.next_ordinal < step_end:
+            yield scheduler.next_ordinal
@@ -0,0 +1,97 @@
+""" Parameter sweeps over the placeholder variables header """
+
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+from decimal import Decimal
+import io
+import itertools
+
+import beautiful_date as BD
+
+from financial_planner.DateUnit import DATE_TYPE_STR_MAP, get_date_increment
+from financial_planner.Simulation import Simulation
+from financial_planner.common import parse_date
+
+template = None
+
+def expand_range(range_data: dict) -> list:
+    """Inclusive range, {start, stop, step} numbers or dates when a unit (day, week, biweek, month, year) is given"""
+    if 'unit' in range_data:
+        increment = get_date_increment(DATE_TYPE_STR_MAP[range_data['unit']])
+        start, stop = parse_date(range_data['start']), parse_date(range_data['stop'])
+        step = int(range_data.get('step', 1))
+        values = []
+        index = 0
+        while start + (index * step * increment) <= stop:
+            values.append((start + (index * step * increment)).isoformat())
+            index += 1
+        return values
+    start, stop = Decimal(range_data['start']), Decimal(range_data['stop'])
+    step = Decimal(range_data.get('step', 1))
+    assert(step > 0), "Sweep range step must be positive"
+    values = []
+    value = start
+    while value <= stop:
+        values.append(str(value))
+        value += step
+    return values
+
+def expand_values(value) -> list:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        return expand_range(value)
+    return [value]
+
+def scenario_grid(variables: dict) -> list:
+    """Every combination of the header values, lists and ranges become sweep axes"""
+    names = list(variables)
+    axes = [expand_values(variables[name]) for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*axes)]
+
+def compile_template(template_content: str) -> None:
+    global template
+    from financial_planner.cli import template_environment
+    template = template_environment().from_string(template_content)
+
+def minimum_balances(simulation: Simulation) -> list:
+    balances = simulation.bank.state_log.to_array()
+    if len(balances) == 0:
+        return [account.balance for account in simulation.bank.accounts]
+    return [
+        min(Decimal(f"{minimum:.2f}"), account.balance)
+        for account, minimum in zip(simulation.bank.accounts, balances.min(axis=0))
+    ]
+
+def run_scenario(scenario: int, variables: dict, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, engine: type) -> list:
+    from financial_planner.cli import create_simulation
+    simulation = engine(create_simulation(template.render(**variables)).bank)
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation.run(start_date, end_date)
+    return [{
+        'scenario': scenario,
+        **variables,
+        'account': account.name,
+        'final_balance': account.balance,
+        'minimum_balance': minimum,
+        'bankrupt_date': simulation.bankrupt_date,
+    } for account, minimum in zip(simulation.bank.accounts, minimum_balances(simulation))]
+
+def run_sweep(yaml_text: str, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, grid: dict = None, workers: int = None, engine: type = Simulation):
+    """Simulate every scenario of the variables header, returns a tidy summary DataFrame
+
+    grid overrides header variables with lists of values. The template is
+    compiled once per worker process and only rendered per scenario.
+    """
+    import pandas as pd
+    from financial_planner.cli import split_placeholders
+    variables, template_content = split_placeholders(yaml_text)
+    variables.update(grid or {})
+    scenarios = scenario_grid(variables)
+    with ProcessPoolExecutor(max_workers=workers, initializer=compile_template, initargs=(template_content,)) as executor:
+        futures = [
+            executor.submit(run_scenario, scenario, scenario_variables, start_date, end_date, engine)
+            for scenario, scenario_variables in enumerate(scenarios)
+        ]
+        rows = [row for future in futures for row in future.result()]
+    return pd.DataFrame(rows)
@@ -1,12 +1,14 @@
 from decimal import Decimal
 from dataclasses import dataclass
+import datetime
 
 import beautiful_date as BD
 
-from financial_planner.InterestRate import InterestRate
-from financial_planner.common import CENTS, ZERO, month_int, parse_date
+from financial_planner.Calendar import Calendar
+from financial_planner.InterestRate import make_rate
+from financial_planner.common import CENTS, ZERO, month_int, month_date, parse_date
 
-@dataclass
+@dataclass(slots=True)
 class TransactionLog:
     source: str
     destination: str
@@ -38,9 +40,9 @@ class TransactionPrototype:
         self.name = name
         self.amount = Decimal(amount).quantize(CENTS)
         if interest_rate is None:
-            self.interest_rate = InterestRate(Decimal("0.00"))
+            self.interest_rate = make_rate(Decimal("0.00"))
         else:
-            self.interest_rate = InterestRate(interest_rate)
+            self.interest_rate = make_rate(interest_rate)
         if start_date is None:
             self.start_date = BD.D.today()
         else:
@@ -52,7 +54,9 @@ class TransactionPrototype:
         if end_date is not None:
             if type(end_date) != BD.BeautifulDate:
                 self.end_date = parse_date(end_date)
-        self.every_x_periods = every_x_periods
+        self.every_x_periods = int(every_x_periods)
+        self.start_ordinal = self.start_date.toordinal()
+        self.end_ordinal = datetime.date.max.toordinal() if self.end_date is None else self.end_date.toordinal()
     
     def active(self, date) -> bool:
         not_active = date < self.start_date
@@ -60,51 +64,89 @@ class TransactionPrototype:
             not_active |= date > self.end_date
         return not not_active
 
+    def next_occurrence(self, date: BD.BeautifulDate) -> BD.BeautifulDate:
+        """First date on or after date that get_cost must be evaluated, None if never again"""
+        if self.end_date is not None and date > self.end_date:
+            return None
+        return max(date, self.start_date)
+
     def get_cost(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> Decimal:
-        if not self.active(date):
+        ordinal = date.toordinal()
+        return self.cost_on(ordinal, relative_date.toordinal(), Calendar.for_day(ordinal))
+
+    def cost_on(self, ordinal: int, relative_ordinal: int, calendar: Calendar) -> Decimal:
+        """get_cost for day ordinals, calendar must cover ordinal"""
+        if ordinal < self.start_ordinal or ordinal > self.end_ordinal:
             return ZERO
-        else:
-            return self._get_active_cost(date, relative_date)
+        return self._cost_on(ordinal, relative_ordinal, calendar)
 
     def current_value(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> Decimal:
-        return (self.amount * (1 + self.interest_rate.day * (date - relative_date).days)).quantize(CENTS)
+        return self.value_on(date.toordinal(), relative_date.toordinal())
+
+    def value_on(self, ordinal: int, relative_ordinal: int) -> Decimal:
+        return self.interest_rate.grow_days(self.amount, relative_ordinal, ordinal - relative_ordinal)
 
 class DailyTransaction(TransactionPrototype):
 
-    def _get_active_cost(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> Decimal:        
-        if (date - self.start_date).days % self.every_x_periods == 0:
-            return self.current_value(date, relative_date)
+    def _cost_on(self, ordinal: int, relative_ordinal: int, calendar: Calendar) -> Decimal:
+        if (ordinal - self.start_ordinal) % self.every_x_periods == 0:
+            return self.value_on(ordinal, relative_ordinal)
         else:
             return ZERO
 
+    def next_occurrence(self, date: BD.BeautifulDate) -> BD.BeautifulDate:
+        if date <= self.start_date:
+            candidate = self.start_date
+        else:
+            offset = (date - self.start_date).days
+            candidate = date + datetime.timedelta(days=(-offset) % self.every_x_periods)
+        if self.end_date is not None and candidate > self.end_date:
+            return None
+        return candidate
+
 class WeeklyTransaction(DailyTransaction):
 
     def __init__(self, *args, every_x_periods: int = 1, **kwargs) -> None:
-        super().__init__(*args, every_x_periods=every_x_periods*7, **kwargs)
+        super().__init__(*args, every_x_periods=int(every_x_periods)*7, **kwargs)
 
 class BiWeeklyTransaction(WeeklyTransaction):
 
     def __init__(self, *args, every_x_periods: int = 1, **kwargs) -> None:
-        super().__init__(*args, every_x_periods=every_x_periods*2, **kwargs)
+        super().__init__(*args, every_x_periods=int(every_x_periods)*2, **kwargs)
 
 class MonthlyTransaction(TransactionPrototype):
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         assert(self.start_date.day <= 28), f"Monthly transactions must start on day 1-28, {self.name} starts on {self.start_date.day}"
+        self.start_month = month_int(self.start_date)
 
-    def _get_active_cost(self, date: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> Decimal:
-        if date.day == self.start_date.day:
-            if (month_int(date) - month_int(self.start_date)) % self.every_x_periods == 0:
-                return self.current_value(date, relative_date)
+    def _cost_on(self, ordinal: int, relative_ordinal: int, calendar: Calendar) -> Decimal:
+        if calendar.day_of_month(ordinal) == self.start_date.day:
+            if (calendar.month(ordinal) - self.start_month) % self.every_x_periods == 0:
+                return self.value_on(ordinal, relative_ordinal)
             else:
                 return ZERO
         else:
             return ZERO
 
+    def next_occurrence(self, date: BD.BeautifulDate) -> BD.BeautifulDate:
+        start_month = month_int(self.start_date)
+        if date <= self.start_date:
+            month = start_month
+        else:
+            month = month_int(date)
+            if date.day > self.start_date.day:
+                month += 1
+            month += (start_month - month) % self.every_x_periods
+        candidate = month_date(month, self.start_date.day)
+        if self.end_date is not None and candidate > self.end_date:
+            return None
+        return candidate
+
 class YearlyTransaction(MonthlyTransaction):
 
     def __init__(self, *args, every_x_periods: int = 1, **kwargs) -> None:
-        super().__init__(*args, every_x_periods=every_x_periods*12, **kwargs)
+        super().__init__(*args, every_x_periods=int(every_x_periods)*12, **kwargs)
 
 
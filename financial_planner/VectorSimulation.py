@@ -0,0 +1,192 @@
+""" NumPy whole-horizon simulation engine """
+
+import datetime
+from decimal import Decimal
+
+import beautiful_date as BD
+import numpy as np
+
+from financial_planner.Bank import Bank, Bankrupt
+from financial_planner.InterestRate import InterestRate
+from financial_planner.Mortgage import Mortgage
+from financial_planner.Simulation import Simulation
+from financial_planner.Transaction import (
+    DailyTransaction,
+    WeeklyTransaction,
+    BiWeeklyTransaction,
+    MonthlyTransaction,
+    YearlyTransaction,
+)
+from financial_planner.common import month_int
+
+DAILY_TYPES = (DailyTransaction, WeeklyTransaction, BiWeeklyTransaction)
+MONTHLY_TYPES = (MonthlyTransaction, YearlyTransaction)
+EPOCH_MONTH = 1970 * 12 + 1
+# Balances are floats here, anything above half a cent below zero is $0.00
+NEGATIVE_TOLERANCE = -0.005
+FIRST_WINDOW = 64
+
+def to_day(date: BD.BeautifulDate) -> np.datetime64:
+    return np.datetime64(date.isoformat(), 'D')
+
+class VectorSimulation(Simulation):
+    """Simulation that computes every day of the horizon with array operations
+
+    Transactions are turned into dense per-day cash flow arrays and balances
+    are compounded with cumulative sums. Only days where a protected account
+    goes negative are stepped one at a time to apply low balance transfers.
+    Mortgage payments (and any other transaction type that is not a plain
+    daily/weekly/monthly/yearly schedule) are evaluated only on the dates
+    they fire.
+
+    Balances are floats and daily interest is not rounded to cents, so
+    results drift from Simulation by cents per year of horizon.
+    """
+
+    def __init__(self, bank: Bank) -> None:
+        super().__init__(bank)
+        self.dates = None
+        self.balances = None
+
+    def run(self, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, show_progress: bool = False, relative_date: BD.BeautifulDate = None):
+        self.relative_date = relative_date or start_date
+        total_days = (end_date - start_date).days
+        accounts = self.bank.accounts
+        flows = np.zeros((len(accounts), total_days))
+        for account_index, account in enumerate(accounts):
+            for transaction in account.transactions:
+                self.add_cash_flows(flows[account_index], transaction, start_date, end_date, self.relative_date)
+        growth = np.array([self.daily_growth(account, start_date, total_days) for account in accounts]).reshape(len(accounts), total_days)
+        protected = np.array([not account.negative_balance_allowed for account in accounts])
+        balances = np.empty((total_days, len(accounts)))
+        current = np.array([float(account.balance) for account in accounts])
+        self.bankrupt_date = None
+
+        day = 0
+        window = FIRST_WINDOW
+        while day < total_days:
+            stop = min(total_days, day + window)
+            segment = self.compound(current, flows[:, day:stop], growth[:, day:stop])
+            before_interest = segment / growth[:, day:stop]
+            negative = ((before_interest < NEGATIVE_TOLERANCE) & protected[:, None]).any(axis=0)
+            events = np.flatnonzero(negative)
+            if len(events) == 0:
+                balances[day:stop] = segment.T
+                current = segment[:, -1]
+                day = stop
+                window *= 2
+                continue
+            event = events[0]
+            balances[day:day + event] = segment[:, :event].T
+            if event > 0:
+                current = segment[:, event - 1]
+            date = start_date + datetime.timedelta(days=int(day + event))
+            try:
+                current = self.step_day(current, flows[:, day + event], growth[:, day + event], protected, date)
+            except Bankrupt:
+                print(f"Went bankrupt on {date}!")
+                self.bankrupt_date = date
+                total_days = day + event
+                break
+            balances[day + event] = current
+            day += event + 1
+            window = FIRST_WINDOW
+
+        self.balances = balances[:total_days]
+        self.dates = to_day(start_date) + np.arange(total_days)
+        self.next_date = start_date + datetime.timedelta(days=int(total_days))
+        # Like Bank.mature, the opening state is only captured by the first run
+        opening = [[float(account.balance) for account in accounts]] if self.bank.state_log.total == 0 else []
+        first_ordinal = start_date.toordinal() + 1 - len(opening)
+        self.bank.state_log.reserve(accounts, len(self.bank.state_log) + total_days + len(opening))
+        self.bank.state_log.extend(
+            range(first_ordinal, start_date.toordinal() + total_days + 1),
+            np.vstack(opening + [self.balances]),
+        )
+        for account, balance in zip(accounts, current):
+            account.balance = Decimal(f"{balance:.2f}")
+
+    @staticmethod
+    def daily_growth(account, start_date: BD.BeautifulDate, total_days: int) -> np.ndarray:
+        """Growth factor of every day, 1 + the daily rate in effect"""
+        if isinstance(account, Mortgage):
+            return np.ones(total_days)
+        rate = account.default_interest_rate
+        if type(rate) == InterestRate:
+            return np.full(total_days, 1.0 + float(rate.day))
+        return 1.0 + np.array([float(rate.at(start_date + datetime.timedelta(days=day)).day) for day in range(total_days)])
+
+    @staticmethod
+    def compound(start: np.ndarray, flows: np.ndarray, growth: np.ndarray) -> np.ndarray:
+        """End of day balances when each day adds flows and then earns interest
+
+        b[t] = (b[t-1] + f[t]) * g[t]  =>  b[t] = G[t] * (b0 + sum(f[s] / G[s-1])), G[t] = g[0] * ... * g[t]
+        """
+        cumulative = np.cumprod(growth, axis=1)
+        previous = np.hstack([np.ones((len(start), 1)), cumulative[:, :-1]])
+        discounted = np.cumsum(flows / previous, axis=1)
+        return cumulative * (start[:, None] + discounted)
+
+    def step_day(self, start: np.ndarray, flows: np.ndarray, growth: np.ndarray, protected: np.ndarray, date: BD.BeautifulDate) -> np.ndarray:
+        """Single day with low balance transfers, mirrors Bank.process_date and Bank.mature"""
+        accounts = self.bank.accounts
+        balances = start.copy()
+        for account_index, account in enumerate(accounts):
+            balances[account_index] += flows[account_index]
+            while protected[account_index] and balances[account_index] < NEGATIVE_TOLERANCE:
+                source_index = self.find_next_account(balances, account_index)
+                available = balances[source_index] - float(accounts[source_index].minimum_balance)
+                if available > abs(balances[account_index]):
+                    amount = balances[account_index]
+                else:
+                    amount = -available
+                balances[source_index] += amount
+                balances[account_index] -= amount
+                description = f"{account.name} Low Balance Transfer"
+                self.bank.transaction_log.record(None, accounts[source_index].name, description, Decimal(f"{amount:.2f}"), date)
+                self.bank.transaction_log.record(None, account.name, description, Decimal(f"{-amount:.2f}"), date)
+        return balances * growth
+
+    def find_next_account(self, balances: np.ndarray, exclude: int) -> int:
+        """Same waterfall as FundingWaterfall, scanned since this only runs on the rare days with transfers"""
+        accounts = self.bank.accounts
+        for account_index in sorted(range(len(accounts)), key=lambda index: (accounts[index].withdrawal_priority, index)):
+            account = accounts[account_index]
+            if account_index == exclude or not account.allow_auto_withdrawl:
+                continue
+            if balances[account_index] - float(account.minimum_balance) > -NEGATIVE_TOLERANCE:
+                return account_index
+        raise Bankrupt("No more accounts with money above their minimum balance.")
+
+    @staticmethod
+    def add_cash_flows(flows: np.ndarray, transaction, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, relative_date: BD.BeautifulDate = None) -> None:
+        relative_date = relative_date or start_date
+        first = transaction.next_occurrence(start_date)
+        if first is None or first >= end_date:
+            return
+        last = end_date - datetime.timedelta(days=1)
+        if transaction.end_date is not None and transaction.end_date < last:
+            last = transaction.end_date
+        last_index = (last - start_date).days
+        vectorizable = type(transaction.interest_rate) == InterestRate
+        if type(transaction) in DAILY_TYPES and vectorizable:
+            fire_days = np.arange((first - start_date).days, last_index + 1, transaction.every_x_periods)
+        elif type(transaction) in MONTHLY_TYPES and vectorizable:
+            months = np.arange(month_int(first), month_int(last) + 1, transaction.every_x_periods)
+            fire_dates = (months - EPOCH_MONTH).astype('datetime64[M]').astype('datetime64[D]') + (transaction.start_date.day - 1)
+            fire_days = (fire_dates - to_day(start_date)).astype(np.int64)
+            fire_days = fire_days[fire_days <= last_index]
+        else:
+            VectorSimulation.step_cash_flows(flows, transaction, start_date, first, last, relative_date)
+            return
+        # Same growth as TransactionPrototype.current_value, relative to relative_date
+        elapsed_days = fire_days + (start_date - relative_date).days
+        values = float(transaction.amount) * (1 + float(transaction.interest_rate.day) * elapsed_days)
+        flows[fire_days] += np.round(values, 2)
+
+    @staticmethod
+    def step_cash_flows(flows: np.ndarray, transaction, start_date: BD.BeautifulDate, first: BD.BeautifulDate, last: BD.BeautifulDate, relative_date: BD.BeautifulDate) -> None:
+        date = first
+        while date is not None and date <= last:
+            flows[(date - start_date).days] += float(transaction.get_cost(date, relative_date))
+            date = transaction.next_occurrence(date + datetime.timedelta(days=1))
@@ -0,0 +1,69 @@
+""" Funding sources for low balance transfers """
+
+import heapq
+
+from financial_planner.Account import Account
+
+class FundingWaterfall:
+    """Accounts low balances are topped up from, in withdrawal_priority order
+
+    Accounts are drawn from lowest withdrawal_priority first (ties keep the
+    account order) and only down to their minimum_balance. A heap holds
+    every account that may have money above its floor. Accounts that ran dry
+    are dropped when they reach the top, so the owner only has to touch() an
+    account after raising its balance.
+    """
+
+    def __init__(self, accounts: list) -> None:
+        self.accounts = accounts
+        # Indexed on first use, and again whenever accounts are added
+        self.keys = []
+
+    def rebuild(self) -> None:
+        """Re-index every account, needed after balances change behind the waterfall's back"""
+        self.positions = {account.name: position for position, account in enumerate(self.accounts)}
+        self.keys = [(account.withdrawal_priority, position) for position, account in enumerate(self.accounts)]
+        self.queued = [False] * len(self.accounts)
+        self.heap = []
+        for position in range(len(self.accounts)):
+            self.touch_position(position)
+
+    @staticmethod
+    def available(account: Account):
+        """Money account can give up, <= 0 when it cannot fund anything"""
+        return account.balance - account.minimum_balance
+
+    def funded(self, account: Account) -> bool:
+        return account.allow_auto_withdrawl and self.available(account) > 0
+
+    def touch(self, account: Account) -> None:
+        """Index account again if its balance went up"""
+        if len(self.keys) != len(self.accounts):
+            self.rebuild()
+        self.touch_position(self.positions[account.name])
+
+    def touch_position(self, position: int) -> None:
+        if not self.queued[position] and self.funded(self.accounts[position]):
+            heapq.heappush(self.heap, self.keys[position])
+            self.queued[position] = True
+
+    def find(self, exclude: Account = None) -> Account:
+        """Highest priority account with money above its floor, None when there is none"""
+        if len(self.keys) != len(self.accounts):
+            self.rebuild()
+        skipped = None
+        found = None
+        while len(self.heap) > 0:
+            position = self.heap[0][1]
+            account = self.accounts[position]
+            if not self.funded(account):
+                heapq.heappop(self.heap)
+                self.queued[position] = False
+            elif account is exclude:
+                skipped = heapq.heappop(self.heap)
+            else:
+                found = account
+                break
+        if skipped is not None:
+            heapq.heappush(self.heap, skipped)
+        return found
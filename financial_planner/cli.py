@@ -3,52 +3,195 @@
 import argparse
 from pathlib import Path
 import shutil
+import sys
 
 import yaml
-import pandas as pd
 import beautiful_date as BD
-import jinja2
 
 from financial_planner import BankYaml, AccountYaml, DATE_TYPE_STR_MAP, Simulation, parse_date
+from financial_planner.Output import StreamingWriter, write_amortization
 
-environment = jinja2.Environment()
+# The C loader parses several times faster, when PyYAML was built with libyaml
+YAML_LOADER = getattr(yaml, 'CBaseLoader', yaml.BaseLoader)
+
+# Built on first use, jinja2 is only needed by configs with a variables header
+environment = None
+
+def template_environment():
+    global environment
+    if environment is None:
+        import jinja2
+        environment = jinja2.Environment()
+    return environment
 
 def main():
-    yaml_path, start_date, end_date = parse_cli()
+    if sys.argv[1:2] == ['serve']:
+        serve(parse_serve_cli(sys.argv[2:]))
+        return
+    arguments = parse_cli()
+    yaml_path, start_date, end_date = arguments.financial_config_path, arguments.start_date, arguments.end_date
+    if arguments.batch:
+        run_batch_cli(arguments)
+        return
     results_dir = Path(f"{yaml_path.stem}_results")
     if results_dir.exists():
         shutil.rmtree(results_dir)
     results_dir.mkdir()
+    if arguments.sweep:
+        write_sweep(yaml_path.read_text(), start_date, end_date, results_dir)
+        return
+    if arguments.goal_seek:
+        write_goal_seek(yaml_path.read_text(), start_date, end_date, arguments.step, results_dir)
+        return
     filled_yaml_text = fill_placeholders(yaml_path.read_text())
-    simulation = create_simulation(filled_yaml_text)
-    simulation.run(start_date, end_date, show_progress=True)
-    print(simulation.bank.state_log[-1])
-    transactions = pd.DataFrame([log.to_dict() for log in simulation.bank.transaction_log])
-    transactions['date'] = pd.to_datetime(transactions['date'])
-    transactions.to_csv(results_dir / 'transactions.csv')
-    transactions.set_index('date')\
-                .drop('title', axis='columns')\
-                .groupby([pd.Grouper(freq="M"), 'destination'])\
-                .sum()\
-                .reset_index(drop=False)\
-                .to_csv(results_dir / 'monthly_transactions.csv')
-    state = pd.DataFrame(simulation.bank.state_log)
-    state['date'] = pd.to_datetime(state['date'])
-    state.set_index('date')\
-         .groupby([pd.Grouper(freq="M"), 'account'])\
-         .tail(1)\
-         .reset_index(drop=False)\
-         .to_csv(results_dir / 'monthly_account_state.csv')
+    if arguments.monte_carlo is not None:
+        write_monte_carlo(filled_yaml_text, start_date, end_date, arguments.monte_carlo, results_dir)
+        return
+    run_options = dict(
+        show_progress=True,
+        observers=[StreamingWriter(results_dir, transactions=not arguments.rollups_only)],
+        keep_logs=False,
+        step=DATE_TYPE_STR_MAP[arguments.step],
+        lazy_interest=arguments.lazy_interest,
+        integer_cents=arguments.integer_cents,
+    )
+    cache = None
+    if arguments.cache is not None:
+        from financial_planner.Incremental import SimulationCache
+        cache = SimulationCache.open(arguments.cache, start_date, run_options['step'], arguments.lazy_interest)
+        run_options['observers'].append(cache)
+    if arguments.resume is not None:
+        simulation = Simulation.load_checkpoint(arguments.resume)
+        write_amortization(results_dir, simulation.bank, simulation.next_date)
+    else:
+        simulation = create_simulation(filled_yaml_text, cache=cache, compiled=not arguments.no_compiled_cache, end_date=end_date)
+        write_amortization(results_dir, simulation.bank, start_date)
+    if arguments.profile:
+        from financial_planner.Profiler import SimulationProfiler
+        run_options['observers'].append(SimulationProfiler(simulation.bank, results_dir))
+    if simulation.next_date is None:
+        simulation.run(start_date, end_date, **run_options)
+    else:
+        simulation.resume(end_date, **run_options)
+    if arguments.save_checkpoint is not None:
+        simulation.save_checkpoint(arguments.save_checkpoint)
+    if cache is not None:
+        cache.save()
+    print({account.name: account.balance for account in simulation.bank.accounts})
+
+def run_batch_cli(arguments):
+    from financial_planner.Batch import find_configs, load_manifest, run_batch, SUMMARY_NAME
+    assert(not (arguments.sweep or arguments.goal_seek or arguments.monte_carlo or arguments.save_checkpoint or arguments.resume or arguments.cache)), "--batch only supports the plain run options"
+    results_root = Path.cwd()
+    if arguments.financial_config_path.is_dir():
+        entries = find_configs(arguments.financial_config_path, arguments.start_date, arguments.end_date, results_root)
+    else:
+        entries = load_manifest(arguments.financial_config_path, arguments.start_date, arguments.end_date, results_root)
+    summaries = run_batch(
+        entries,
+        workers=arguments.workers,
+        summary_path=results_root / SUMMARY_NAME,
+        step=arguments.step,
+        lazy_interest=arguments.lazy_interest,
+        integer_cents=arguments.integer_cents,
+        rollups_only=arguments.rollups_only,
+        profile=arguments.profile,
+        compiled=not arguments.no_compiled_cache,
+    )
+    failed = [summary for summary in summaries if summary['error']]
+    for summary in failed:
+        print(f"ERROR: {summary['config']}: {summary['error']}")
+    print(f"Simulated {len(summaries) - len(failed)} of {len(summaries)} configs, see {SUMMARY_NAME}")
+
+def serve(arguments):
+    import asyncio
+    from financial_planner.Server import ForecastServer
+    server = ForecastServer(arguments.financial_config_path, arguments.start_date, workers=arguments.workers, cache_size=arguments.cache_size)
+    try:
+        asyncio.run(server.serve(arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        pass
+
+def write_monte_carlo(yaml_text: str, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, paths: int, results_dir: Path):
+    from financial_planner.MonteCarlo import run_monte_carlo, parse_distributions
+    monte_carlo_config = yaml.load(yaml_text, Loader=YAML_LOADER).get('monte_carlo', {})
+    result = run_monte_carlo(
+        yaml_text,
+        start_date,
+        end_date,
+        paths=paths,
+        account_rates=parse_distributions(monte_carlo_config.get('accounts', {})),
+        transaction_rates=parse_distributions(monte_carlo_config.get('transactions', {})),
+        seed=int(monte_carlo_config.get('seed', 0)),
+    )
+    result.to_frame().to_csv(results_dir / 'monte_carlo_bands.csv')
+    result.bankruptcy_frame().to_csv(results_dir / 'bankruptcy_probability.csv')
+
+def write_sweep(yaml_text: str, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, results_dir: Path):
+    from financial_planner.Sweep import run_sweep
+    run_sweep(yaml_text, start_date, end_date).to_csv(results_dir / 'sweep_summary.csv', index=False)
+
+def write_goal_seek(yaml_text: str, start_date: BD.BeautifulDate, end_date: BD.BeautifulDate, step: str, results_dir: Path):
+    from financial_planner.GoalSeek import goal_seek, parse_constraint
+    goal_seek_config = yaml.load(fill_placeholders(yaml_text), Loader=YAML_LOADER).get('goal_seek')
+    assert(goal_seek_config), "--goal-seek needs a goal_seek section in the config"
+    result = goal_seek(
+        yaml_text,
+        goal_seek_config['variable'],
+        goal_seek_config['low'],
+        goal_seek_config['high'],
+        start_date,
+        end_date,
+        parse_constraint(goal_seek_config.get('constraint', 'no_bankruptcy')),
+        goal=goal_seek_config.get('goal', 'min'),
+        method=goal_seek_config.get('method', 'bisection'),
+        tolerance=goal_seek_config.get('tolerance'),
+        step=DATE_TYPE_STR_MAP[step],
+    )
+    result.to_frame().to_csv(results_dir / 'goal_seek_trials.csv', index=False)
+    if result.value is None:
+        print(f"ERROR: No {result.variable} between {goal_seek_config['low']} and {goal_seek_config['high']} meets the goal")
+    else:
+        print(f"{result.variable}: {result.value} ({len(result.trials)} trials)")
+
+def split_placeholders(yaml_text: str) -> tuple:
+    """Variables header and template body, header is empty without ---"""
+    if '---' not in yaml_text:
+        return {}, yaml_text
+    render_content, template_content = yaml_text.split('---')
+    return yaml.load(render_content, Loader=YAML_LOADER), template_content
 
 def fill_placeholders(yaml_text: str) -> str:
     if '---' not in yaml_text:
         return yaml_text
-    render_content, template_content = yaml_text.split('---')
-    template = environment.from_string(template_content)
-    return template.render(**yaml.load(render_content, Loader=yaml.BaseLoader))
+    variables, template_content = split_placeholders(yaml_text)
+    template = template_environment().from_string(template_content)
+    return template.render(**variables)
 
-def create_simulation(yaml_text: str) -> Simulation:
-    config_data = yaml.load(yaml_text, Loader=yaml.BaseLoader)
+def create_simulation(yaml_text: str, cache=None, compiled: bool = False, end_date: BD.BeautifulDate = None) -> Simulation:
+    """Simulation of a filled in config
+
+    With a SimulationCache the simulation is fast forwarded to the latest
+    snapshot up to end_date the config changes since the cached run cannot
+    affect, check next_date and resume() it instead of running from the
+    start. compiled
+    reuses the bank an identical config built before (see ConfigCache).
+    """
+    if compiled:
+        from financial_planner.ConfigCache import CompiledConfig
+        compiled_config = CompiledConfig.cached(yaml_text)
+        config_data, bank = compiled_config.config, compiled_config.bank()
+    else:
+        config_data = yaml.load(yaml_text, Loader=YAML_LOADER)
+        bank = build_bank(config_data)
+    simulation = Simulation(bank)
+    if cache is not None:
+        assert(end_date is not None), "A simulation cache needs the end_date of the run"
+        cache.restore(simulation, config_data, end_date)
+    return simulation
+
+def build_bank(config_data: dict) -> BankYaml:
+    """Bank of a parsed config, config_data is left as it was"""
     transfer_data = {}
     account_list = []
     error = "At least 1 account must be present in YAML config"
@@ -59,12 +202,11 @@ def create_simulation(yaml_text: str) -> Simulation:
     for entry in config_data['accounts']:
         if 'transfers' in entry:
             transfer_data[entry['name']] = entry['transfers']
-            del(entry['transfers'])
-        account_list.append(AccountYaml(entry))
+        account_list.append(AccountYaml({key: value for key, value in entry.items() if key != 'transfers'}))
     bank = BankYaml(account_list)
     bank.allocate_transfers(transfer_data)
     bank.allocate_mortgages(config_data.get('mortgages', []))
-    return Simulation(bank)
+    return bank
 
 def parse_cli():
     parser = argparse.ArgumentParser(
@@ -72,13 +214,46 @@ def parse_cli():
         description = 'Assists in performing discrete time financial planning',
         epilog = 'Good Luck!'
     )
-    parser.add_argument("financial_config_path", help="Path to financial configuration file", type=Path)
+    parser.add_argument("financial_config_path", help="Path to financial configuration file (with --batch: a manifest or a directory of configs)", type=Path)
     parser.add_argument("start_date", help="Date to start simulation (YYYY-MM-DD)")
     parser.add_argument("end_date", help="Date to end simulation (YYYY-MM-DD)")
+    parser.add_argument("--step", help="Time step of the simulation (default: day)", choices=list(DATE_TYPE_STR_MAP), default='day')
+    parser.add_argument("--lazy-interest", help="Compound interest daily but only when balances change or a step ends", action="store_true")
+    parser.add_argument("--integer-cents", help="Compute in integer cents instead of Decimal, same results", action="store_true")
+    parser.add_argument("--rollups-only", help="Only write the monthly and yearly rollups, not transactions.csv", action="store_true")
+    parser.add_argument("--profile", help="Time the simulation's hot paths and write profile.json", action="store_true")
+    parser.add_argument("--no-compiled-cache", help="Build the bank from the YAML instead of reusing the compiled copy of an unchanged config", action="store_true")
+    parser.add_argument("--batch", help="Simulate every config of a manifest or directory on a pool of worker processes", action="store_true")
+    parser.add_argument("--workers", help="Worker processes for --batch (default: one per CPU)", type=int)
+    parser.add_argument("--sweep", help="Simulate every combination of list/range values in the variables header", action="store_true")
+    parser.add_argument("--goal-seek", help="Search the variable of the config's goal_seek section for the value that just meets its constraint", action="store_true")
+    parser.add_argument("--monte-carlo", help="Run this many paths with rates drawn from the config's monte_carlo section", type=int, metavar="PATHS")
+    parser.add_argument("--save-checkpoint", help="Save the bank at end_date so a later run can --resume from it", type=Path, metavar="PATH")
+    parser.add_argument("--resume", help="Continue from a saved checkpoint up to end_date, start_date is ignored", type=Path, metavar="PATH")
+    parser.add_argument("--cache", help="Reuse the unchanged start of the last run cached at PATH and update the cache", type=Path, metavar="PATH")
     arguments = parser.parse_args()
     provided_config_path = arguments.financial_config_path
     assert(provided_config_path.exists()), f"{provided_config_path} does not exist!  Exiting"
-    return provided_config_path, parse_date(arguments.start_date), parse_date(arguments.end_date)
+    arguments.start_date = parse_date(arguments.start_date)
+    arguments.end_date = parse_date(arguments.end_date)
+    return arguments
+
+def parse_serve_cli(argv: list):
+    from financial_planner.Server import DEFAULT_PORT
+    parser = argparse.ArgumentParser(
+        prog = 'financial-planner serve',
+        description = 'Serves forecasts of a financial configuration over HTTP on localhost',
+    )
+    parser.add_argument("financial_config_path", help="Path to financial configuration file, reloaded when it changes", type=Path)
+    parser.add_argument("start_date", help="Date forecasts start from unless a request sets its own (YYYY-MM-DD)")
+    parser.add_argument("--host", help="Address to listen on (default: 127.0.0.1)", default='127.0.0.1')
+    parser.add_argument("--port", help=f"Port to listen on (default: {DEFAULT_PORT})", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", help="Worker processes running simulations (default: one per CPU)", type=int)
+    parser.add_argument("--cache-size", help="Forecast results kept in memory (default: 256)", type=int, default=256)
+    arguments = parser.parse_args(argv)
+    assert(arguments.financial_config_path.exists()), f"{arguments.financial_config_path} does not exist!  Exiting"
+    arguments.start_date = parse_date(arguments.start_date)
+    return arguments
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,6 +6,10 @@ ZERO = Decimal("0.00")
 CENTS = Decimal('.01')
 NEGATIVE_ONE = Decimal("-1")
 
+def format_cents(cents: int) -> str:
+    sign = '-' if cents < 0 else ''
+    return f"{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}"
+
 def month_round(date: BD.BeautifulDate) -> BD.BeautifulDate:
     return BD.BeautifulDate(date.year, date.month, 1)
 
@@ -15,6 +19,10 @@ def year_round(date: BD.BeautifulDate) -> BD.BeautifulDate:
 def month_int(date: BD.BeautifulDate) -> int:
     return date.year * 12 + date.month
 
+def month_date(month: int, day: int) -> BD.BeautifulDate:
+    """Inverse of month_int for a given day of the month"""
+    return BD.BeautifulDate((month - 1) // 12, (month - 1) % 12 + 1, day)
+
 def parse_date(date_str: str) -> BD.BeautifulDate:
     date_parts = [int(value) for value in date_str.split('-')]
     return BD.BeautifulDate(*date_parts)
\ No newline at end of file
@@ -28,18 +28,11 @@ def parse_transaction_dict(transaction_data, income_vs_expense_processing: bool
     return converted_transaction_list
 
 def tranlate_transaction(transaction_data: dict, income_or_expense: str = 'income', label: str = None) -> TransactionPrototype:
+    transaction_data = dict(transaction_data)
     if label is None:
-        label = transaction_data['frequency_label'].lower()
-        del(transaction_data['frequency_label'])
-    source = None
-    if 'source' in transaction_data:
-        source = transaction_data['source']
-        del(transaction_data['source'])
-    try:
-        income_or_expense = transaction_data['income_or_expense'].lower()
-        del(transaction_data['income_or_expense'])
-    except KeyError:
-        pass
+        label = transaction_data.pop('frequency_label').lower()
+    source = transaction_data.pop('source', None)
+    income_or_expense = transaction_data.pop('income_or_expense', income_or_expense).lower()
     transaction = TRANSACTION_MAP[label](**transaction_data)
     if income_or_expense.lower() == 'expense':
         transaction.amount *= Decimal("-1")
@@ -7,6 +7,7 @@ setup(
     author='Author Name',
     author_email='author@gmail.com',
     description='Description of my package',
-    packages=find_packages(),    
-    install_requires=['pyyaml', 'beautiful-date', 'pandas'],
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*', 'tests', 'tests.*']),    
+    install_requires=['pyyaml', 'beautiful-date', 'pandas', 'numpy', 'jinja2'],
+    entry_points={'console_scripts': ['financial-planner=financial_planner.cli:main']},
 )
\ No newline at end of file
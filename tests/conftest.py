@@ -0,0 +1,54 @@
+import pytest
+
+HOUSEHOLD_YAML = """
+accounts:
+  - name: Checking
+    interest_rate: 0.01
+    balance: 3000.00
+    transactions:
+      income:
+        biweekly:
+          - name: Pay
+            amount: 2100.00
+            start_date: 2023-01-06
+      expense:
+        monthly:
+          - name: Rent
+            amount: 1500.00
+            start_date: 2023-01-03
+            interest_rate: 0.03
+          - name: Insurance
+            amount: 300.00
+            start_date: 2023-02-15
+            every_x_periods: 3
+        weekly:
+          - name: Groceries
+            amount: 180.00
+            start_date: 2023-01-02
+            end_date: 2024-06-30
+        yearly:
+          - name: Vacation
+            amount: 4000.00
+            start_date: 2023-07-10
+  - name: Savings
+    interest_rate: 0.04
+    balance: 10000.00
+    transfers:
+      monthly:
+        - name: Save
+          amount: 200.00
+          source: Checking
+          start_date: 2023-01-20
+mortgages:
+  - name: House
+    paid_from: Checking
+    loan_amount: 100000
+    remaining_balance: 20000
+    terms: 180
+    interest_rate: 0.05
+    start_date: 2023-01-01
+"""
+
+@pytest.fixture
+def household_yaml():
+    return HOUSEHOLD_YAML
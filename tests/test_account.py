@@ -2,6 +2,9 @@
 
 from decimal import Decimal
 
+from beautiful_date import Jan
+import pytest
+
 from financial_planner import Account, AccountYaml
 from financial_planner import DateUnit
 
@@ -30,4 +33,21 @@ def test_account_yaml():
         }
     })
     assert(len(account.transactions) == 1)
-    assert(account.transactions[0].name == 'b')
\ No newline at end of file
+    assert(account.transactions[0].name == 'b')
+
+def test_accrue_interest():
+    for balance in ["0.00", "100.00", "26000.00", "-500.00"]:
+        lazy = Account('a', interest_rate="0.04", balance=balance)
+        daily = Account('b', interest_rate="0.04", balance=balance)
+        total = lazy.accrue_interest(1000)
+        for _ in range(1000):
+            daily.balance += daily.calculate_interest(DateUnit.DAYS)
+        assert(lazy.balance == daily.balance)
+        assert(total == daily.balance - Decimal(balance))
+
+def test_rate_schedule_needs_date():
+    account = Account('a', interest_rate={'2023': '0.04', '2024': '0.05'}, balance="100.00")
+    for accrue in [lambda: account.accrue_interest(10), lambda: account.calculate_interest(DateUnit.DAYS)]:
+        with pytest.raises(AssertionError, match="A rate schedule needs the date to pick its rate"):
+            accrue()
+    assert(account.accrue_interest(10, (1/Jan/2024).toordinal()) > 0)
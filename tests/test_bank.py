@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 import beautiful_date as BD
+import pytest
 
 from financial_planner import Bank, BankYaml
 from financial_planner.cli import create_simulation
@@ -32,4 +33,35 @@ def test_yaml():
 """)
     assert(sim.bank.accounts[0].balance == Decimal("50000.00"))
     sim.bank.mature(BD.D.today() + (1 * BD.days))
-    assert(sim.bank.accounts[0].balance > Decimal("50000.00"))
\ No newline at end of file
+    assert(sim.bank.accounts[0].balance > Decimal("50000.00"))
+
+def test_funding_waterfall():
+    sim = create_simulation("""accounts:
+- name: Checking
+  balance: 0
+  transactions:
+    expense:
+      monthly:
+        - name: Rent
+          amount: 1000
+          start_date: 2023-01-03
+- name: Brokerage
+  balance: 5000
+  withdrawal_priority: 2
+- name: Savings
+  balance: 1500
+  withdrawal_priority: 1
+  minimum_balance: 1000
+""")
+    sim.run(BD.BeautifulDate(2023, 1, 1), BD.BeautifulDate(2023, 2, 1))
+    balances = {account.name: account.balance for account in sim.bank.accounts}
+    assert(balances == {'Checking': Decimal("0.00"), 'Brokerage': Decimal("4500.00"), 'Savings': Decimal("1000.00")})
+
+def test_account_names_unique(household_yaml):
+    with pytest.raises(AssertionError, match="Two accounts are named Checking"):
+        create_simulation(household_yaml.replace("name: Savings", "name: Checking"))
+    with pytest.raises(AssertionError, match="Two accounts are named Savings"):
+        create_simulation(household_yaml.replace("name: House", "name: Savings"))
+    bank = create_simulation(household_yaml).bank
+    assert(list(bank.account_map) == ['Checking', 'Savings', 'House'])
+    assert(all(bank.account_map[account.name] is account for account in bank.accounts))
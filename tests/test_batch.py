@@ -0,0 +1,73 @@
+import csv
+
+import pytest
+
+from beautiful_date import Jan
+
+from financial_planner.Batch import find_configs, load_manifest, run_batch, run_entry
+
+def test_batch(household_yaml, tmp_path):
+    configs = tmp_path / 'configs'
+    configs.mkdir()
+    (configs / 'alice.yml').write_text(household_yaml)
+    (configs / 'bob.yaml').write_text(household_yaml.replace("amount: 2100.00", "amount: 1200.00"))
+    (configs / 'broken.yml').write_text("accounts:\n")
+    (configs / 'notes.txt').write_text("not a config")
+
+    entries = find_configs(configs, 1/Jan/2023, 1/Jan/2025, tmp_path / 'results')
+    assert([entry['config'].name for entry in entries] == ['alice.yml', 'bob.yaml', 'broken.yml'])
+    summaries = run_batch(entries, workers=2, summary_path=tmp_path / 'summary.csv')
+    alice, bob, broken = summaries
+    assert(alice['error'] == '' and alice['bankrupt_date'] == '')
+    assert(bob['bankrupt_date'] == '2024-01-03')
+    assert(broken['error'].startswith('AssertionError'))
+    assert((tmp_path / 'results' / 'alice_results' / 'monthly_account_state.csv').exists())
+    assert((tmp_path / 'results' / 'bob_results' / 'transactions.csv').exists())
+    assert(list(csv.DictReader(open(tmp_path / 'summary.csv'))) == summaries)
+
+def test_results_dir_cleared(household_yaml, tmp_path):
+    config = tmp_path / 'alice.yml'
+    config.write_text(household_yaml)
+    for owned in [True, False]:
+        entry = {'config': config, 'start_date': 1/Jan/2023, 'end_date': 1/Jan/2024, 'results_dir': tmp_path / 'results', 'owns_results_dir': owned}
+        assert(run_entry(entry, step='month', profile=True)['error'] == '')
+        assert((tmp_path / 'results' / 'transactions.csv').exists())
+        (tmp_path / 'results' / 'notes.txt').write_text("kept unless the batch owns the dir")
+        # Outputs the second run does not write are gone rather than left over from the first
+        assert(run_entry(entry, step='month', rollups_only=True)['error'] == '')
+        assert(not (tmp_path / 'results' / 'transactions.csv').exists())
+        assert(not (tmp_path / 'results' / 'profile.json').exists())
+        assert((tmp_path / 'results' / 'monthly_account_state.csv').exists())
+        assert((tmp_path / 'results' / 'notes.txt').exists() != owned)
+
+def test_results_dir_holding_configs(household_yaml, tmp_path):
+    (tmp_path / 'alice.yml').write_text(household_yaml)
+    manifest = tmp_path / 'manifest.yml'
+    manifest.write_text("runs:\n  - config: alice.yml\n    results_dir: .\n")
+    with pytest.raises(AssertionError, match="contains the manifest"):
+        load_manifest(manifest, 1/Jan/2023, 1/Jan/2024, tmp_path)
+    (tmp_path / 'nested').mkdir()
+    (tmp_path / 'nested' / 'bob.yml').write_text(household_yaml)
+    manifest.write_text("runs:\n  - config: nested/bob.yml\n    results_dir: nested\n")
+    with pytest.raises(AssertionError, match="contains the config"):
+        run_batch(load_manifest(manifest, 1/Jan/2023, 1/Jan/2024, tmp_path), workers=1)
+    assert((tmp_path / 'alice.yml').exists() and (tmp_path / 'nested' / 'bob.yml').exists())
+
+def test_manifest(household_yaml, tmp_path):
+    (tmp_path / 'alice.yml').write_text(household_yaml)
+    manifest = tmp_path / 'manifest.yml'
+    manifest.write_text("""
+runs:
+  - config: alice.yml
+  - config: alice.yml
+    start_date: 2024-01-01
+    end_date: 2024-03-01
+    results_dir: short
+""")
+    entries = load_manifest(manifest, 1/Jan/2023, 1/Jan/2024, tmp_path / 'results')
+    assert(entries[0]['results_dir'] == tmp_path / 'results' / 'alice_results')
+    assert(entries[1]['results_dir'] == tmp_path / 'short')
+    run_batch(entries, workers=1, rollups_only=True)
+    assert(not (tmp_path / 'short' / 'transactions.csv').exists())
+    rows = list(csv.reader(open(tmp_path / 'short' / 'monthly_account_state.csv')))
+    assert(rows[-1][1] == '2024-02-29')
@@ -0,0 +1,33 @@
+from benchmarks.config import synthetic_config
+from benchmarks.suite import compare, load, run_benchmark, save
+import financial_planner.ExternalTransactions as ExternalTransactions
+from financial_planner.cli import create_simulation
+
+def test_synthetic_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(ExternalTransactions, 'CACHE_DIR', tmp_path / 'cache')
+    yaml_text = synthetic_config(accounts=3, transactions=2, transfers=4, mortgages=2, external_rows=10, years=2, directory=tmp_path)
+    assert(synthetic_config(accounts=3, transactions=2, transfers=4, mortgages=2, external_rows=10, years=2, directory=tmp_path) == yaml_text)
+    bank = create_simulation(yaml_text).bank
+    assert(len(bank.accounts) == 3 + 2)
+    assert(len(bank.mortgages) == 2)
+    # 8 transactions, 10 external rows and 2 transfers into each of the 2 other accounts
+    assert(len(bank.accounts[1].transactions) == 8 + 10 + 2)
+
+def test_run_benchmark(tmp_path):
+    results = run_benchmark({'accounts': 2, 'transactions': 2, 'years': 1}, repeats=2)
+    assert(results['counts']['days'] == 365)
+    assert(results['counts']['bankrupt_date'] is None)
+    assert(len(results['timings']['run']['runs']) == 2)
+    save(results, tmp_path / 'results.json')
+    assert(load(tmp_path / 'results.json') == results)
+    assert('WARNING' not in compare(results, results))
+
+def test_vector_benchmark():
+    results = run_benchmark({'accounts': 2, 'transactions': 2, 'years': 1}, repeats=1, engine='vector')
+    # No transaction log to count or write
+    assert(results['timings']['output'] is None)
+    assert(results['counts']['log_rows'] is None)
+    assert(results['throughput']['log_rows_per_second'] is None)
+    table = compare(run_benchmark({'accounts': 2, 'transactions': 2, 'years': 1}, repeats=1), results)
+    assert('n/a' in table.splitlines()[3])
+    assert('vector engine keeps no transaction log' in table)
@@ -0,0 +1,42 @@
+from beautiful_date import Jan, Feb, Mar, Dec
+
+from financial_planner.Calendar import Calendar, as_ordinal
+from financial_planner.Transaction import MonthlyTransaction
+from financial_planner.cli import create_simulation
+
+def test_calendar():
+    calendar = Calendar(30/Dec/2023, 2/Mar/2024)
+    assert(len(calendar) == 63)
+    first = (30/Dec/2023).toordinal()
+    assert(first in calendar)
+    assert((2/Mar/2024).toordinal() not in calendar)
+    assert(calendar.day_of_month(first) == 30)
+    assert(calendar.year(first) == 2023)
+    leap_day = (29/Feb/2024).toordinal()
+    assert(calendar.day_of_month(leap_day) == 29)
+    assert(calendar.month(leap_day) == 2024 * 12 + 2)
+    assert(calendar.month(leap_day + 1) == 2024 * 12 + 3)
+    assert(calendar.date(leap_day) == 29/Feb/2024)
+    assert(as_ordinal(leap_day) == leap_day)
+    assert(as_ordinal(29/Feb/2024) == leap_day)
+
+def test_cost_on_matches_get_cost():
+    transaction = MonthlyTransaction('rent', -100, start_date=15/Jan/2024, every_x_periods=2, end_date=15/Dec/2024)
+    calendar = Calendar(1/Jan/2024, 1/Jan/2025)
+    relative = (1/Jan/2024).toordinal()
+    for ordinal in range(calendar.first, calendar.last):
+        date = calendar.date(ordinal)
+        assert(transaction.cost_on(ordinal, relative, calendar) == transaction.get_cost(date, 1/Jan/2024))
+
+def test_bank_accepts_dates_and_ordinals(household_yaml):
+    logs = []
+    for as_ordinals in [False, True]:
+        sim = create_simulation(household_yaml)
+        date = 1/Jan/2023
+        for _ in range(60):
+            day = date.toordinal() if as_ordinals else date
+            sim.bank.process_date(day, (1/Jan/2023).toordinal() if as_ordinals else 1/Jan/2023)
+            sim.bank.mature(day)
+            date = Calendar.date(date.toordinal() + 1)
+        logs.append([log.to_dict() for log in sim.bank.transaction_log])
+    assert(logs[0] == logs[1])
@@ -12,4 +12,24 @@ accounts:
           amount: 5000.00
 """)
     assert(len(sim.bank.accounts[0].transactions) == 1)
-    assert(len(sim.bank.accounts[0].transactions[0].name) == "Pay Day")
\ No newline at end of file
+    assert(len(sim.bank.accounts[0].transactions[0].name) == "Pay Day")
+
+def test_main_without_pandas(household_yaml, tmp_path):
+    import os
+    import subprocess
+    import sys
+    (tmp_path / 'plan.yml').write_text("YEARS: 1\n---\n" + household_yaml)
+    script = (
+        "import sys\n"
+        "for name in ['pandas', 'numpy']:\n"
+        "    sys.modules[name] = None\n"
+        "from financial_planner.cli import main\n"
+        "sys.argv = ['financial-planner', 'plan.yml', '2023-01-01', '2024-01-01', '--step', 'month', '--lazy-interest']\n"
+        "main()\n"
+    )
+    # Caches go to tmp_path, not the user's ~/.cache
+    env = {**os.environ, 'XDG_CACHE_HOME': str(tmp_path / 'cache')}
+    subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env, check=True, capture_output=True)
+    for name in ['transactions.csv', 'monthly_transactions.csv', 'yearly_transactions.csv', 'monthly_account_state.csv', 'amortization.csv']:
+        assert((tmp_path / 'plan_results' / name).exists())
+    assert(len((tmp_path / 'plan_results' / 'monthly_account_state.csv').read_text().splitlines()) == 3 * 12 + 1)
@@ -0,0 +1,75 @@
+import os
+
+import yaml
+from beautiful_date import Jan
+
+import financial_planner.ConfigCache as ConfigCache
+import financial_planner.ExternalTransactions as ExternalTransactions
+from financial_planner.ConfigCache import CompiledConfig
+from financial_planner.cli import YAML_LOADER, build_bank, create_simulation
+
+CSV = """name,amount,frequency_label,income_or_expense,start_date
+Groceries,120.5,weekly,expense,2023-01-07
+"""
+
+def balances(simulation) -> dict:
+    simulation.run(1/Jan/2023, 1/Jan/2024)
+    return {account.name: account.balance for account in simulation.bank.accounts}
+
+def test_compiled_bank_matches(household_yaml, tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigCache, 'CACHE_DIR', tmp_path)
+    compiles = []
+    compile = CompiledConfig.compile.__func__
+    monkeypatch.setattr(CompiledConfig, 'compile', classmethod(lambda cls, text: compiles.append(text) or compile(cls, text)))
+    expected = balances(create_simulation(household_yaml))
+    assert(balances(create_simulation(household_yaml, compiled=True)) == expected)
+    assert(balances(create_simulation(household_yaml, compiled=True)) == expected)
+    assert(len(compiles) == 1)
+    assert(len(list(tmp_path.iterdir())) == 1)
+
+    create_simulation(household_yaml.replace('2023', '2022'), compiled=True)
+    assert(len(compiles) == 2)
+
+def test_bank_copies(household_yaml):
+    compiled = CompiledConfig.compile(household_yaml)
+    first, second = compiled.bank(), compiled.bank()
+    assert(first is not second)
+    assert(first.accounts[0] is not second.accounts[0])
+    assert([account.name for account in first.accounts] == [account.name for account in second.accounts])
+
+def test_external_csv_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigCache, 'CACHE_DIR', tmp_path / 'compiled')
+    monkeypatch.setattr(ExternalTransactions, 'CACHE_DIR', tmp_path / 'external')
+    path = tmp_path / 'bank.csv'
+    path.write_text(CSV)
+    yaml_text = f"accounts:\n  - name: a\n    balance: 100\n    external_transactions:\n      - path: {path}\n"
+    assert(len(CompiledConfig.cached(yaml_text).bank().accounts[0].transactions) == 1)
+
+    # Touched but unchanged files are recognised by their hash
+    os.utime(path, ns=(0, 0))
+    assert(CompiledConfig.cached(yaml_text).built is None)
+
+    path.write_text(CSV + "Gym,40,monthly,expense,2023-02-01\n")
+    assert(len(CompiledConfig.cached(yaml_text).bank().accounts[0].transactions) == 2)
+
+def test_stale_entries_pruned(household_yaml, tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigCache, 'CACHE_DIR', tmp_path)
+    CompiledConfig.cached(household_yaml)
+    (entry,) = tmp_path.iterdir()
+    # Entries from days ago are dropped when the next config compiles, used ones are kept
+    stale = tmp_path / 'stale.pkl'
+    stale.write_bytes(entry.read_bytes())
+    os.utime(stale, (0, 0))
+    os.utime(entry, (0, 0))
+    CompiledConfig.cached(household_yaml)
+    assert(entry.stat().st_mtime > 0)
+    CompiledConfig.cached(household_yaml.replace('2023', '2022'))
+    assert(not stale.exists())
+    assert(entry.exists())
+    assert(len(list(tmp_path.iterdir())) == 2)
+
+def test_build_bank_leaves_config(household_yaml):
+    config = yaml.load(household_yaml, Loader=YAML_LOADER)
+    expected = yaml.load(household_yaml, Loader=YAML_LOADER)
+    build_bank(config)
+    assert(config == expected)
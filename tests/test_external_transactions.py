@@ -0,0 +1,81 @@
+import os
+
+from beautiful_date import Jan, Feb, Mar, Jun
+from decimal import Decimal
+
+from financial_planner import AccountYaml
+import financial_planner.ExternalTransactions as external
+from financial_planner.ExternalTransactions import ExternalTransactions, default_cache_dir
+from financial_planner.Transaction import MonthlyTransaction, WeeklyTransaction
+
+CSV = """name,amount,frequency_label,income_or_expense,start_date,end_date,every_x_periods,interest_rate
+Groceries,120.5,weekly,expense,2023-01-07,,,
+Salary,3000.00,Monthly,,2023-1-15,2023-03-15,,0.02
+Gym,40.125,monthly,expense,2023-02-01,,2,
+Odd,-0.005,monthly,income,2023-02-01,,,
+"""
+
+def test_parse(tmp_path):
+    path = tmp_path / 'bank.csv'
+    path.write_text(CSV)
+    transactions = ExternalTransactions.parse(path).transactions()
+    assert([transaction.name for transaction in transactions] == ['Groceries', 'Salary', 'Gym', 'Odd'])
+    groceries, salary, gym, odd = transactions
+    assert(type(groceries) == WeeklyTransaction)
+    assert(groceries.amount == Decimal("-120.50"))
+    assert(groceries.start_date == 7/Jan/2023)
+    assert(groceries.end_date is None)
+    assert(type(salary) == MonthlyTransaction)
+    assert(salary.start_date == 15/Jan/2023)
+    assert(salary.end_date == 15/Mar/2023)
+    assert(salary.interest_rate.rate == Decimal("0.02"))
+    assert(gym.amount == Decimal("-40.12"))
+    assert(gym.every_x_periods == 2)
+    assert(odd.amount == Decimal("0.00"))
+    assert(odd.start_date == 1/Feb/2023)
+
+def test_account_yaml(tmp_path, monkeypatch):
+    monkeypatch.setattr(external, 'CACHE_DIR', tmp_path / 'cache')
+    path = tmp_path / 'bank.csv'
+    path.write_text(CSV)
+    yaml_data = {
+        'name': 'a',
+        'external_transactions': [{'path': str(path), 'income_or_expense': 'income', 'end_date': '2023-06-01'}],
+    }
+    account = AccountYaml(yaml_data)
+    assert(len(account.transactions) == 4)
+    assert(all(transaction.amount >= 0 for transaction in account.transactions))
+    assert(all(transaction.end_date == 1/Jun/2023 for transaction in account.transactions))
+    # The YAML data is left as it was
+    assert(yaml_data['external_transactions'] == [{'path': str(path), 'income_or_expense': 'income', 'end_date': '2023-06-01'}])
+
+def test_cache(tmp_path, monkeypatch):
+    path = tmp_path / 'bank.csv'
+    path.write_text(CSV)
+    cache_dir = tmp_path / 'cache'
+    parses = []
+    parse = ExternalTransactions.parse.__func__
+    monkeypatch.setattr(ExternalTransactions, 'parse', classmethod(lambda cls, path: parses.append(path) or parse(cls, path)))
+
+    assert(len(ExternalTransactions.load(path, cache_dir=cache_dir)) == 4)
+    assert(len(ExternalTransactions.load(path, cache_dir=cache_dir)) == 4)
+    assert(len(parses) == 1)
+
+    # Touched but unchanged files are recognised by their hash
+    os.utime(path, ns=(0, 0))
+    assert(len(ExternalTransactions.load(path, cache_dir=cache_dir)) == 4)
+    assert(len(parses) == 1)
+
+    path.write_text(CSV + "Bonus,500,yearly,,2023-03-01,,,\n")
+    changed = ExternalTransactions.load(path, cache_dir=cache_dir)
+    assert(len(parses) == 2)
+    assert(len(changed) == 5)
+    assert(changed.transactions()[-1].start_date == 1/Mar/2023)
+
+def test_default_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+    assert(default_cache_dir() == tmp_path / 'xdg' / 'financial_planner')
+    for value in ['', 'relative/cache']:
+        monkeypatch.setenv('XDG_CACHE_HOME', value)
+        assert(default_cache_dir() == tmp_path / '.cache' / 'financial_planner')
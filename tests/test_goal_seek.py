@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from beautiful_date import Jan
+
+from financial_planner.GoalSeek import MinimumBalance, NoBankruptcy, goal_seek, parse_constraint
+from financial_planner.cli import create_simulation
+
+def pay_yaml(household_yaml: str) -> str:
+    return "PAY: 2100.00\n---\n" + household_yaml.replace("amount: 2100.00", "amount: {{ PAY }}")
+
+def test_stop_when(household_yaml):
+    simulation = create_simulation(household_yaml)
+    simulation.run(1/Jan/2023, 1/Jan/2025, stop_when=lambda bank, date: date >= 10/Jan/2023)
+    assert(simulation.stopped_date == 10/Jan/2023)
+    assert(simulation.next_date == 11/Jan/2023)
+    simulation.resume(1/Jan/2025)
+    assert(simulation.stopped_date is None)
+    full = create_simulation(household_yaml)
+    full.run(1/Jan/2023, 1/Jan/2025)
+    assert([account.balance for account in simulation.bank.accounts] == [account.balance for account in full.bank.accounts])
+
+def test_smallest_pay(household_yaml):
+    results = [
+        goal_seek(pay_yaml(household_yaml), 'PAY', '1000', '3000', 1/Jan/2023, 1/Jan/2025, NoBankruptcy(), method=method, tolerance='1')
+        for method in ['bisection', 'secant']
+    ]
+    assert(results[0].value == results[1].value)
+    pay = Decimal(results[0].value)
+    for value, survives in [(pay, True), (pay - 1, False)]:
+        simulation = create_simulation(pay_yaml(household_yaml).split('---')[1].replace('{{ PAY }}', str(value)))
+        simulation.run(1/Jan/2023, 1/Jan/2025)
+        assert((simulation.bankrupt_date is None) == survives)
+
+def test_minimum_balance_secant(household_yaml):
+    constraint = MinimumBalance('Savings', '5000')
+    bisection = goal_seek(pay_yaml(household_yaml), 'PAY', '1000', '5000', 1/Jan/2023, 1/Jan/2025, constraint)
+    secant = goal_seek(pay_yaml(household_yaml), 'PAY', '1000', '5000', 1/Jan/2023, 1/Jan/2025, constraint, method='secant')
+    assert(bisection.value == secant.value)
+    assert(len(secant.trials) < len(bisection.trials))
+    # Failing trials stop early
+    assert(any(stopped is not None for _, satisfied, _, _, stopped in bisection.trials if not satisfied))
+
+def test_out_of_range(household_yaml):
+    result = goal_seek(pay_yaml(household_yaml), 'PAY', '100', '200', 1/Jan/2023, 1/Jan/2025, parse_constraint('no_bankruptcy'))
+    assert(result.value is None)
+    assert(len(result.trials) == 1)
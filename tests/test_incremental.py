@@ -0,0 +1,87 @@
+import datetime
+
+from beautiful_date import Jan, Feb, Jul, Sept
+
+from financial_planner import DateUnit
+from financial_planner.Incremental import SimulationCache, earliest_change
+from financial_planner.cli import create_simulation
+
+NEW_EXPENSE = """          - name: Car
+            amount: 400.00
+            start_date: 2026-09-05
+        weekly:"""
+
+def run(yaml_text, cache, end_date=1/Jan/2028, **kwargs):
+    simulation = create_simulation(yaml_text, cache=cache, end_date=end_date)
+    if simulation.next_date is None:
+        simulation.run(1/Jan/2023, end_date, observers=[cache], **kwargs)
+    else:
+        simulation.resume(end_date, observers=[cache], **kwargs)
+    return simulation
+
+def results(simulation):
+    return (
+        [account.balance for account in simulation.bank.accounts],
+        [log.to_dict() for log in simulation.bank.transaction_log],
+        simulation.bank.state_log.to_frame(),
+    )
+
+def assert_same(fresh, cached):
+    fresh, cached = results(fresh), results(cached)
+    assert(fresh[0] == cached[0])
+    assert(fresh[1] == cached[1])
+    assert(fresh[2].equals(cached[2]))
+
+def test_earliest_change(household_yaml):
+    import yaml
+    def parse(text):
+        return yaml.load(text, Loader=yaml.BaseLoader)
+    assert(earliest_change(parse(household_yaml), parse(household_yaml)) == datetime.date.max)
+    assert(earliest_change(parse(household_yaml), parse(household_yaml.replace("        weekly:", NEW_EXPENSE, 1))) == 5/Sept/2026)
+    assert(earliest_change(parse(household_yaml), parse(household_yaml.replace("2024-06-30", "2026-06-30"))) == 1/Jul/2024)
+    assert(earliest_change(parse(household_yaml), parse(household_yaml.replace("balance: 10000.00", "balance: 9000.00"))) is None)
+    assert(earliest_change(parse(household_yaml), parse(household_yaml.replace("terms: 180", "terms: 120"))) is None)
+
+def test_resimulates_from_edit(household_yaml, tmp_path):
+    cache = SimulationCache(1/Jan/2023)
+    run(household_yaml, cache)
+    cache.save(tmp_path / 'cache.pkl')
+    cache = SimulationCache.open(tmp_path / 'cache.pkl', 1/Jan/2023)
+    edited = household_yaml.replace("        weekly:", NEW_EXPENSE, 1)
+    assert(create_simulation(edited, cache=SimulationCache.open(tmp_path / 'cache.pkl', 1/Jan/2023), end_date=1/Jan/2028).next_date == 1/Sept/2026)
+    cached = run(edited, cache)
+    assert(cached.bank.state_log[0]['date'] == 1/Jan/2023)
+    assert(cache.snapshots[1]['next_date'] == 1/Feb/2023)
+    assert_same(run(edited, SimulationCache(1/Jan/2023)), cached)
+
+def test_monthly_steps(household_yaml):
+    cache = SimulationCache(1/Jan/2023, DateUnit.MONTHS, lazy_interest=True)
+    run(household_yaml, cache, step=DateUnit.MONTHS, lazy_interest=True)
+    edited = household_yaml.replace("2024-06-30", "2026-06-30")
+    cached = run(edited, cache, step=DateUnit.MONTHS, lazy_interest=True)
+    fresh = run(edited, SimulationCache(1/Jan/2023), step=DateUnit.MONTHS, lazy_interest=True)
+    assert_same(fresh, cached)
+
+def test_external_csv_edit(tmp_path, monkeypatch):
+    import financial_planner.ExternalTransactions as ExternalTransactions
+    monkeypatch.setattr(ExternalTransactions, 'CACHE_DIR', tmp_path / 'external')
+    path = tmp_path / 'bank.csv'
+    path.write_text("name,amount,frequency_label,income_or_expense,start_date\nRent,100,monthly,expense,2023-01-15\n")
+    yaml_text = f"accounts:\n  - name: Checking\n    balance: 20000\n    external_transactions:\n      - path: {path}\n"
+    cache = SimulationCache(1/Jan/2023)
+    run(yaml_text, cache, end_date=1/Jan/2025)
+    path.write_text("name,amount,frequency_label,income_or_expense,start_date\nRent,500,monthly,expense,2023-01-15\n")
+    cached = run(yaml_text, cache, end_date=1/Jan/2025)
+    assert(cached.bank.accounts[0].balance == 20000 - 24 * 500)
+    assert_same(run(yaml_text, SimulationCache(1/Jan/2023), end_date=1/Jan/2025), cached)
+
+def test_shorter_rerun(household_yaml):
+    cache = SimulationCache(1/Jan/2023)
+    run(household_yaml, cache, end_date=1/Jan/2028)
+    # The cached run went further, only snapshots up to the new end_date are reused
+    assert(create_simulation(household_yaml, cache=cache, end_date=15/Jul/2024).next_date == 1/Jul/2024)
+    cache = SimulationCache(1/Jan/2023)
+    run(household_yaml, cache, end_date=1/Jan/2028)
+    cached = run(household_yaml, cache, end_date=15/Jul/2024)
+    assert(cached.bank.state_log[-1]['date'] == 14/Jul/2024)
+    assert_same(run(household_yaml, SimulationCache(1/Jan/2023), end_date=15/Jul/2024), cached)
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from beautiful_date import Jan, Mar, Dec
+
+from financial_planner import DateUnit, InterestRate
+from financial_planner.InterestRate import RateSchedule, make_rate
+
+def test_make_rate():
+    assert(type(make_rate("0.03")) == InterestRate)
+    assert(type(make_rate({'2024': '0.03'})) == RateSchedule)
+
+def test_rate_schedule_lookup():
+    schedule = RateSchedule({'2024-03-01': '0.05', '2024': '0.03', '2025': '0.04'})
+    assert(schedule.at(1/Jan/2020).rate == Decimal("0.03"))
+    assert(schedule.at(28/Mar/2024).rate == Decimal("0.05"))
+    assert(schedule.at(31/Dec/2024).rate == Decimal("0.05"))
+    assert(schedule.at(1/Jan/2030).rate == Decimal("0.04"))
+    assert(schedule.constant_days(1/Jan/2024, 1000) == 60)
+    assert(schedule.constant_days(1/Jan/2025, 1000) == 1000)
+    assert(schedule.at(1/Jan/2024).interest(Decimal("3650.00"), DateUnit.DAYS) == Decimal("0.30"))
+
+def test_rate_schedule_growth():
+    schedule = RateSchedule({'2023': '0.0365', '2023-01-03': '0.073'})
+    # 0.0001 then 0.0002 per day, simple like InterestRate
+    assert(schedule.growth_factor(1/Jan/2023, 3) == Decimal("1.0004"))
+    assert(schedule.grow(Decimal("10000.00"), 1/Jan/2023, 4/Jan/2023) == Decimal("10004.00"))
+    assert(schedule.grow(1000000, 1/Jan/2023, 4/Jan/2023) == 1000400)
+
+def test_one_rate_schedule_matches_rate():
+    rate, schedule = InterestRate("0.05"), RateSchedule({'2023-01-01': '0.05'})
+    for days in [1, 30, 365, 20 * 365 + 5]:
+        assert(schedule.grow_days(Decimal("1000.00"), (1/Jan/2023).toordinal(), days) == rate.grow_days(Decimal("1000.00"), (1/Jan/2023).toordinal(), days))
+        assert(schedule.grow_days(100000, (1/Jan/2023).toordinal(), days) == rate.grow_days(100000, (1/Jan/2023).toordinal(), days))
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from beautiful_date import Jan
+
+from financial_planner import Account
+from financial_planner.Ledger import StateLedger, TransactionLedger
+from financial_planner.Transaction import TransactionLog
+
+def test_state_ledger():
+    accounts = [Account('a', balance="1.50"), Account('b', balance="-2.25")]
+    ledger = StateLedger()
+    ledger.reserve(accounts, 2)
+    ledger.capture(1/Jan/2023, accounts)
+    accounts[0].balance += Decimal("1.00")
+    for day in range(2, 5):
+        ledger.capture(day/Jan/2023, accounts)
+    assert(len(ledger) == 4)
+    assert(ledger[-1] == {'date': 4/Jan/2023, 'a': 2.5, 'b': -2.25})
+    assert(ledger.to_array().shape == (4, 2))
+    frame = ledger.to_frame()
+    assert(list(frame.columns) == ['a', 'b'])
+    assert(frame['a'].iloc[0] == 1.5)
+    long_frame = ledger.to_long_frame()
+    assert(list(long_frame['account'][:4]) == ['a', 'b', 'a', 'b'])
+    assert(long_frame['balance'].iloc[2] == 2.5)
+
+def test_simulation_preallocates(household_yaml):
+    from financial_planner.cli import create_simulation
+    simulation = create_simulation(household_yaml)
+    simulation.run(1/Jan/2023, 11/Jan/2023)
+    assert(len(simulation.bank.state_log) == 11)
+    assert(len(simulation.bank.state_log.dates) == 11)
+
+def test_transaction_ledger():
+    ledger = TransactionLedger()
+    ledger.record(None, 'a', 'interest', Decimal("0.25"), 1/Jan/2023)
+    ledger.append(TransactionLog('a', 'b', 'Transfer', Decimal("-10.00"), 2/Jan/2023))
+    assert(len(ledger) == 2)
+    assert(ledger.names == ['a', 'interest', 'b', 'Transfer'])
+    assert(ledger[1] == TransactionLog('a', 'b', 'Transfer', Decimal("-10.00"), 2/Jan/2023))
+    assert(ledger[-2].source is None)
+    assert([log.amount for log in ledger] == [Decimal("0.25"), Decimal("-10.00")])
+    frame = ledger.to_frame()
+    assert(list(frame['amount']) == [0.25, -10.0])
+    assert(frame['source'].isna().iloc[0])
+    assert(frame['destination'].iloc[1] == 'b')
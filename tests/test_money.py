@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from beautiful_date import Jan, Feb
+
+from financial_planner import DateUnit, InterestRate
+from financial_planner.Money import divide_cents, scaled, to_cents, from_cents
+from financial_planner.cli import create_simulation
+
+def test_divide_cents():
+    assert(divide_cents(5, 2) == 2)
+    assert(divide_cents(7, 2) == 4)
+    assert(divide_cents(-5, 2) == -2)
+    assert(divide_cents(-7, 2) == -4)
+    assert(divide_cents(26, 10) == 3)
+
+def test_conversions():
+    assert(scaled(Decimal("0.035")) == (35, 1000))
+    assert(scaled(Decimal("-2E+1")) == (-20, 1))
+    assert(to_cents(Decimal("-12.05")) == -1205)
+    assert(from_cents(-1205) == Decimal("-12.05"))
+
+def test_interest_matches_decimal():
+    rate = InterestRate("0.0437")
+    for balance in ["0.01", "12.34", "-912.50", "123456.78", "99999999.99"]:
+        for date_unit in DateUnit:
+            expected = rate.interest(Decimal(balance), date_unit)
+            assert(from_cents(rate.interest(to_cents(Decimal(balance)), date_unit)) == expected)
+        assert(from_cents(rate.grow(to_cents(Decimal(balance)), 1/Jan/2023, 4/Feb/2024)) == rate.grow(Decimal(balance), 1/Jan/2023, 4/Feb/2024))
+
+def test_simulation_matches_decimal(household_yaml):
+    for text in [household_yaml, household_yaml.replace("amount: 2100.00", "amount: 1200.00")]:
+        for options in [{}, {'lazy_interest': True, 'step': DateUnit.MONTHS}]:
+            decimal = create_simulation(text)
+            decimal.run(1/Jan/2023, 1/Jan/2033, **options)
+            cents = create_simulation(text)
+            cents.run(1/Jan/2023, 1/Jan/2033, integer_cents=True, **options)
+            assert([account.balance for account in decimal.bank.accounts] == [account.balance for account in cents.bank.accounts])
+            assert(all(type(account.balance) == Decimal for account in cents.bank.accounts))
+            assert([log.to_dict() for log in decimal.bank.transaction_log] == [log.to_dict() for log in cents.bank.transaction_log])
+            assert(decimal.bank.state_log.to_frame().equals(cents.bank.state_log.to_frame()))
+            assert(decimal.bankrupt_date == cents.bankrupt_date)
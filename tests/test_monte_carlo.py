@@ -0,0 +1,64 @@
+from decimal import Decimal
+import random
+
+from beautiful_date import Jan, Mar
+import numpy as np
+import pytest
+
+from financial_planner.cli import create_simulation
+from financial_planner.MonteCarlo import RateDistribution, parse_distributions, run_monte_carlo
+from financial_planner.VectorSimulation import VectorSimulation
+
+def test_rate_distribution():
+    rate = RateDistribution('uniform', 0.01, 0.02)
+    value = rate.draw(random.Random(1))
+    assert(Decimal("0.01") <= value <= Decimal("0.02"))
+    parsed = parse_distributions({'Savings': {'distribution': 'gauss', 'parameters': ['0.05', '0.1']}})
+    assert(parsed['Savings'].parameters == [0.05, 0.1])
+    for distribution in ['seed', 'getstate', 'shuffle', 'missing']:
+        try:
+            RateDistribution(distribution)
+            assert(False), f"{distribution} was accepted"
+        except AssertionError as error:
+            assert(str(error).startswith('Unknown distribution'))
+
+def test_run_monte_carlo(household_yaml):
+    result = run_monte_carlo(
+        household_yaml,
+        1/Jan/2023,
+        1/Jan/2024,
+        paths=8,
+        account_rates={'Savings': RateDistribution('gauss', 0.05, 0.1)},
+        percentiles=(5, 50, 95),
+        workers=2,
+        engine=VectorSimulation,
+    )
+    assert(result.path_count == 8)
+    assert(result.bands[50].shape == (365, 3))
+    assert((result.bands[5] <= result.bands[95]).all())
+    assert((result.bankruptcy_probability == 0).all())
+
+def test_constant_rates_match_deterministic(household_yaml):
+    result = run_monte_carlo(
+        household_yaml,
+        1/Jan/2023,
+        1/Mar/2023,
+        paths=2,
+        account_rates={'Savings': RateDistribution('uniform', 0.04, 0.04)},
+        percentiles=(50,),
+        workers=1,
+    )
+    simulation = create_simulation(household_yaml)
+    simulation.run(1/Jan/2023, 1/Mar/2023)
+    final = np.array([float(account.balance) for account in simulation.bank.accounts])
+    assert(np.allclose(result.bands[50][-1], final, atol=0.01))
+
+def test_rate_names_checked(household_yaml):
+    for account_rates, transaction_rates, message in [
+        ({'Savigns': RateDistribution('random')}, {}, "unknown account Savigns"),
+        ({}, {'Rnet': RateDistribution('random')}, "unknown transaction Rnet"),
+        ({'House': RateDistribution('random')}, {}, "mortgage House"),
+        ({}, {'House Mortgage Payment': RateDistribution('random')}, "mortgage transaction House Mortgage Payment"),
+    ]:
+        with pytest.raises(AssertionError, match=message):
+            run_monte_carlo(household_yaml, 1/Jan/2023, 1/Mar/2023, paths=1, account_rates=account_rates, transaction_rates=transaction_rates, workers=1)
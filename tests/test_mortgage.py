@@ -2,7 +2,7 @@ from decimal import Decimal
 
 import beautiful_date as BD
 
-from financial_planner.Mortgage import compute_payment, MortgagePaymentTransaction, MortgagePrincipal
+from financial_planner.Mortgage import compute_payment, AmortizationSchedule, MortgagePaymentTransaction, MortgagePrincipal
 from financial_planner import ZERO
 
 def test_compute_payment():
@@ -39,4 +39,35 @@ def test_principal_cost():
         name='a',
         interest_rate="0.0299"
     )
-    assert(t.get_cost(BD.D.today()) < t.payment)
\ No newline at end of file
+    assert(t.get_cost(BD.D.today()) < t.payment)
+
+def test_amortization_schedule_reaches_zero():
+    schedule = AmortizationSchedule(Decimal("20000"), Decimal("790.79"), Decimal("0.05") / Decimal("12"))
+    assert(schedule.remaining[-1] == ZERO)
+    assert(sum(schedule.principal) == Decimal("20000.00"))
+    assert(schedule.payments[-1] < schedule.payments[0])
+    for payment, interest, principal in zip(schedule.payments, schedule.interest, schedule.principal):
+        assert(payment == interest + principal)
+
+def test_extra_principal():
+    t = MortgagePaymentTransaction(
+        Decimal("460000"),
+        Decimal("460000"),
+        180,
+        extra_principal=Decimal("500"),
+        name='a',
+        interest_rate="0.0299"
+    )
+    assert(t.payment == Decimal("3674.46"))
+    assert(len(t.schedule) < 180)
+
+def test_mortgage_pays_off_exactly(household_yaml):
+    from financial_planner.cli import create_simulation
+    simulation = create_simulation(household_yaml)
+    simulation.run(BD.BeautifulDate(2023, 1, 1), BD.BeautifulDate(2026, 1, 1))
+    house = simulation.bank.account_map['House']
+    payment = simulation.bank.mortgages['House']
+    assert(house.balance == ZERO)
+    assert(house.transactions[0].schedule is payment.schedule)
+    assert(payment.remaining_balance == ZERO)
+    assert(payment.get_cost(BD.BeautifulDate(2026, 1, 1), BD.BeautifulDate(2023, 1, 1)) == ZERO)
@@ -0,0 +1,61 @@
+import csv
+
+from beautiful_date import Jan, Feb, Jun, Dec
+
+from financial_planner import DateUnit
+from financial_planner.cli import create_simulation
+from financial_planner.Output import StreamingWriter
+from financial_planner.Reducers import last_day_of_month
+
+def read_results(results_dir):
+    return {
+        name: list(csv.reader(open(results_dir / name)))
+        for name in ['transactions.csv', 'monthly_transactions.csv', 'monthly_account_state.csv']
+    }
+
+def test_last_day_of_month():
+    assert(last_day_of_month(15/Feb/2024) == 29/Feb/2024)
+    assert(last_day_of_month(1/Dec/2023) == 31/Dec/2023)
+
+def test_chunking_does_not_change_output(household_yaml, tmp_path):
+    outputs = []
+    for chunk_rows in [10, 1000000]:
+        results_dir = tmp_path / str(chunk_rows)
+        results_dir.mkdir()
+        simulation = create_simulation(household_yaml)
+        simulation.run(1/Jan/2023, 1/Jan/2024, observers=[StreamingWriter(results_dir, chunk_rows=chunk_rows)], keep_logs=False)
+        assert(len(simulation.bank.transaction_log) == 0)
+        assert(len(simulation.bank.state_log) == 0)
+        outputs.append(read_results(results_dir))
+    assert(outputs[0] == outputs[1])
+
+def test_streamed_transactions_match_log(household_yaml, tmp_path):
+    simulation = create_simulation(household_yaml)
+    simulation.run(1/Jan/2023, 1/Jun/2023, observers=[StreamingWriter(tmp_path)])
+    rows = read_results(tmp_path)
+    assert(len(rows['transactions.csv']) == len(simulation.bank.transaction_log) + 1)
+    first = simulation.bank.transaction_log[0]
+    assert(rows['transactions.csv'][1][1:] == ['', first.destination, first.title, str(first.amount), first.date.isoformat()])
+    assert(rows['monthly_account_state.csv'][-1][1:3] == ['2023-05-31', 'House'])
+
+def test_monthly_steps_mid_month(household_yaml, tmp_path):
+    outputs = []
+    for chunk_rows in [10, 1000000]:
+        results_dir = tmp_path / str(chunk_rows)
+        results_dir.mkdir()
+        simulation = create_simulation(household_yaml)
+        simulation.run(15/Jan/2023, 15/Jan/2025, observers=[StreamingWriter(results_dir, chunk_rows=chunk_rows)], keep_logs=False, step=DateUnit.MONTHS)
+        outputs.append(read_results(results_dir))
+    assert(outputs[0] == outputs[1])
+    assert(len(outputs[0]['monthly_account_state.csv']) == 3 * 24 + 1)
+
+def test_rollups_only(household_yaml, tmp_path):
+    full_dir, rollups_dir = tmp_path / 'full', tmp_path / 'rollups'
+    for results_dir, transactions in [(full_dir, True), (rollups_dir, False)]:
+        results_dir.mkdir()
+        simulation = create_simulation(household_yaml)
+        simulation.run(1/Jan/2023, 1/Jan/2024, observers=[StreamingWriter(results_dir, transactions=transactions)], keep_logs=False)
+    assert(not (rollups_dir / 'transactions.csv').exists())
+    for name in ['monthly_transactions.csv', 'yearly_transactions.csv', 'monthly_account_state.csv']:
+        assert((full_dir / name).read_text() == (rollups_dir / name).read_text())
+    assert(len((rollups_dir / 'yearly_transactions.csv').read_text().splitlines()) > 1)
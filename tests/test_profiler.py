@@ -0,0 +1,36 @@
+import json
+import pickle
+
+from beautiful_date import Jan
+
+from financial_planner.cli import create_simulation
+from financial_planner.Profiler import SimulationProfiler, REPORT_NAME
+
+def test_profiler(household_yaml, tmp_path):
+
+    simulation = create_simulation(household_yaml.replace("amount: 2100.00", "amount: 1200.00"))
+    simulation.run(1/Jan/2023, 1/Jan/2025, event_driven=False, observers=[SimulationProfiler(simulation.bank, tmp_path)])
+    report = json.loads((tmp_path / REPORT_NAME).read_text())
+    # Polling evaluates every transaction every day
+    days = (simulation.bankrupt_date - (1/Jan/2023)).days + 1
+    assert(report['methods']['process_date']['calls'] == days)
+    costs = report['transaction_costs']
+    assert(costs['WeeklyTransaction']['calls'] == days)
+    assert(0 < costs['WeeklyTransaction']['non_zero'] < days)
+    transfers = [log for log in simulation.bank.transaction_log if log.title.endswith('Low Balance Transfer')]
+    assert(report['low_balance_transfers'] * 2 == len(transfers))
+    assert(report['methods']['find_next_account']['calls'] == report['low_balance_transfers'] + 1)
+    assert(report['peak_log_rows']['transactions'] == len(simulation.bank.transaction_log))
+
+    # Wrappers are gone once the run is over
+    assert('process_date' not in vars(simulation.bank))
+    pickle.dumps(simulation.bank)
+
+def test_profiler_does_not_change_results(household_yaml):
+    logs = []
+    for profile in [False, True]:
+        simulation = create_simulation(household_yaml)
+        observers = [SimulationProfiler(simulation.bank)] if profile else []
+        simulation.run(1/Jan/2023, 1/Jan/2025, observers=observers)
+        logs.append([log.to_dict() for log in simulation.bank.transaction_log])
+    assert(logs[0] == logs[1])
@@ -0,0 +1,37 @@
+import datetime
+
+from beautiful_date import Jan
+
+from financial_planner.cli import create_simulation
+from financial_planner.Reducers import MonthEndBalances, MonthlyTransactionSums, YearlyTotals, last_day_of_month
+
+def test_reducers_match_logs(household_yaml):
+    reducers = [MonthlyTransactionSums(), YearlyTotals(), MonthEndBalances()]
+    streamed = create_simulation(household_yaml)
+    streamed.run(1/Jan/2023, 1/Jan/2025, observers=reducers, keep_logs=False)
+    monthly, yearly, month_ends = reducers
+
+    simulation = create_simulation(household_yaml)
+    simulation.run(1/Jan/2023, 1/Jan/2025)
+    expected_monthly = {}
+    expected_yearly = {}
+    for log in simulation.bank.transaction_log:
+        cents = int(log.amount * 100)
+        month_key = (last_day_of_month(log.date), log.destination)
+        expected_monthly[month_key] = expected_monthly.get(month_key, 0) + cents
+        year_key = (datetime.date(log.date.year, 12, 31), log.destination)
+        expected_yearly[year_key] = expected_yearly.get(year_key, 0) + cents
+    assert(monthly.rows() == [(date, destination, expected_monthly[(date, destination)]) for date, destination in sorted(expected_monthly)])
+    assert(yearly.rows() == [(date, destination, expected_yearly[(date, destination)]) for date, destination in sorted(expected_yearly)])
+    assert(len(yearly.rows()) == 2 * len({destination for _, destination in expected_yearly}))
+
+    states = simulation.bank.state_log
+    last_rows = {}
+    for row in range(len(states)):
+        last_rows[(states[row]['date'].year, states[row]['date'].month)] = states[row]
+    expected_balances = [
+        (state['date'], account, float(state[account]))
+        for _, state in sorted(last_rows.items())
+        for account in states.accounts
+    ]
+    assert(month_ends.rows() == expected_balances)
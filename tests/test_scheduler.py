@@ -0,0 +1,34 @@
+from beautiful_date import Jan, Feb, Mar, May, Jul, Nov
+
+from financial_planner import DailyTransaction, MonthlyTransaction, YearlyTransaction
+from financial_planner.Transaction import WeeklyTransaction
+from financial_planner.cli import create_simulation
+
+def test_next_occurrence():
+    weekly = WeeklyTransaction('a', 5, start_date=2/Jan/2023, every_x_periods=2)
+    assert(weekly.next_occurrence(1/Jan/2023) == 2/Jan/2023)
+    assert(weekly.next_occurrence(3/Jan/2023) == 16/Jan/2023)
+    assert(weekly.next_occurrence(16/Jan/2023) == 16/Jan/2023)
+
+    monthly = MonthlyTransaction('a', 5, start_date=15/Feb/2023, every_x_periods=3, end_date=1/Jan/2024)
+    assert(monthly.next_occurrence(16/Feb/2023) == 15/May/2023)
+    assert(monthly.next_occurrence(15/Nov/2023) == 15/Nov/2023)
+    assert(monthly.next_occurrence(16/Nov/2023) is None)
+
+    yearly = YearlyTransaction('a', 5, start_date=10/Jul/2023)
+    assert(yearly.next_occurrence(11/Jul/2023) == 10/Jul/2024)
+
+    daily = DailyTransaction('a', 5, start_date=1/Mar/2023, end_date=3/Mar/2023)
+    assert(daily.next_occurrence(4/Mar/2023) is None)
+
+def test_event_driven_matches_polling(household_yaml):
+    results = []
+    for event_driven in [False, True]:
+        sim = create_simulation(household_yaml)
+        sim.run(1/Jan/2023, 1/Jan/2026, event_driven=event_driven)
+        results.append((
+            [log.to_dict() for log in sim.bank.transaction_log],
+            sim.bank.state_log.to_frame(),
+        ))
+    assert(results[0][0] == results[1][0])
+    assert(results[0][1].equals(results[1][1]))
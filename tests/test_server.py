@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+from beautiful_date import Jan, Mar
+
+from financial_planner.Server import ForecastServer, run_forecast
+from financial_planner.cli import create_simulation
+
+async def request(port: int, method: str, target: str, payload: dict = None) -> tuple:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = b'' if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(data)
+
+def balances(yaml_text: str, end_date) -> dict:
+    simulation = create_simulation(yaml_text)
+    simulation.run(1/Jan/2023, end_date)
+    return {account.name: str(account.balance) for account in simulation.bank.accounts}
+
+def test_run_forecast_resumes(household_yaml):
+    # Later dates resume the warm snapshot, earlier ones simulate again
+    for end_date in [1/Mar/2023, 1/Jan/2024, 1/Mar/2023]:
+        result = run_forecast(household_yaml, {}, 1/Jan/2023, end_date)
+        assert(result['balances'] == balances(household_yaml, end_date))
+
+def test_server(household_yaml, tmp_path):
+    config = tmp_path / 'household.yml'
+    config.write_text("PAY: 2100.00\n---\n" + household_yaml.replace("amount: 2100.00", "amount: {{ PAY }}"))
+
+    async def scenario():
+        server = ForecastServer(config, 1/Jan/2023, workers=1)
+        listening = await server.start('127.0.0.1', 0)
+        port = listening.sockets[0].getsockname()[1]
+        try:
+            responses = await asyncio.gather(*[
+                request(port, 'POST', '/forecast', {'end_date': '2024-01-01'})
+                for _ in range(3)
+            ])
+            assert(server.simulations == 1)
+            assert(all(response == responses[0] for response in responses))
+            status, result = responses[0]
+            assert(status == 200)
+            assert(result['balances'] == balances(household_yaml, 1/Jan/2024))
+
+            status, result = await request(port, 'POST', '/forecast', {'end_date': '2025-01-01', 'variables': {'PAY': 1200}})
+            assert(result['bankrupt_date'] == '2024-01-03')
+
+            status, result = await request(port, 'GET', '/balance?account=Checking&date=2023-12-31')
+            assert(status == 200)
+            assert(result['balance'] == balances(household_yaml, 1/Jan/2024)['Checking'])
+            # Same simulation as the first forecast, answered from the cache
+            assert(server.simulations == 2)
+
+            status, result = await request(port, 'GET', '/balance?account=Nobody&date=2023-12-31')
+            assert(status == 400)
+            status, result = await request(port, 'GET', '/missing')
+            assert(status == 404)
+        finally:
+            listening.close()
+            await listening.wait_closed()
+            server.close()
+
+    asyncio.run(scenario())
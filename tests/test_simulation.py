@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from beautiful_date import Jan, Feb, Mar, Apr, Jun, Dec
+
+from financial_planner import DateUnit
+from financial_planner.cli import create_simulation
+
+def non_interest(transaction_log):
+    return [log.to_dict() for log in transaction_log if log.title != 'interest']
+
+def test_step_dates():
+    from financial_planner import Simulation
+    steps = Simulation.step_dates(31/Jan/2023, 15/Mar/2023, DateUnit.MONTHS)
+    assert(steps == [(31/Jan/2023, 28/Feb/2023), (28/Feb/2023, 15/Mar/2023)])
+
+def test_monthly_step(household_yaml):
+    daily = create_simulation(household_yaml)
+    daily.run(1/Jan/2023, 1/Jan/2025)
+    monthly = create_simulation(household_yaml)
+    monthly.run(1/Jan/2023, 1/Jan/2025, step=DateUnit.MONTHS)
+    assert(len(monthly.bank.state_log) == 25)
+    assert(monthly.bank.state_log[-1]['date'] == 31/Dec/2024)
+    interest = [log for log in monthly.bank.transaction_log if log.title == 'interest']
+    assert(len(interest) == 2 * 24)
+    assert(non_interest(daily.bank.transaction_log) == non_interest(monthly.bank.transaction_log))
+
+def test_short_steps_earn_daily_interest():
+    yaml_text = "accounts:\n  - name: a\n    balance: 10000\n    interest_rate: 0.12\n"
+    for step in [DateUnit.DAYS, DateUnit.MONTHS, DateUnit.YEARS]:
+        sim = create_simulation(yaml_text)
+        sim.run(1/Jan/2023, 5/Jan/2023, step=step)
+        assert(sim.bank.accounts[0].balance == Decimal("10013.16"))
+    # Resuming mid March cuts it into two short steps, both earn daily interest
+    split = create_simulation(yaml_text)
+    split.run(1/Jan/2023, 10/Mar/2023, step=DateUnit.MONTHS)
+    split.resume(1/Jun/2023, step=DateUnit.MONTHS)
+    expected = create_simulation(yaml_text)
+    expected.run(1/Jan/2023, 1/Mar/2023, step=DateUnit.MONTHS)
+    expected.resume(1/Apr/2023)
+    expected.resume(1/Jun/2023, step=DateUnit.MONTHS)
+    assert(split.bank.accounts[0].balance == expected.bank.accounts[0].balance)
+
+def test_lazy_interest_matches_daily(household_yaml):
+    daily = create_simulation(household_yaml)
+    daily.run(1/Jan/2023, 1/Jan/2028)
+    lazy = create_simulation(household_yaml)
+    lazy.run(1/Jan/2023, 1/Jan/2028, lazy_interest=True)
+    assert([log.to_dict() for log in daily.bank.transaction_log] == [log.to_dict() for log in lazy.bank.transaction_log])
+    lazy_monthly = create_simulation(household_yaml)
+    lazy_monthly.run(1/Jan/2023, 1/Jan/2028, lazy_interest=True, step=DateUnit.MONTHS)
+    daily_state = daily.bank.state_log.to_frame()
+    monthly_state = lazy_monthly.bank.state_log.to_frame().iloc[1:]
+    assert(daily_state.loc[monthly_state.index].equals(monthly_state))
+
+def test_checkpoint_resume(household_yaml, tmp_path):
+    from financial_planner import Simulation
+    straight = create_simulation(household_yaml)
+    straight.run(1/Jan/2023, 1/Jan/2026)
+    first = create_simulation(household_yaml)
+    first.run(1/Jan/2023, 15/Jun/2024)
+    first.save_checkpoint(tmp_path / 'bank.ckpt')
+    resumed = Simulation.load_checkpoint(tmp_path / 'bank.ckpt')
+    assert(resumed.next_date == 15/Jun/2024)
+    assert(resumed.relative_date == 1/Jan/2023)
+    resumed.resume(1/Jan/2026)
+    assert([account.balance for account in straight.bank.accounts] == [account.balance for account in resumed.bank.accounts])
+    assert([log.to_dict() for log in straight.bank.transaction_log] == [log.to_dict() for log in resumed.bank.transaction_log])
+    assert(straight.bank.state_log.to_frame().equals(resumed.bank.state_log.to_frame()))
+
+def test_rate_schedules(household_yaml):
+    yaml_text = household_yaml.replace("    interest_rate: 0.04\n", """    interest_rate:
+      2023: 0.04
+      2024-03-15: 0.02
+      2026: 0.05
+""").replace("            interest_rate: 0.03\n", """            interest_rate:
+              2023: 0.03
+              2025: 0.06
+""")
+    daily = create_simulation(yaml_text)
+    daily.run(1/Jan/2023, 1/Jan/2028)
+    lazy = create_simulation(yaml_text)
+    lazy.run(1/Jan/2023, 1/Jan/2028, lazy_interest=True, integer_cents=True)
+    assert([log.to_dict() for log in daily.bank.transaction_log] == [log.to_dict() for log in lazy.bank.transaction_log])
+    rent = [log.amount for log in daily.bank.transaction_log if log.title == 'Rent']
+    assert(rent[0] == Decimal("-1500.25"))
+    assert(rent[-1] < Decimal("-1800.00"))
+
+def test_observers_closed_on_error(household_yaml, tmp_path):
+    import pickle
+    from financial_planner.Output import StreamingWriter
+    from financial_planner.Profiler import SimulationProfiler
+
+    class Failing:
+        def update(self, bank, date):
+            if date >= 10/Jan/2023:
+                raise ValueError("observer failed")
+
+        def close(self, bank):
+            pass
+
+    sim = create_simulation(household_yaml)
+    writer = StreamingWriter(tmp_path)
+    profiler = SimulationProfiler(sim.bank)
+    try:
+        sim.run(1/Jan/2023, 1/Feb/2023, observers=[writer, profiler, Failing()], keep_logs=False)
+        assert(False), "run did not raise"
+    except ValueError as error:
+        assert(str(error) == "observer failed")
+    assert(writer.file.closed)
+    assert(not writer.thread.is_alive())
+    # The profiler's wrappers are gone, the bank pickles again
+    pickle.dumps(sim.bank)
@@ -0,0 +1,25 @@
+from beautiful_date import Jan
+
+from financial_planner.Sweep import expand_range, scenario_grid, run_sweep
+
+def test_expand_range():
+    assert(expand_range({'start': '100', 'stop': '300', 'step': '100'}) == ['100', '200', '300'])
+    assert(expand_range({'start': '2040-01-31', 'stop': '2040-04-30', 'unit': 'month'}) == [
+        '2040-01-31', '2040-02-29', '2040-03-31', '2040-04-30',
+    ])
+
+def test_scenario_grid():
+    grid = scenario_grid({'A': ['1', '2'], 'B': {'start': '5', 'stop': '6'}, 'C': 'x'})
+    assert(len(grid) == 4)
+    assert(grid[-1] == {'A': '2', 'B': '6', 'C': 'x'})
+
+def test_run_sweep(household_yaml):
+    yaml_text = "PAY: [1200.00, 2100.00]\n---" + household_yaml.replace("amount: 2100.00", "amount: {{ PAY }}")
+    summary = run_sweep(yaml_text, 1/Jan/2023, 1/Jan/2025, workers=2)
+    assert(len(summary) == 6)
+    assert(list(summary.columns) == ['scenario', 'PAY', 'account', 'final_balance', 'minimum_balance', 'bankrupt_date'])
+    low_pay = summary[summary['PAY'] == '1200.00']
+    assert(low_pay['bankrupt_date'].notna().all())
+    high_pay = summary[summary['PAY'] == '2100.00']
+    assert(high_pay['bankrupt_date'].isna().all())
+    assert((high_pay['minimum_balance'] <= high_pay['final_balance']).all())
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from beautiful_date import Jan
+
+from financial_planner.cli import create_simulation
+from financial_planner.VectorSimulation import VectorSimulation
+
+def run_both(yaml_text, start_date, end_date):
+    step = create_simulation(yaml_text)
+    step.run(start_date, end_date)
+    vector = VectorSimulation(create_simulation(yaml_text).bank)
+    vector.run(start_date, end_date)
+    return step, vector
+
+def test_matches_step_simulation(household_yaml):
+    step, vector = run_both(household_yaml, 1/Jan/2023, 1/Jan/2033)
+    assert(vector.balances.shape == (3653, 3))
+    for step_account, vector_account in zip(step.bank.accounts, vector.bank.accounts):
+        assert(abs(step_account.balance - vector_account.balance) < Decimal("1.00"))
+
+def test_low_balance_transfers(household_yaml):
+    yaml_text = household_yaml.replace("amount: 2100.00", "amount: 1200.00")
+    step, vector = run_both(yaml_text, 1/Jan/2023, 1/Jan/2030)
+    transfers = [log for log in step.bank.transaction_log if 'Low Balance' in log.title]
+    assert(len(vector.bank.transaction_log) == len(transfers))
+    assert(vector.bankrupt_date == 3/Jan/2024)
+    assert(len(vector.balances) == (3/Jan/2024 - 1/Jan/2023).days)
+
+def test_rate_schedule(household_yaml):
+    yaml_text = household_yaml.replace("    interest_rate: 0.04\n", "    interest_rate:\n      2023: 0.04\n      2024-03-15: 0.02\n")
+    step, vector = run_both(yaml_text, 1/Jan/2023, 1/Jan/2033)
+    for step_account, vector_account in zip(step.bank.accounts, vector.bank.accounts):
+        assert(abs(step_account.balance - vector_account.balance) < Decimal("1.00"))
@@ -0,0 +1,21 @@
+from decimal import Decimal
+
+from financial_planner import Account
+from financial_planner.Waterfall import FundingWaterfall
+
+def test_priority_and_floor():
+    accounts = [
+        Account(name='Checking'),
+        Account(name='Brokerage', balance=Decimal("500.00"), withdrawal_priority=2),
+        Account(name='Savings', balance=Decimal("100.00"), withdrawal_priority=1, minimum_balance=Decimal("60.00")),
+        Account(name='Locked', balance=Decimal("900.00"), allow_auto_withdrawl=False),
+    ]
+    waterfall = FundingWaterfall(accounts)
+    assert(waterfall.find(exclude=accounts[0]) is accounts[2])
+    assert(waterfall.available(accounts[2]) == Decimal("40.00"))
+    accounts[2].balance = Decimal("60.00")
+    assert(waterfall.find(exclude=accounts[0]) is accounts[1])
+    assert(waterfall.find(exclude=accounts[1]) is None)
+    accounts[0].balance = Decimal("10.00")
+    waterfall.touch(accounts[0])
+    assert(waterfall.find(exclude=accounts[1]) is accounts[0])